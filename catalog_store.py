@@ -0,0 +1,556 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - Yerel ikas Katalog Aynası
+Ürün, varyant, özel alan, görsel ve fiyatları SQLite'ta tutar.
+Artımlı senkron: updatedAt ile değişen ürünler + id farkı ile silinenler.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Tam ürün kaydı için ortak GraphQL alan seçimi (runner ve ayna aynı şekli kullanır).
+PRODUCT_STATE_FIELDS = """
+              id
+              name
+              description
+              googleTaxonomyId
+              brand {
+                id
+                name
+              }
+              categories {
+                id
+                name
+              }
+              tags {
+                id
+                name
+              }
+              salesChannels {
+                id
+                status
+              }
+              translations {
+                locale
+                name
+                description
+              }
+              metaData {
+                pageTitle
+                description
+              }
+              attributes {
+                productAttributeId
+                value
+              }
+              variants {
+                id
+                sku
+                attributes {
+                  productAttributeId
+                  value
+                }
+                images {
+                  imageId
+                  isMain
+                  order
+                }
+                variantValues {
+                  variantTypeName
+                  variantValueName
+                }
+                prices {
+                  sellPrice
+                  discountPrice
+                  buyPrice
+                }
+              }
+"""
+
+_VARIANT_KEY_FIELDS = """
+                id
+                sku
+                variantValues {
+                  variantTypeName
+                  variantValueName
+                }"""
+
+# Çağrı yerine göre listProduct alan profilleri. Büyük alanlar (açıklama, özel alan
+# değerleri, görseller, çeviriler) yalnız gerçekten okunan profilde seçilir.
+PRODUCT_QUERY_PROFILES = {
+    # Ad eşleştirme ve görsel yükleme listeleri (GUI).
+    "variant_ids": """
+              id
+              name
+              variants {
+                id
+              }
+""",
+    # Görsel yükleme öncesi: varyant anahtarı + mevcut görseller.
+    "images": """
+              id
+              name
+              variants {"""
+    + _VARIANT_KEY_FIELDS
+    + """
+                images {
+                  imageId
+                  isMain
+                  order
+                }
+              }
+""",
+    # Ölçü Rehberi kontrolü. Dolu/boş ayrımı için özel alan değeri (~4 KB HTML) de
+    # seçilir; bu profil eski Ölçü Rehberi sorgusuyla aynı alanları çeker, yükü küçültmez.
+    "fitguide": """
+              id
+              name
+              attributes {
+                productAttributeId
+                value
+              }
+              variants {
+                id
+                variantValues {
+                  variantTypeName
+                  variantValueName
+                }
+                attributes {
+                  productAttributeId
+                  value
+                }
+              }
+""",
+    "features": """
+              id
+              name
+              description
+              brand {
+                id
+                name
+              }
+              tags {
+                id
+                name
+              }
+              variants {
+                id
+                variantValues {
+                  variantTypeName
+                  variantValueName
+                }
+              }
+""",
+    "full": PRODUCT_STATE_FIELDS,
+}
+
+
+def product_fields(profile: str) -> str:
+    """Profil adına göre ürün alan seçimi; bilinmeyen profil hatadır."""
+    try:
+        return PRODUCT_QUERY_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Bilinmeyen listProduct profili: {profile}") from None
+
+
+def list_product_query(operation_name: str, profile: str, variable_defs: str, arguments: str) -> str:
+    """
+    Profil alanlarıyla listProduct sorgusu kur.
+
+    Örnek: list_product_query("FindProducts", "variant_ids", "$search: String!",
+    "search: $search, pagination: {page: 1, limit: 50}")
+    """
+    return (
+        f"""
+query {operation_name}({variable_defs}) {{
+  listProduct({arguments}) {{
+    data {{"""
+        + product_fields(profile)
+        + """    }
+  }
+}
+"""
+    )
+
+
+# Alan seçimi değişirse eski satırlar eksik kalmasın diye ayna tam senkronla yenilenir.
+FIELDS_VERSION = hashlib.sha1(" ".join(PRODUCT_STATE_FIELDS.split()).encode("utf-8")).hexdigest()[:12]
+
+CATALOG_PAGE_LIMIT = 100
+CATALOG_MAX_PAGES = 1000
+DEFAULT_MAX_AGE_SECONDS = 300
+
+_CHANGED_PRODUCTS_QUERY = (
+    """
+query CatalogChangedProducts($since: Timestamp!, $page: Int!, $limit: Int!) {
+  listProduct(updatedAt: {gte: $since}, pagination: {page: $page, limit: $limit}) {
+    data {
+      updatedAt"""
+    + PRODUCT_STATE_FIELDS
+    + """    }
+  }
+}
+"""
+)
+
+_ALL_PRODUCTS_QUERY = (
+    """
+query CatalogAllProducts($page: Int!, $limit: Int!) {
+  listProduct(pagination: {page: $page, limit: $limit}) {
+    data {
+      updatedAt"""
+    + PRODUCT_STATE_FIELDS
+    + """    }
+  }
+}
+"""
+)
+
+_PRODUCT_IDS_QUERY = """
+query CatalogProductIds($page: Int!, $limit: Int!) {
+  listProduct(pagination: {page: $page, limit: $limit}) {
+    data {
+      id
+    }
+  }
+}
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    search_key TEXT NOT NULL,
+    updated_at INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_name_key ON products(name_key);
+CREATE TABLE IF NOT EXISTS variants (
+    id TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    sku_key TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_variants_product ON variants(product_id);
+CREATE INDEX IF NOT EXISTS idx_variants_sku_key ON variants(sku_key);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class CatalogStoreError(Exception):
+    """Katalog aynası hatası."""
+    pass
+
+
+def _normalize_key(value: str) -> str:
+    value = str(value or "").strip().lower()
+    return re.sub(r"\s+", " ", value)
+
+
+def _fold_key(value: str) -> str:
+    return (
+        _normalize_key(value)
+        .replace("ı", "i")
+        .replace("i̇", "i")
+        .replace("ş", "s")
+        .replace("ğ", "g")
+        .replace("ç", "c")
+        .replace("ö", "o")
+        .replace("ü", "u")
+    )
+
+
+def _to_timestamp(value) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class CatalogStore:
+    """
+    ikas kataloğunun yerel SQLite aynası.
+    Tüm metodlar thread-safe'tir; GUI ve runner aynı örneği paylaşabilir.
+    """
+
+    def __init__(self, db_path: str, max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.max_age_seconds = int(max_age_seconds)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        if self._get_meta("fields_version") != FIELDS_VERSION:
+            self._set_meta("watermark", "")
+            self._set_meta("fields_version", FIELDS_VERSION)
+        self._conn.commit()
+
+    # --- meta ---------------------------------------------------------------
+
+    def _get_meta(self, key: str, default: str = "") -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute(
+            "INSERT INTO meta(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def is_synced(self) -> bool:
+        with self._lock:
+            return bool(self._get_meta("watermark"))
+
+    def is_fresh(self) -> bool:
+        with self._lock:
+            checked_at = float(self._get_meta("checked_at", "0") or 0)
+        return self.is_synced() and (time.time() - checked_at) < self.max_age_seconds
+
+    def mark_stale(self):
+        """Yerel değişiklik sonrası bir sonraki okumada artımlı senkron zorla."""
+        with self._lock:
+            self._set_meta("checked_at", 0)
+            self._conn.commit()
+
+    # --- yazma --------------------------------------------------------------
+
+    def upsert_products(self, products: List[Dict]):
+        with self._lock:
+            for product in products or []:
+                self._upsert_product(product)
+            self._conn.commit()
+
+    def _upsert_product(self, product: Dict):
+        product_id = str((product or {}).get("id") or "")
+        if not product_id:
+            return
+        base = {k: v for k, v in product.items() if k != "variants"}
+        name = str(base.get("name") or "")
+        self._conn.execute(
+            "INSERT INTO products(id, name, name_key, search_key, updated_at, payload) "
+            "VALUES(?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = excluded.name, name_key = excluded.name_key, "
+            "search_key = excluded.search_key, updated_at = excluded.updated_at, "
+            "payload = excluded.payload",
+            (
+                product_id,
+                name,
+                _normalize_key(name),
+                _fold_key(name),
+                _to_timestamp(base.get("updatedAt")),
+                json.dumps(base, ensure_ascii=False),
+            ),
+        )
+        if "variants" not in product:
+            return
+        self._conn.execute("DELETE FROM variants WHERE product_id = ?", (product_id,))
+        for position, variant in enumerate(product.get("variants") or []):
+            variant_id = str((variant or {}).get("id") or "")
+            if not variant_id:
+                continue
+            self._conn.execute(
+                "INSERT OR REPLACE INTO variants(id, product_id, position, sku_key, payload) "
+                "VALUES(?, ?, ?, ?, ?)",
+                (
+                    variant_id,
+                    product_id,
+                    position,
+                    _normalize_key(variant.get("sku") or ""),
+                    json.dumps(variant, ensure_ascii=False),
+                ),
+            )
+
+    def delete_products(self, product_ids: List[str]):
+        ids = [str(pid) for pid in (product_ids or []) if pid]
+        if not ids:
+            return
+        with self._lock:
+            for pid in ids:
+                self._conn.execute("DELETE FROM variants WHERE product_id = ?", (pid,))
+                self._conn.execute("DELETE FROM products WHERE id = ?", (pid,))
+            self._conn.commit()
+
+    # --- okuma --------------------------------------------------------------
+
+    def _load_products(self, rows) -> List[Dict]:
+        products = []
+        for product_id, payload in rows:
+            product = json.loads(payload)
+            variant_rows = self._conn.execute(
+                "SELECT payload FROM variants WHERE product_id = ? ORDER BY position",
+                (product_id,),
+            ).fetchall()
+            product["variants"] = [json.loads(row[0]) for row in variant_rows]
+            products.append(product)
+        return products
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0])
+
+    def list_products(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM products ORDER BY name_key"
+            ).fetchall()
+            return self._load_products(rows)
+
+    def search(self, text: str, limit: int = 25) -> List[Dict]:
+        term = _fold_key(text).replace("*", "")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM products WHERE search_key LIKE ? "
+                "ORDER BY name_key LIMIT ?",
+                (f"%{term}%", int(limit)),
+            ).fetchall()
+            return self._load_products(rows)
+
+    def get_by_name(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM products WHERE name_key = ? LIMIT 1",
+                (_normalize_key(name),),
+            ).fetchall()
+            products = self._load_products(rows)
+        return products[0] if products else None
+
+    def get_by_sku(self, sku: str) -> Optional[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.id, p.payload FROM variants v JOIN products p ON p.id = v.product_id "
+                "WHERE v.sku_key = ? LIMIT 1",
+                (_normalize_key(sku),),
+            ).fetchall()
+            products = self._load_products(rows)
+        return products[0] if products else None
+
+    # --- senkron ------------------------------------------------------------
+
+    def _fetch_pages(
+        self,
+        graphql: Callable[[str, Dict], Dict],
+        query: str,
+        variables: Dict,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Dict]:
+        items: List[Dict] = []
+        for page in range(1, CATALOG_MAX_PAGES + 1):
+            data = graphql(query, dict(variables, page=page, limit=CATALOG_PAGE_LIMIT)) or {}
+            page_items = ((data.get("listProduct") or {}).get("data")) or []
+            items.extend(page_items)
+            if progress:
+                progress(page, len(items))
+            if len(page_items) < CATALOG_PAGE_LIMIT:
+                return items
+        raise CatalogStoreError(
+            f"Katalog sayfa limiti aşıldı ({CATALOG_MAX_PAGES} sayfa)."
+        )
+
+    def sync(
+        self,
+        graphql: Callable[[str, Dict], Dict],
+        full: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Kataloğu ikas ile eşitle.
+
+        Args:
+            graphql: (query, variables) -> data dict döndüren çağrı (hata durumunda raise).
+            full: True ise tüm katalog yeniden indirilir.
+            progress: (sayfa, toplam_kayit) bildirimi.
+
+        Returns:
+            {"changed": n, "deleted": n, "total": n}
+        """
+        with self._lock:
+            watermark = _to_timestamp(self._get_meta("watermark", "0"))
+
+        if full or not watermark:
+            changed = self._fetch_pages(graphql, _ALL_PRODUCTS_QUERY, {}, progress)
+            remote_ids = {str(p.get("id") or "") for p in changed}
+        else:
+            changed = self._fetch_pages(
+                graphql, _CHANGED_PRODUCTS_QUERY, {"since": watermark}, progress
+            )
+            id_rows = self._fetch_pages(graphql, _PRODUCT_IDS_QUERY, {})
+            remote_ids = {str(p.get("id") or "") for p in id_rows}
+
+        with self._lock:
+            local_ids = {
+                row[0] for row in self._conn.execute("SELECT id FROM products").fetchall()
+            }
+            deleted = [pid for pid in local_ids if pid not in remote_ids]
+            for product in changed:
+                self._upsert_product(product)
+            for pid in deleted:
+                self._conn.execute("DELETE FROM variants WHERE product_id = ?", (pid,))
+                self._conn.execute("DELETE FROM products WHERE id = ?", (pid,))
+
+            new_watermark = max(
+                [watermark] + [_to_timestamp(p.get("updatedAt")) for p in changed]
+            )
+            # updatedAt dönmeyen mağazalarda bir sonraki senkron yine tam çekim yapar.
+            self._set_meta("watermark", new_watermark or "")
+            self._set_meta("checked_at", time.time())
+            self._conn.commit()
+
+        return {"changed": len(changed), "deleted": len(deleted), "total": self.count()}
+
+    def sync_if_stale(
+        self,
+        graphql: Callable[[str, Dict], Dict],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Optional[Dict[str, int]]:
+        """Yalnızca ayna eskiyse senkron yap; taze ise None döndür."""
+        if self.is_fresh():
+            return None
+        return self.sync(graphql, progress=progress)
+
+
+_stores: Dict[str, CatalogStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_catalog_store(config: dict = None) -> CatalogStore:
+    """Mağaza başına paylaşılan katalog aynasını döndür."""
+    config = config or {}
+    store_name = re.sub(r"[^a-z0-9_-]+", "_", _normalize_key(config.get("store_name")) or "default")
+    db_path = os.path.join(config.get("cache_dir", "cache"), f"ikas_catalog_{store_name}.sqlite3")
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = CatalogStore(
+                db_path,
+                max_age_seconds=config.get("ikas_catalog_max_age_seconds", DEFAULT_MAX_AGE_SECONDS),
+            )
+            _stores[db_path] = store
+        return store
+
+
+# Test için
+if __name__ == "__main__":
+    import tempfile
+
+    store = CatalogStore(os.path.join(tempfile.mkdtemp(), "catalog.sqlite3"))
+    store.upsert_products([
+        {"id": "p1", "name": "Rayban 2140", "updatedAt": 10,
+         "variants": [{"id": "v1", "sku": "RAYBAN-2140-C01"}]},
+    ])
+    print("Ada göre:", store.get_by_name("rayban  2140")["id"])
+    print("SKU'ya göre:", store.get_by_sku("rayban-2140-c01")["id"])
+    print("Arama:", [p["name"] for p in store.search("2140")])
+    print("Profil alan sayısı:", {name: len(product_fields(name).split()) for name in PRODUCT_QUERY_PROFILES})
@@ -26,6 +26,13 @@ CONFIG_DEFAULTS = {
     "ikas_google_taxonomy_id": "178",
     "ikas_ai_description_enabled": True,
     "ikas_description_model": "gpt-4o-mini",
+    "ai_description_cache_ttl_days": 30,  # üretilen açıklamalar bu süre yeniden kullanılır
+    "ai_description_cache_max_entries": 5000,
+    "ai_description_prefetch_workers": 4,  # açıklamalar ürün işlenmeden önce paralel üretilir (0 = kapalı)
+    "ai_description_batch_size": 5,  # tek OpenAI isteğinde üretilen ürün açıklaması sayısı (1 = tekli)
+    "ai_description_hedge": False,  # OpenAI geç kalırsa Gemini de denenir, ilk geçerli yanıt alınır
+    "ai_description_hedge_delay_seconds": 8,  # yeterli ölçüm yokken hedge gecikmesi (sonra OpenAI p90)
+    "description_memo_max_entries": 4096,  # normalize/düz metin sonuçları için bellek içi LRU
     "wiro_api_key": "",
     "ai_mode": "wiro",
     
@@ -33,6 +40,24 @@ CONFIG_DEFAULTS = {
     "request_timeout_connect": 10,
     "request_timeout_read": 120,
     "request_retries": 2,
+    "ikas_upload_workers": 3,
+    "ikas_catalog_max_age_seconds": 300,
+    "ikas_graphql_batch_size": 10,
+    "ikas_price_sync_batch_size": 200,  # fiyat senkronunda tek updateVariantPrices isteğindeki varyant sayısı
+    "ikas_upload_optimize": True,
+    "ikas_upload_max_edge": 2048,
+    "ikas_upload_format": "jpeg",  # jpeg | webp (jpeg seçiliyken saydam görseller PNG kalır)
+    "ikas_upload_quality": 88,
+    "ikas_upload_prep_workers": 0,  # 0 = CPU sayısına göre
+    "ikas_min_concurrency": 1,
+    "ikas_max_concurrency": 8,
+    "ikas_graphql_initial_concurrency": 2,  # GraphQL limiter'ının başlangıç eşzamanlılığı (yükleme: ikas_upload_workers)
+    "ikas_oauth_initial_concurrency": 1,  # token isteği limiter'ının başlangıç eşzamanlılığı
+    "ikas_rate_limit_retries": 4,
+    "ikas_async_concurrency": 8,  # toplu işlerde eşzamanlı GraphQL isteği
+    "ikas_token_refresh_margin_seconds": 120,  # token bitmeden bu kadar önce yenilenir
+    "circuit_failure_threshold": 5,  # ardışık hata sonrası devre açılır
+    "circuit_reset_seconds": 30,  # açık devre bu süre sonra tek istekle yoklanır
     
     # AI ayarları
     "ai_failure_policy": "studio_effect",  # studio_effect | copy_original | white_bg_no_shadow
@@ -42,7 +67,8 @@ CONFIG_DEFAULTS = {
     
     # Dizin ayarları
     "log_dir": "logs",
-    "report_dir": "reports"
+    "report_dir": "reports",
+    "cache_dir": "cache"
 }
 
 # Environment variable mapping
@@ -133,7 +159,8 @@ def _ensure_directories(config: dict):
     """Gerekli dizinleri oluştur."""
     dirs = [
         config.get("log_dir", "logs"),
-        config.get("report_dir", "reports")
+        config.get("report_dir", "reports"),
+        config.get("cache_dir", "cache")
     ]
     
     for dir_path in dirs:
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - AI Açıklama Önbelleği
+OpenAI/Gemini ile üretilen ürün açıklamalarını SQLite'ta tutar.
+Anahtar: ürün girdileri + sağlayıcı + model + prompt sürümü. Süre (TTL) dolan
+kayıtlar kullanılmaz; kayıt sayısı sınırı aşılınca en eski kullanılanlar silinir.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_ENTRIES = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS descriptions (
+    cache_key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_descriptions_last_used ON descriptions(last_used_at);
+"""
+
+
+def description_cache_key(parts: Dict) -> str:
+    """Girdi sözlüğünden kararlı anahtar (sıra ve boşluktan bağımsız JSON özeti)."""
+    canonical = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DescriptionCache:
+    """
+    Kalıcı açıklama önbelleği. Tüm metodlar thread-safe'tir.
+
+    Args:
+        ttl_seconds: Kayıt bu süreden eskiyse kullanılmaz (0 = süresiz)
+        max_entries: Üst sınır; aşılınca en uzun süredir kullanılmayanlar silinir
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: float = DEFAULT_TTL_DAYS * 86400,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.ttl_seconds = max(0.0, float(ttl_seconds or 0))
+        self.max_entries = max(1, int(max_entries or 1))
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM descriptions WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if not row:
+                return None
+            if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM descriptions WHERE cache_key = ?", (cache_key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE descriptions SET last_used_at = ? WHERE cache_key = ?", (now, cache_key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, cache_key: str, provider: str, content: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO descriptions(cache_key, provider, content, created_at, last_used_at) "
+                "VALUES(?, ?, ?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET provider = excluded.provider, "
+                "content = excluded.content, created_at = excluded.created_at, "
+                "last_used_at = excluded.last_used_at",
+                (cache_key, provider, content, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM descriptions").fetchone()[0])
+
+    def _evict(self, now: float):
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM descriptions WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        overflow = self.count() - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM descriptions WHERE cache_key IN ("
+                "SELECT cache_key FROM descriptions ORDER BY last_used_at LIMIT ?)",
+                (overflow,),
+            )
+
+
+_caches: Dict[str, DescriptionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_description_cache(config: dict = None) -> DescriptionCache:
+    """
+    Paylaşılan açıklama önbelleği. Mağazadan bağımsızdır; aynı model başka
+    mağazada da aynı açıklamayı kullanır.
+    """
+    config = config or {}
+    db_path = os.path.join(config.get("cache_dir", "cache"), "ai_descriptions.sqlite3")
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = DescriptionCache(
+                db_path,
+                ttl_seconds=float(config.get("ai_description_cache_ttl_days", DEFAULT_TTL_DAYS) or 0) * 86400,
+                max_entries=config.get("ai_description_cache_max_entries", DEFAULT_MAX_ENTRIES),
+            )
+            _caches[db_path] = cache
+        return cache
+
+
+# Test için
+if __name__ == "__main__":
+    import tempfile
+
+    cache = DescriptionCache(os.path.join(tempfile.mkdtemp(), "desc.sqlite3"), max_entries=2)
+    keys = [description_cache_key({"name": f"Rayban {n}", "provider": "openai"}) for n in (2140, 3025, 4171)]
+    for key in keys:
+        cache.put(key, "openai", f"<p>{key[:8]}</p>")
+    print("Kayıt sayısı:", cache.count())
+    print("En eski silindi:", cache.get(keys[0]) is None)
+    print("Son kayıt:", cache.get(keys[2]))
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - Açıklama Metni Hafıza Önbelleği
+Aynı açıklama (ikas'tan gelen mevcut metin veya şablon) toplu işlerde defalarca
+normalize edilir, etiketlerden arındırılır ve karşılaştırılır. Bu modül, sonucu
+içerik parmak izi + işlem adı ile tutan sınırlı bir LRU sağlar; değişmeyen
+açıklamalar için metin işi tekrar yapılmaz.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def content_fingerprint(text: str) -> str:
+    """Metnin kısa özeti (blake2b-128 + uzunluk)."""
+    data = str(text or "").encode("utf-8")
+    return f"{hashlib.blake2b(data, digest_size=16).hexdigest()}:{len(data)}"
+
+
+class DescriptionMemo:
+    """
+    (işlem, parmak izi) -> sonuç LRU'su. Thread-safe'tir.
+
+    İşlem adı sonucu etkileyen tüm parametreleri içermelidir
+    (örn. ("html", görsel_stili)); aksi halde farklı çıktılar karışır.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries or 1))
+        self._items: "OrderedDict[Tuple[Hashable, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, operation: Hashable, text: str, compute: Callable[[str], str]) -> str:
+        text = str(text or "")
+        if not text:
+            return compute(text)
+        key = (operation, content_fingerprint(text))
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        # Hesap kilit dışında; aynı metin iki thread'de hesaplanırsa sonuç aynıdır.
+        result = compute(text)
+        with self._lock:
+            self._items[key] = result
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_description_memo(config: dict = None) -> DescriptionMemo:
+    """Süreç genelinde paylaşılan memo (ilk çağrıdaki ayar geçerlidir)."""
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            max_entries = (config or {}).get("description_memo_max_entries", DEFAULT_MAX_ENTRIES)
+            _memo = DescriptionMemo(max_entries)
+        return _memo
+
+
+def memoized(operation: Hashable, text: str, compute: Callable[[str], str]) -> str:
+    """Paylaşılan memo üzerinden compute(text) sonucunu döndür."""
+    return get_description_memo().get_or_compute(operation, text, compute)
+
+
+# Test için
+if __name__ == "__main__":
+    import re
+    import time
+
+    def strip_tags(value: str) -> str:
+        return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", value)).strip()
+
+    memo = DescriptionMemo(max_entries=2)
+    sample = "<p><strong>Ray-Ban RB2140</strong> güneş gözlüğü.</p>" * 40
+    print(memo.get_or_compute("strip", sample, strip_tags)[:40])
+    print(memo.get_or_compute("strip", sample, strip_tags)[:40])
+    memo.get_or_compute("strip", "<p>a</p>", strip_tags)
+    memo.get_or_compute("strip", "<p>b</p>", strip_tags)
+    print("İstatistik:", memo.stats())
+
+    started = time.perf_counter()
+    for _ in range(5000):
+        strip_tags(sample)
+    direct = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(5000):
+        memo.get_or_compute("strip", sample, strip_tags)
+    print(f"Doğrudan: {direct:.3f} sn, memo: {time.perf_counter() - started:.3f} sn")
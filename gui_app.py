@@ -22,7 +22,11 @@ import re
 # Yeni modüller
 from config import load_config, save_config, get_timeout
 from logging_utils import setup_logging, set_ui_widget, ui_log, log_info, log_warning, log_error, log_success
-from net import create_session, request_with_retry, NetworkError
+from net import (
+    create_session,
+    request_with_retry,
+    NetworkError,
+)
 from wiro import run_nano_banana, validate_api_key, WiroError
 from studio import apply_studio_effect, process_with_failure_policy, validate_image
 from ikas import normalize_variant, validate_excel_columns, UploadReport, find_image_for_variant
@@ -36,6 +40,11 @@ from ikas_automation import (
     extract_brand_model_from_name,
 )
 from description import generate_product_description
+from catalog_store import get_catalog_store, list_product_query
+from ikas_batch import BatchOperation, DEFAULT_BATCH_SIZE
+from ikas_async import run_batched_sync
+from ikas_client import get_ikas_client
+from description_memo import memoized
 
 # --- KONFİGÜRASYON VE SABİTLER ---
 CONFIG_FILE = "ikas_config.json"
@@ -56,6 +65,18 @@ COLOR_GRADIENT_START = "#667eea"  # Gradient başlangıç
 COLOR_GRADIENT_END = "#764ba2"    # Gradient bitiş
 
 
+def _compare_html_key(html_text):
+    """Etiketler arası boşluklardan bağımsız HTML karşılaştırma anahtarı."""
+    text = re.sub(r">\s+<", "><", str(html_text or ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _compare_plain_key(html_text):
+    """Etiketlerden arındırılmış düz metin karşılaştırma anahtarı."""
+    plain = re.sub(r"<[^>]+>", " ", str(html_text or ""))
+    return re.sub(r"\s+", " ", plain).strip()
+
+
 class ModernApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -704,6 +725,19 @@ class IkasPage(tk.Frame):
         )
         chk_trendyol.pack(side=tk.LEFT)
 
+        self.var_full_auto_resume = tk.BooleanVar(value=False)
+        chk_resume = tk.Checkbutton(
+            step0_frame,
+            text="Yarım kalan çalışmaya devam et",
+            variable=self.var_full_auto_resume,
+            bg=COLOR_SECONDARY,
+            fg=COLOR_FG,
+            selectcolor=COLOR_BG,
+            activebackground=COLOR_SECONDARY,
+            activeforeground=COLOR_FG,
+        )
+        chk_resume.pack(anchor="w", pady=(5, 0))
+
         self.btn_full_automation = ttk.Button(
             step0_frame,
             text="Tam Otomasyonu Baslat",
@@ -711,6 +745,13 @@ class IkasPage(tk.Frame):
         )
         self.btn_full_automation.pack(fill=tk.X, pady=(10, 0))
 
+        self.btn_price_sync = ttk.Button(
+            step0_frame,
+            text="Yalnız Fiyatları Senkronla",
+            command=self._start_price_sync,
+        )
+        self.btn_price_sync.pack(fill=tk.X, pady=(5, 0))
+
         progress_box = tk.Frame(step0_frame, bg=COLOR_SECONDARY)
         progress_box.pack(fill=tk.X, pady=(10, 0))
         self.full_auto_progress_text = tk.StringVar(value="Hazır")
@@ -834,6 +875,10 @@ class IkasPage(tk.Frame):
             self.btn_full_automation.config(state=state)
         except Exception:
             pass
+        try:
+            self.btn_price_sync.config(state=state)
+        except Exception:
+            pass
 
     def _set_fitguide_sync_running(self, running):
         state = "disabled" if running else "normal"
@@ -995,11 +1040,11 @@ class IkasPage(tk.Frame):
         self._set_full_auto_progress(0, "Tam otomasyon hazırlanıyor...")
         threading.Thread(
             target=self._full_automation_logic,
-            args=(price_file, channel_preferences),
+            args=(price_file, channel_preferences, bool(self.var_full_auto_resume.get())),
             daemon=True,
         ).start()
 
-    def _full_automation_logic(self, price_file, channel_preferences):
+    def _full_automation_logic(self, price_file, channel_preferences, resume=False):
         self._log("🚀 Tam otomasyon başlatılıyor...")
         try:
             config = load_config()
@@ -1010,7 +1055,7 @@ class IkasPage(tk.Frame):
                 logger=self._log,
                 progress_callback=self._on_automation_progress,
             )
-            result = runner.run(output_dir="output")
+            result = runner.run(output_dir="output", resume=resume)
             summary = result.get("summary", {})
             report_path = result.get("report_path", "")
 
@@ -1065,6 +1110,72 @@ class IkasPage(tk.Frame):
         finally:
             self._set_full_auto_running(False)
 
+    def _start_price_sync(self):
+        price_file = self.price_rules_path.get().strip()
+        if not price_file:
+            messagebox.showwarning("Uyarı", "Lütfen fiyat kural dosyasını seçin.")
+            return
+        if not os.path.exists(price_file):
+            messagebox.showerror("Hata", f"Fiyat dosyası bulunamadı:\n{price_file}")
+            return
+
+        self._save_automation_defaults()
+        self._set_full_auto_running(True)
+        self._set_full_auto_progress(0, "Fiyat senkronu hazırlanıyor...")
+        threading.Thread(
+            target=self._price_sync_logic,
+            args=(price_file,),
+            daemon=True,
+        ).start()
+
+    def _price_sync_logic(self, price_file):
+        self._log("💰 Fiyat senkronu başlatılıyor (görsel/açıklama yok)...")
+        try:
+            runner = IkasAutomationRunner(
+                config=load_config(),
+                price_rules_path=price_file,
+                channel_preferences={},
+                logger=self._log,
+                progress_callback=self._on_automation_progress,
+            )
+            result = runner.run_price_sync()
+            summary = result.get("summary", {})
+            report_path = result.get("report_path", "")
+
+            self._log(
+                "Fiyat özeti => "
+                f"Ürün: {summary.get('total_products', 0)} | "
+                f"Kural bulunan: {summary.get('priced_products', 0)} | "
+                f"Kuralsız: {summary.get('no_price_products', 0)} | "
+                f"Güncellenen varyant: {summary.get('updated_variants', 0)} | "
+                f"Kaldırılan indirim: {summary.get('cleared_discounts', 0)} | "
+                f"Hata: {summary.get('failed_variants', 0)} | "
+                f"İstek: {summary.get('requests', 0)}"
+            )
+            if report_path:
+                self._log(f"📄 Rapor: {report_path}")
+
+            if int(summary.get("failed_variants", 0)) > 0:
+                messagebox.showwarning(
+                    "Fiyat Senkronu Bitti",
+                    "İşlem tamamlandı ancak bazı varyantlar güncellenemedi.\n"
+                    f"Rapor dosyası:\n{report_path}",
+                )
+            else:
+                messagebox.showinfo(
+                    "Fiyat Senkronu Başarılı",
+                    f"{summary.get('updated_variants', 0)} varyantın fiyatı güncellendi.\n"
+                    f"Rapor dosyası:\n{report_path}",
+                )
+            self._set_full_auto_progress(100, "Fiyat senkronu bitti.")
+
+        except Exception as e:
+            self._log(f"❌ Fiyat senkronu hatası: {e}")
+            self._set_full_auto_progress(self.full_auto_progress.get(), f"Hata: {e}")
+            messagebox.showerror("Fiyat Senkronu Hatası", str(e))
+        finally:
+            self._set_full_auto_running(False)
+
     def _start_fitguide_sync(self):
         selected = list(getattr(self, "fitguide_popup_selected", []) or [])
         if not selected:
@@ -1184,31 +1295,13 @@ class IkasPage(tk.Frame):
         return ("olcu rehberi" in lowered) or ("beden ve uyum kilavuzu" in lowered)
 
     def _fetch_fitguide_products_page(self, auth, search, page=1, limit=25):
-        query = """
-        query FindProducts($search: String!, $page: Int!, $limit: Int!) {
-          listProduct(search: $search, pagination: {page: $page, limit: $limit}) {
-            data {
-              id
-              name
-              attributes {
-                productAttributeId
-                value
-              }
-              variants {
-                id
-                variantValues {
-                  variantTypeName
-                  variantValueName
-                }
-                attributes {
-                  productAttributeId
-                  value
-                }
-              }
-            }
-          }
-        }
-        """
+        # Özel alan değeri (HTML) de gelir: boş değerli kayıt rehber var sayılmamalı.
+        query = list_product_query(
+            "FindProducts",
+            "fitguide",
+            "$search: String!, $page: Int!, $limit: Int!",
+            "search: $search, pagination: {page: $page, limit: $limit}",
+        )
         data = self._ikas_graphql(
             auth,
             query,
@@ -1305,42 +1398,15 @@ class IkasPage(tk.Frame):
             auth = self._get_ikas_auth_header()
             attribute_id = self._resolve_fitguide_attribute_id(auth)
 
-            all_products = []
-            page = 1
-            limit = 100
-            fetch_search = ""
-            while True:
-                page_products = self._fetch_fitguide_products_page(
-                    auth,
-                    fetch_search,
-                    page=page,
-                    limit=limit,
-                )
-                if page == 1 and not page_products and fetch_search == "":
-                    fetch_search = "*"
-                    page_products = self._fetch_fitguide_products_page(
-                        auth,
-                        fetch_search,
-                        page=page,
-                        limit=limit,
-                    )
-                if not page_products:
-                    break
-
-                all_products.extend(page_products)
-                self._set_fitguide_sync_progress(
+            store = self._get_synced_catalog_store(
+                auth,
+                progress=lambda page, count: self._set_fitguide_sync_progress(
                     min(100.0, float(page * 2)),
-                    f"Tüm ürünler getiriliyor... (sayfa {page}, toplam {len(all_products)})",
-                )
-                self._log(
-                    f"📦 Ölçü rehberi ürün çekildi: sayfa {page} | sayfa adet {len(page_products)} | toplam {len(all_products)}"
-                )
-                if len(page_products) < limit:
-                    break
-                page += 1
-                if page > 1000:
-                    self._log("⚠️ Güvenlik limiti nedeniyle sayfalama durduruldu (1000 sayfa).")
-                    break
+                    f"Tüm ürünler getiriliyor... (sayfa {page}, toplam {count})",
+                ),
+            )
+            all_products = store.list_products()
+            self._log(f"📦 Ölçü rehberi için yerel katalogdan {len(all_products)} ürün alındı.")
 
             self.after(
                 0,
@@ -1381,7 +1447,11 @@ class IkasPage(tk.Frame):
         try:
             auth = self._get_ikas_auth_header()
             attribute_id = self._resolve_fitguide_attribute_id(auth)
-            products = self._fetch_fitguide_products_page(auth, search, page=1, limit=25)
+            products = self._search_catalog_products(
+                auth,
+                search,
+                lambda: self._fetch_fitguide_products_page(auth, search, page=1, limit=25),
+            )
             self.after(
                 0,
                 lambda: self._append_fitguide_popup_results(
@@ -1512,30 +1582,17 @@ class IkasPage(tk.Frame):
                 return
 
             self._log(f"🔎 Ölçü rehberi taraması başladı. Ürün sayısı: {total}")
-            update_mutation = """
-            mutation UpdateProductAndVariantAttributes($input: UpdateProductAndVariantAttributesInput!) {
-              updateProductAndVariantAttributes(input: $input) {
-                id
-                name
-              }
-            }
-            """
 
             updated = 0
             skipped = 0
             failed = 0
+            operations = []
 
-            for idx, product in enumerate(products, start=1):
+            for product in products:
                 pid = str((product or {}).get("id") or "").strip()
                 name = str((product or {}).get("name") or "-").strip()
                 attributes = (product or {}).get("attributes") or []
 
-                percent = (idx / total) * 100.0
-                self._set_fitguide_sync_progress(
-                    percent,
-                    f"[{idx}/{total}] Kontrol ediliyor: {name}",
-                )
-
                 if not pid:
                     failed += 1
                     self._log(f"❌ Ürün id eksik, atlandı: {name}")
@@ -1575,37 +1632,54 @@ class IkasPage(tk.Frame):
                     self._log(f"⏭️ Zaten var, atlandı: {name}")
                     continue
 
-                try:
-                    product_attrs_payload = []
-                    if product_needs_update:
-                        product_attrs_payload = [
-                            {
-                                "productAttributeId": attribute_id,
-                                "value": FIT_GUIDE_HTML,
-                            }
-                        ]
-                    data = self._ikas_graphql(
-                        auth,
-                        update_mutation,
+                product_attrs_payload = []
+                if product_needs_update:
+                    product_attrs_payload = [
                         {
-                            "input": {
-                                "productId": pid,
-                                "productAttributes": product_attrs_payload,
-                                "variantAttributes": variant_inputs,
-                            }
+                            "productAttributeId": attribute_id,
+                            "value": FIT_GUIDE_HTML,
+                        }
+                    ]
+                operations.append(
+                    BatchOperation(
+                        field="updateProductAndVariantAttributes",
+                        args={
+                            "input": (
+                                "UpdateProductAndVariantAttributesInput!",
+                                {
+                                    "productId": pid,
+                                    "productAttributes": product_attrs_payload,
+                                    "variantAttributes": variant_inputs,
+                                },
+                            )
                         },
+                        selection="id name",
+                        key=(name, product_needs_update, len(variant_inputs)),
                     )
-                    updated_product = (data or {}).get("updateProductAndVariantAttributes")
-                    if not updated_product:
-                        raise Exception("Özel alan güncelleme yanıtı boş döndü.")
+                )
+
+            # Güncellenecek ürünler alias'lı toplu isteklerle, eşzamanlı gönderilir.
+            results = self._execute_batched(
+                auth,
+                operations,
+                on_batch_done=lambda done, count: self._set_fitguide_sync_progress(
+                    (done / count) * 100.0,
+                    f"[{done}/{count}] Ölçü rehberi yazılıyor...",
+                ),
+            )
+            for result in results:
+                name, product_needs_update, variant_count = result.operation.key
+                if result.ok and not result.data:
+                    result.errors = [{"message": "Özel alan güncelleme yanıtı boş döndü."}]
+                if result.ok:
                     updated += 1
                     self._log(
                         f"✅ Ölçü rehberi özel alana yazıldı: {name} "
-                        f"(ürün:{'evet' if product_needs_update else 'hayır'}, varyant:{len(variant_inputs)})"
+                        f"(ürün:{'evet' if product_needs_update else 'hayır'}, varyant:{variant_count})"
                     )
-                except Exception as e:
+                else:
                     failed += 1
-                    self._log(f"❌ Özel alan güncellenemedi: {name} -> {e}")
+                    self._log(f"❌ Özel alan güncellenemedi: {name} -> {result.error_message}")
 
             summary_text = (
                 f"İşlem tamamlandı.\n\n"
@@ -1618,6 +1692,8 @@ class IkasPage(tk.Frame):
                 "📌 Ölçü rehberi özeti => "
                 f"Taranan: {total} | Güncellenen: {updated} | Atlanan: {skipped} | Hata: {failed}"
             )
+            if updated:
+                self._mark_catalog_stale()
             self._set_fitguide_sync_progress(100, "Ölçü rehberi işlemi bitti.")
             self.after(0, lambda: messagebox.showinfo("İşlem Bitti", summary_text))
         except Exception as e:
@@ -1660,15 +1736,11 @@ class IkasPage(tk.Frame):
         return plain[:157] + "..." if len(plain) > 160 else plain
 
     def _normalize_html_for_compare(self, html_text):
-        text = str(html_text or "")
-        text = re.sub(r">\s+<", "><", text)
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
+        # Toplu senkronda ayni aciklamalar tekrar tekrar karsilastirilir.
+        return memoized("compare_html", html_text, _compare_html_key)
 
     def _strip_html_for_compare(self, html_text):
-        plain = re.sub(r"<[^>]+>", " ", str(html_text or ""))
-        plain = re.sub(r"\s+", " ", plain).strip()
-        return plain
+        return memoized("compare_plain", html_text, _compare_plain_key)
 
     def _is_product_features_up_to_date(self, current_description, target_description):
         current_html = self._normalize_html_for_compare(current_description)
@@ -1681,32 +1753,12 @@ class IkasPage(tk.Frame):
         return bool(current_plain and target_plain and current_plain == target_plain)
 
     def _fetch_product_features_page(self, auth, search, page=1, limit=25):
-        query = """
-        query FindProducts($search: String!, $page: Int!, $limit: Int!) {
-          listProduct(search: $search, pagination: {page: $page, limit: $limit}) {
-            data {
-              id
-              name
-              description
-              brand {
-                id
-                name
-              }
-              tags {
-                id
-                name
-              }
-              variants {
-                id
-                variantValues {
-                  variantTypeName
-                  variantValueName
-                }
-              }
-            }
-          }
-        }
-        """
+        query = list_product_query(
+            "FindProducts",
+            "features",
+            "$search: String!, $page: Int!, $limit: Int!",
+            "search: $search, pagination: {page: $page, limit: $limit}",
+        )
         data = self._ikas_graphql(
             auth,
             query,
@@ -1735,7 +1787,11 @@ class IkasPage(tk.Frame):
         self._log(f"🔎 Ürün özellikleri paneli arama: {search}")
         try:
             auth = self._get_ikas_auth_header()
-            products = self._fetch_product_features_page(auth, search, page=1, limit=25)
+            products = self._search_catalog_products(
+                auth,
+                search,
+                lambda: self._fetch_product_features_page(auth, search, page=1, limit=25),
+            )
             self.after(
                 0,
                 lambda: self._append_product_features_popup_results(products, search),
@@ -1855,42 +1911,15 @@ class IkasPage(tk.Frame):
         self._log("📥 Ürün özellikleri için tüm ürünleri getirme işlemi başlatıldı...")
         try:
             auth = self._get_ikas_auth_header()
-            all_products = []
-            page = 1
-            limit = 100
-            fetch_search = ""
-            while True:
-                page_products = self._fetch_product_features_page(
-                    auth,
-                    fetch_search,
-                    page=page,
-                    limit=limit,
-                )
-                if page == 1 and not page_products and fetch_search == "":
-                    # Bazı mağazalarda boş arama tüm ürünleri döndürmeyebilir.
-                    fetch_search = "*"
-                    page_products = self._fetch_product_features_page(
-                        auth,
-                        fetch_search,
-                        page=page,
-                        limit=limit,
-                    )
-                if not page_products:
-                    break
-                all_products.extend(page_products)
-                self._set_product_features_sync_progress(
+            store = self._get_synced_catalog_store(
+                auth,
+                progress=lambda page, count: self._set_product_features_sync_progress(
                     min(30.0, float(page * 2)),
-                    f"Tüm ürünler getiriliyor... (sayfa {page}, toplam {len(all_products)})",
-                )
-                self._log(
-                    f"📦 Ürün çekildi: sayfa {page} | sayfa adet {len(page_products)} | toplam {len(all_products)}"
-                )
-                if len(page_products) < limit:
-                    break
-                page += 1
-                if page > 1000:
-                    self._log("⚠️ Güvenlik limiti nedeniyle sayfalama durduruldu (1000 sayfa).")
-                    break
+                    f"Tüm ürünler getiriliyor... (sayfa {page}, toplam {count})",
+                ),
+            )
+            all_products = store.list_products()
+            self._log(f"📦 Ürün özellikleri için yerel katalogdan {len(all_products)} ürün alındı.")
 
             self.after(
                 0,
@@ -2015,21 +2044,13 @@ class IkasPage(tk.Frame):
                 return
 
             self._log(f"🔎 Ürün özellikleri taraması başladı. Ürün sayısı: {total}")
-            mutation = """
-            mutation UpdateProductFeatures($input: UpdateProductInput!) {
-              updateProduct(input: $input) {
-                id
-                name
-                description
-              }
-            }
-            """
 
             updated = 0
             skipped = 0
             failed = 0
+            operations = []
 
-            for idx, product in enumerate(products, start=1):
+            for product in products:
                 pid = str((product or {}).get("id") or "").strip()
                 name = str((product or {}).get("name") or "-").strip()
                 brand_name = str((((product or {}).get("brand") or {}).get("name") or "")).strip()
@@ -2043,12 +2064,6 @@ class IkasPage(tk.Frame):
                 )
                 is_child, is_polarized = self._detect_product_signals_from_payload(product)
 
-                percent = (idx / total) * 100.0
-                self._set_product_features_sync_progress(
-                    percent,
-                    f"[{idx}/{total}] Güncelleniyor: {name}",
-                )
-
                 if not pid:
                     failed += 1
                     self._log(f"❌ Ürün id eksik, atlandı: {name}")
@@ -2075,36 +2090,58 @@ class IkasPage(tk.Frame):
                         continue
 
                     meta_description = self._build_meta_description_from_html(description, name)
+                except Exception as e:
+                    failed += 1
+                    self._log(f"❌ Ürün özellikleri güncellenemedi: {name} -> {e}")
+                    continue
 
-                    data = self._ikas_graphql(
-                        auth,
-                        mutation,
-                        {
-                            "input": {
-                                "id": pid,
-                                "description": description,
-                                "translations": [
-                                    {
-                                        "locale": "tr",
-                                        "name": name,
-                                        "description": description,
-                                    }
-                                ],
-                                "metaData": {
-                                    "pageTitle": name,
-                                    "description": meta_description,
+                operations.append(
+                    BatchOperation(
+                        field="updateProduct",
+                        args={
+                            "input": (
+                                "UpdateProductInput!",
+                                {
+                                    "id": pid,
+                                    "description": description,
+                                    "translations": [
+                                        {
+                                            "locale": "tr",
+                                            "name": name,
+                                            "description": description,
+                                        }
+                                    ],
+                                    "metaData": {
+                                        "pageTitle": name,
+                                        "description": meta_description,
+                                    },
                                 },
-                            }
+                            )
                         },
+                        selection="id name",
+                        key=name,
                     )
-                    updated_product = (data or {}).get("updateProduct")
-                    if not updated_product:
-                        raise Exception("Ürün açıklama güncelleme yanıtı boş döndü.")
+                )
+
+            # Güncellenecek ürünler alias'lı toplu isteklerle, eşzamanlı gönderilir.
+            results = self._execute_batched(
+                auth,
+                operations,
+                on_batch_done=lambda done, count: self._set_product_features_sync_progress(
+                    (done / count) * 100.0,
+                    f"[{done}/{count}] Ürün özellikleri yazılıyor...",
+                ),
+            )
+            for result in results:
+                name = result.operation.key
+                if result.ok and not result.data:
+                    result.errors = [{"message": "Ürün açıklama güncelleme yanıtı boş döndü."}]
+                if result.ok:
                     updated += 1
                     self._log(f"✅ Ürün özellikleri güncellendi: {name}")
-                except Exception as e:
+                else:
                     failed += 1
-                    self._log(f"❌ Ürün özellikleri güncellenemedi: {name} -> {e}")
+                    self._log(f"❌ Ürün özellikleri güncellenemedi: {name} -> {result.error_message}")
 
             summary_text = (
                 f"İşlem tamamlandı.\n\n"
@@ -2118,6 +2155,8 @@ class IkasPage(tk.Frame):
                 f"Taranan: {total} | Güncellenen: {updated} | "
                 f"Atlanan: {skipped} | Hata: {failed}"
             )
+            if updated:
+                self._mark_catalog_stale()
             self._set_product_features_sync_progress(100, "Ürün özellikleri işlemi bitti.")
             self.after(0, lambda: messagebox.showinfo("İşlem Bitti", summary_text))
         except Exception as e:
@@ -2267,7 +2306,6 @@ class IkasPage(tk.Frame):
     def _upload_logic(self, export_file):
         import pandas as pd
         import requests
-        import base64
         
         self._log("🚀 Yükleme başlatılıyor...")
         
@@ -2280,17 +2318,10 @@ class IkasPage(tk.Frame):
             return
 
         # Token Al
-        store_name = config.get("store_name", "kepekcioptik")
-        auth_url = f"https://{store_name}.myikas.com/api/admin/oauth/token"
-        
+        config.setdefault("store_name", "kepekcioptik")
+        client = get_ikas_client(config)
         try:
-            r = requests.post(auth_url, json={
-                "grant_type": "client_credentials",
-                "client_id": config["client_id"],
-                "client_secret": config["client_secret"]
-            })
-            r.raise_for_status()
-            token = r.json().get("access_token")
+            client.auth_header()
             self._log("🔑 Token alındı.")
         except Exception as e:
             self._log(f"❌ Kimlik doğrulama hatası: {e}")
@@ -2303,9 +2334,6 @@ class IkasPage(tk.Frame):
             self._log(f"❌ Excel okuma hatası: {e}")
             return
 
-        upload_url = "https://api.myikas.com/api/v1/admin/product/upload/image"
-        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-        
         OUTPUT_DIR = "output"
 
         for index, row in df.iterrows():
@@ -2349,25 +2377,12 @@ class IkasPage(tk.Frame):
             
             images = list(Path(target_folder).glob("*.png")) + list(Path(target_folder).glob("*.jpg"))
             for i, img_path in enumerate(images):
-                try:
-                    with open(img_path, "rb") as f:
-                        b64 = base64.b64encode(f.read()).decode("utf-8")
-                    
-                    payload = {
-                        "productImage": {
-                            "variantIds": [str(variant_id)],
-                            "base64": b64,
-                            "order": i,
-                            "isMain": (i==0)
-                        }
-                    }
-                    res = requests.post(upload_url, json=payload, headers=headers)
-                    if res.status_code == 200:
-                        self._log(f"   ✅ {img_path.name}")
-                    else:
-                        self._log(f"   ❌ Hata: {res.status_code}")
-                except Exception as e:
-                    self._log(f"   ❌ Hata: {e}")
+                # Ortak istemci: keep-alive havuzu, güncel token, limiter ve devre kesici.
+                ok, detail = client.upload_image(variant_id, img_path, order=i)
+                if ok:
+                    self._log(f"   ✅ {img_path.name}")
+                else:
+                    self._log(f"   ❌ Hata: {detail}")
 
         self._log("✨ İşlem Tamamlandı!")
         messagebox.showinfo("Bitti", "Yükleme tamamlandı.")
@@ -2375,54 +2390,76 @@ class IkasPage(tk.Frame):
     def _normalize_name(self, value):
         return str(value or "").strip().lower()
 
+    def _get_synced_catalog_store(self, auth, progress=None):
+        """Yerel katalog aynasını gerekiyorsa artımlı senkronla ve döndür."""
+        store = get_catalog_store(load_config())
+        stats = store.sync_if_stale(
+            lambda query, variables: self._ikas_graphql(auth, query, variables),
+            progress=progress,
+        )
+        if stats is None:
+            self._log(f"ℹ️ Yerel katalog güncel, ağdan indirme yapılmadı ({store.count()} ürün).")
+        else:
+            self._log(
+                "🔄 Yerel katalog senkronlandı: "
+                f"değişen {stats['changed']} | silinen {stats['deleted']} | toplam {stats['total']}"
+            )
+        return store
+
+    def _search_catalog_products(self, auth, search, live_search, limit=25):
+        """Katalog aynası hazırsa yerelden ara; yoksa canlı API aramasına düş."""
+        store = get_catalog_store(load_config())
+        if not store.is_synced():
+            return live_search()
+        try:
+            store = self._get_synced_catalog_store(auth)
+        except Exception as e:
+            self._log(f"⚠️ Yerel katalog senkronu başarısız, canlı arama yapılıyor: {e}")
+            return live_search()
+        return store.search(search, limit=limit)
+
+    def _mark_catalog_stale(self, deleted_ids=None):
+        try:
+            store = get_catalog_store(load_config())
+            if deleted_ids:
+                store.delete_products(list(deleted_ids))
+            store.mark_stale()
+        except Exception as e:
+            self._log(f"⚠️ Yerel katalog işaretlenemedi: {e}")
+
     def _get_ikas_auth_header(self):
-        config = load_config()
-        mcp_token = str(config.get("ikas_mcp_token", "") or "").strip()
-        if mcp_token:
-            if mcp_token.lower().startswith("bearer "):
-                return mcp_token
-            return f"Bearer {mcp_token}"
-
-        store_name = str(config.get("store_name", "")).strip()
-        client_id = str(config.get("client_id", "")).strip()
-        client_secret = str(config.get("client_secret", "")).strip()
-        if not (store_name and client_id and client_secret):
+        client = get_ikas_client(load_config())
+        if not client.using_mcp_token and not client.has_oauth_credentials():
             raise Exception("İkas kimlik bilgileri eksik. Ayarlar sayfasını kontrol edin.")
+        # Token bellekte/şifreli dosyada önbelleklidir; süresi dolmadıkça ağ isteği yapılmaz.
+        return client.auth_header()
 
-        auth_url = f"https://{store_name}.myikas.com/api/admin/oauth/token"
-        res = requests.post(
-            auth_url,
-            data={
-                "grant_type": "client_credentials",
-                "client_id": client_id,
-                "client_secret": client_secret,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-            timeout=(10, 120),
-        )
-        res.raise_for_status()
-        access_token = (res.json() or {}).get("access_token")
-        if not access_token:
-            raise Exception("OAuth token alınamadı.")
-        return f"Bearer {access_token}"
+    def _ikas_graphql_raw(self, auth_header, query, variables=None):
+        """GraphQL çağrısı; HTTP hatasında raise eder, GraphQL hatalarını döndürür."""
+        # Havuz, limiter, devre kesici ve 401'de token iptali ortak istemcide.
+        return get_ikas_client(load_config()).graphql_raw(query, variables, auth_header=auth_header)
 
     def _ikas_graphql(self, auth_header, query, variables=None):
-        payload = {"query": query}
-        if variables:
-            payload["variables"] = variables
-        res = requests.post(
-            "https://api.myikas.com/api/v2/admin/graphql",
-            headers={"Authorization": auth_header, "Content-Type": "application/json"},
-            json=payload,
-            timeout=(10, 120),
-        )
-        if res.status_code != 200:
-            raise Exception(f"GraphQL HTTP hatası: {res.status_code}")
-        body = res.json()
-        errors = body.get("errors") or []
+        data, errors = self._ikas_graphql_raw(auth_header, query, variables)
         if errors:
             raise Exception(errors[0].get("message", "GraphQL hatası"))
-        return body.get("data") or {}
+        return data
+
+    def _execute_batched(self, auth, operations, on_batch_done=None):
+        """Alias'lı batch'leri asyncio istemcisiyle eşzamanlı gönder (ikas_async_concurrency)."""
+        return run_batched_sync(
+            auth,
+            operations,
+            config=load_config(),
+            batch_size=self._graphql_batch_size(),
+            on_batch_done=on_batch_done,
+        )
+
+    def _graphql_batch_size(self):
+        try:
+            return max(1, int(load_config().get("ikas_graphql_batch_size", DEFAULT_BATCH_SIZE)))
+        except (TypeError, ValueError):
+            return DEFAULT_BATCH_SIZE
 
     def _search_products_for_delete(self):
         search = self.delete_search_text.get().strip()
@@ -2439,17 +2476,12 @@ class IkasPage(tk.Frame):
         self._log(f"🔎 Ürün aranıyor: {search}")
         try:
             auth = self._get_ikas_auth_header()
-            query = """
-            query FindProducts($search: String!) {
-              listProduct(search: $search, pagination: {page: 1, limit: 25}) {
-                data {
-                  id
-                  name
-                  variants { id }
-                }
-              }
-            }
-            """
+            query = list_product_query(
+                "FindProducts",
+                "variant_ids",
+                "$search: String!",
+                "search: $search, pagination: {page: 1, limit: 25}",
+            )
             data = self._ikas_graphql(auth, query, {"search": search})
             products = ((data.get("listProduct") or {}).get("data")) or []
             self.delete_results = products
@@ -2527,6 +2559,7 @@ class IkasPage(tk.Frame):
             }
             """
             self._ikas_graphql(auth, mutation, {"idList": [product_id]})
+            self._mark_catalog_stale(deleted_ids=[product_id])
             self._log(f"✅ Ürün silindi: {product_name}")
             self.after(0, lambda: messagebox.showinfo("Başarılı", f"Ürün silindi:\n{product_name}"))
 
@@ -3311,19 +3344,17 @@ class IkasPage(tk.Frame):
         self._log(f"🔎 Silme paneli arama: {search}")
         try:
             auth = self._get_ikas_auth_header()
-            query = """
-            query FindProducts($search: String!) {
-              listProduct(search: $search, pagination: {page: 1, limit: 25}) {
-                data {
-                  id
-                  name
-                  variants { id }
-                }
-              }
-            }
-            """
-            data = self._ikas_graphql(auth, query, {"search": search})
-            products = ((data.get("listProduct") or {}).get("data")) or []
+            query = list_product_query(
+                "FindProducts",
+                "variant_ids",
+                "$search: String!",
+                "search: $search, pagination: {page: 1, limit: 25}",
+            )
+            products = self._search_catalog_products(
+                auth,
+                search,
+                lambda: ((self._ikas_graphql(auth, query, {"search": search}).get("listProduct") or {}).get("data")) or [],
+            )
             self.after(0, lambda: self._append_delete_popup_results(products, search))
         except Exception as e:
             self._log(f"❌ Silme paneli arama hatası: {e}")
@@ -3441,25 +3472,35 @@ class IkasPage(tk.Frame):
         self._log(f"🗑️ Silme paneli toplu silme başlatıldı. Ürün sayısı: {len(delete_items)}")
         try:
             auth = self._get_ikas_auth_header()
-            mutation = """
-            mutation DeleteProduct($idList: [String!]!) {
-              deleteProductList(idList: $idList)
-            }
-            """
             deleted = 0
+            deleted_ids = []
             failed = []
             total = len(delete_items)
-            for i, item in enumerate(delete_items, start=1):
-                pid = item["id"]
-                name = item["name"]
-                self._log(f"⏳ [{i}/{total}] Siliniyor: {name}")
-                try:
-                    self._ikas_graphql(auth, mutation, {"idList": [pid]})
+            operations = [
+                BatchOperation(
+                    field="deleteProductList",
+                    args={"idList": ("[String!]!", [item["id"]])},
+                    key=item,
+                )
+                for item in delete_items
+            ]
+            results = self._execute_batched(
+                auth,
+                operations,
+                on_batch_done=lambda done, count: self._log(f"⏳ [{done}/{count}] Silme isteği gönderildi."),
+            )
+            for result in results:
+                item = result.operation.key
+                if result.ok:
                     deleted += 1
-                    self._log(f"✅ Silindi: {name}")
-                except Exception as e:
-                    failed.append((name, str(e)))
-                    self._log(f"❌ Silinemedi: {name} -> {e}")
+                    deleted_ids.append(item["id"])
+                    self._log(f"✅ Silindi: {item['name']}")
+                else:
+                    failed.append((item["name"], result.error_message))
+                    self._log(f"❌ Silinemedi: {item['name']} -> {result.error_message}")
+
+            if deleted_ids:
+                self._mark_catalog_stale(deleted_ids=deleted_ids)
 
             if failed:
                 msg = (
@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - Ürün Açıklaması HTML Normalizasyonu
+Açıklama HTML'i bir kez etiket/metin parçalarına ayrılır; tüm yeniden yazma
+kuralları (görsel stili, note-float-left temizliği, boş paragraf ve <br>
+sadeleştirme, details/summary düzleştirme, "tümünü göster" kaldırma, baştaki
+görsel blokları) bu parça akışı üzerinde zincirlenmiş üreteçlerle tek geçişte
+uygulanır. Kurallar eski regex sırasıyla çalışır; çıktı, kapanmamış etiket
+dışında aynıdır: "<img<div>" gibi ">" ile kapanmayan "<img" artık etiket
+sayılmaz ve olduğu gibi kalır (eski regex stili sonraki etikete yazıyordu).
+"""
+
+import re
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable, Iterator, List, Tuple
+
+Token = Tuple[str, str]  # (tür, ham metin)
+
+# Etiket: "<" ile başlayıp ilk ">" ile biten, içinde "<" olmayan parça.
+_TAG_SPLIT_RE = re.compile(r"(<[^<>]*>)")
+_TAG_NAME_RE = re.compile(r"<(/?)(\w+)")
+_BR_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_EMPTY_PARAGRAPH_RE = re.compile(r"<p>\s*</p>", re.IGNORECASE)
+_SHOW_ALL_SPAN_RE = re.compile(
+    r"""<span\b[^>]*\bid\s*=\s*(['"])show-all-description\1[^>]*>""", re.IGNORECASE
+)
+
+# Görsel etiketi içi yeniden yazım (eski _normalize_description_images ile aynı).
+_IMG_STYLE_ATTR_RE = re.compile(r"""style\s*=\s*(['"])(.*?)\1""", re.IGNORECASE | re.DOTALL)
+_IMG_CLASS_ATTR_RE = re.compile(r"""\sclass\s*=\s*(['"])(.*?)\1""", re.IGNORECASE | re.DOTALL)
+_FLOAT_LEFT_VALUE_RE = re.compile(r"""\s*=\s*(['"])note-float-left\1""", re.IGNORECASE)
+_FLOAT_LEFT_RE = re.compile(r"note-float-left", re.IGNORECASE)
+_EMPTY_QUOTES_RE = re.compile(r'""\s*(?=/?>)')
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Görsel stilinde her zaman şablondan gelen temel layout anahtarları.
+IMAGE_LAYOUT_STYLE_KEYS = frozenset(
+    {
+        "width",
+        "max-width",
+        "height",
+        "display",
+        "margin",
+        "float",
+        "clear",
+        "border-radius",
+        "box-shadow",
+    }
+)
+
+_DETAILS_KINDS = frozenset({"details", "/details", "details*", "summary", "/summary", "summary*"})
+
+
+def _fold_key(value: str) -> str:
+    return _WHITESPACE_RE.sub(" ", str(value or "").strip().lower())
+
+
+@lru_cache(maxsize=1024)
+def normalize_img_tag(tag: str, image_style: str) -> str:
+    """
+    Tek <img> etiketini yeniden yaz: layout stili şablona zorlanır, zararsız ek
+    stiller korunur, note-float-left sınıfı ve eski bozuk kalıntıları silinir.
+    Sabit açıklama görselleri her üründe tekrarlandığından sonuç önbelleklenir.
+    """
+    style_match = _IMG_STYLE_ATTR_RE.search(tag)
+    kept_styles: List[str] = []
+    if style_match:
+        for part in style_match.group(2).split(";"):
+            piece = part.strip()
+            if not piece or ":" not in piece:
+                continue
+            key, value = piece.split(":", 1)
+            if _fold_key(key).replace(" ", "") in IMAGE_LAYOUT_STYLE_KEYS:
+                continue
+            kept_styles.append(f"{key.strip()}: {value.strip()}")
+
+    merged_style = image_style
+    if kept_styles:
+        merged_style = f"{'; '.join(kept_styles)}; {merged_style}"
+
+    if style_match:
+        start, end = style_match.span()
+        tag = f'{tag[:start]}style="{merged_style}"{tag[end:]}'
+    else:
+        closing = "/>" if tag.endswith("/>") else ">"
+        body = tag[:-2] if tag.endswith("/>") else tag[:-1]
+        tag = f'{body} style="{merged_style}"{closing}'
+
+    def _clean_class_attr(class_match: re.Match) -> str:
+        classes = [c.strip() for c in _WHITESPACE_RE.split(class_match.group(2)) if c.strip()]
+        classes = [c for c in classes if _fold_key(c) != "note-float-left"]
+        if classes:
+            return f' class="{" ".join(classes)}"'
+        return ""
+
+    tag = _IMG_CLASS_ATTR_RE.sub(_clean_class_attr, tag)
+    tag = _FLOAT_LEFT_VALUE_RE.sub("", tag)
+    tag = _FLOAT_LEFT_RE.sub("", tag)
+    tag = _EMPTY_QUOTES_RE.sub('"', tag)
+    return _MULTI_SPACE_RE.sub(" ", tag)
+
+
+# --- parçalama -----------------------------------------------------------------
+
+@lru_cache(maxsize=4096)
+def _classify_tag(raw: str) -> str:
+    lowered = raw.lower()
+    if lowered in ("<p>", "</p>", "<strong>", "</strong>", "</div>", "</span>"):
+        return lowered[1:-1]
+    if _BR_RE.fullmatch(raw):
+        return "br"
+    name_match = _TAG_NAME_RE.match(raw)
+    if not name_match:
+        return "tag"
+    closing, name = name_match.group(1), name_match.group(2).lower()
+    if name == "img" and not closing:
+        return "img"
+    if name in ("details", "summary"):
+        if closing:
+            return f"/{name}" if lowered == f"</{name}>" else f"{name}*"
+        return name
+    if name == "div" and not closing:
+        return "div"
+    if name == "span" and not closing and _SHOW_ALL_SPAN_RE.fullmatch(raw):
+        return "span_show_all"
+    return "tag"
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    """
+    Metni (tür, ham) parçalarına ayır. Kuralların hiç bakmadığı düz metin ve
+    etiketler (aralarındaki boşluklar dahil) tek "text" parçasında birleşir;
+    böylece sonraki aşamalar yalnız anlamlı parçalar üzerinde çalışır.
+    """
+    opaque: List[str] = []
+    pending_ws = ""
+    for index, part in enumerate(_TAG_SPLIT_RE.split(text)):
+        if not part:
+            continue
+        if index % 2:
+            kind = _classify_tag(part)
+        else:
+            kind = "ws" if part.isspace() else "text"
+        if kind == "ws":
+            if opaque:
+                pending_ws = part
+                continue
+        elif kind in ("text", "tag"):
+            if pending_ws:
+                opaque.append(pending_ws)
+                pending_ws = ""
+            opaque.append(part)
+            continue
+        if opaque:
+            yield ("text", "".join(opaque))
+            opaque = []
+        if pending_ws:
+            yield ("ws", pending_ws)
+            pending_ws = ""
+        yield (kind, part)
+    if opaque:
+        yield ("text", "".join(opaque))
+    if pending_ws:
+        yield ("ws", pending_ws)
+
+
+# --- kurallar (her biri bir üreteç; sıra eski regex sırasıdır) -----------------
+
+def _rewrite_images(tokens: Iterable[Token], image_style: str) -> Iterator[Token]:
+    for kind, raw in tokens:
+        yield (kind, normalize_img_tag(raw, image_style)) if kind == "img" else (kind, raw)
+
+
+def _skip_ws(buf: List[Token], index: int) -> int:
+    while index < len(buf) and buf[index][0] == "ws":
+        index += 1
+    return index
+
+
+def _match_br_group(buf: List[Token], index: int) -> Tuple[str, int]:
+    """
+    [<strong>] (<br>)+ [</strong>] grubu (aralarda boşluk serbest).
+    Returns: ("ok", bitiş) | ("fail", -1) | ("more", -1)
+    """
+    i = _skip_ws(buf, index)
+    if i < len(buf) and buf[i][0] == "strong":
+        i = _skip_ws(buf, i + 1)
+    br_count = 0
+    while i < len(buf) and buf[i][0] == "br":
+        br_count += 1
+        i = _skip_ws(buf, i + 1)
+    if i >= len(buf):
+        return "more", -1
+    if not br_count:
+        return "fail", -1
+    if buf[i][0] == "/strong":
+        i = _skip_ws(buf, i + 1)
+        if i >= len(buf):
+            return "more", -1
+    return "ok", i
+
+
+def _buffered(tokens: Iterable[Token], start_kind: str, match) -> Iterator[Token]:
+    """
+    start_kind ile başlayan adayları tamponla. match(tampon, girdi_bitti) sonucu:
+    ("more",) daha fazla parça gerekli, ("fail",) ilk parça olduğu gibi geçer ve
+    kalanlar yeniden değerlendirilir, ("ok", çıktı, bitiş) eşleşen parçaların yerine
+    çıktı verilir (regex.sub gibi çıktı tekrar taranmaz).
+    """
+    source = iter(tokens)
+    rescan: List[Token] = []  # yeniden değerlendirilecek parçalar (ters sırada)
+    buf: List[Token] = []
+    while True:
+        if rescan:
+            token = rescan.pop()
+            if not buf and token[0] != start_kind:
+                yield token
+                continue
+        else:
+            # Hızlı yol: aday dışındaki parçalar doğrudan geçer.
+            token = None
+            for item in source:
+                if buf or item[0] == start_kind:
+                    token = item
+                    break
+                yield item
+        if token is None:
+            if not buf:
+                return
+            result = match(buf, True)
+        else:
+            buf.append(token)
+            if token[0] == "ws":
+                # Hiçbir kuralda boşluk parçası sonucu belirlemez.
+                continue
+            result = match(buf, False)
+            if result[0] == "more":
+                continue
+
+        if result[0] == "ok":
+            _, output, end = result
+            yield from output
+            rescan.extend(reversed(buf[end:]))
+        else:
+            yield buf[0]
+            rescan.extend(reversed(buf[1:]))
+        buf = []
+
+
+def _match_image_paragraph_brs(buf: List[Token], complete: bool):
+    # <p>\s*<img>  [<strong>] <br>+ [</strong>]  </p>  ->  <p>\s*<img></p>
+    i = _skip_ws(buf, 1)
+    if i >= len(buf):
+        return ("more",)
+    if buf[i][0] != "img":
+        return ("fail",)
+    head = i + 1
+    status, end = _match_br_group(buf, head)
+    if status != "ok":
+        return (status,)
+    if buf[end][0] != "/p":
+        return ("fail",)
+    return ("ok", buf[:head] + [buf[end]], end + 1)
+
+
+def _match_empty_br_paragraph(buf: List[Token], complete: bool):
+    # <p> [<strong>] <br>+ [</strong>] </p>  ->  ""
+    status, end = _match_br_group(buf, 1)
+    if status != "ok":
+        return (status,)
+    if buf[end][0] != "/p":
+        return ("fail",)
+    return ("ok", [], end + 1)
+
+
+def _match_empty_paragraph(buf: List[Token], complete: bool):
+    # <p>\s*</p>  ->  ""
+    i = _skip_ws(buf, 1)
+    if i >= len(buf):
+        return ("more",)
+    if buf[i][0] != "/p":
+        return ("fail",)
+    return ("ok", [], i + 1)
+
+
+def _collapse_br_runs(tokens: Iterable[Token]) -> Iterator[Token]:
+    """(\\s*<br>\\s*){3,} -> <br><br>; komşu metinlerin bitişik boşlukları da yutulur."""
+    held = ""  # koşudan önceki metin; sonundaki boşluk yutulabilir
+    run: List[Token] = []
+    br_count = 0
+    for kind, raw in chain(tokens, [("end", "")]):
+        if kind in ("ws", "br"):
+            run.append((kind, raw))
+            br_count += kind == "br"
+            continue
+        collapse = br_count >= 3
+        if held:
+            yield ("text", held.rstrip() if collapse else held)
+            held = ""
+        if collapse:
+            yield ("br", "<br><br>")
+        else:
+            yield from run
+        run = []
+        br_count = 0
+        if kind == "end":
+            return
+        if kind == "text":
+            held = raw.lstrip() if collapse else raw
+            continue
+        yield (kind, raw)
+
+
+def _match_details(buf: List[Token], complete: bool):
+    # <details>\s*<summary>.*?</summary>\s*<div>(.*?)</div>\s*</details>  ->  \1
+    i = _skip_ws(buf, 1)
+    if i >= len(buf):
+        return ("fail",) if complete else ("more",)
+    if buf[i][0] != "summary":
+        return ("fail",)
+    if not complete and buf[-1][0] != "/details":
+        # Eşleşme her zaman </details> ile biter; ara parçalarda arama yapılmaz.
+        return ("more",)
+    for k in range(i + 1, len(buf)):
+        if buf[k][0] != "/summary":
+            continue
+        m = _skip_ws(buf, k + 1)
+        if m >= len(buf):
+            if complete:
+                continue
+            return ("more",)
+        if buf[m][0] != "div":
+            continue
+        for n in range(m + 1, len(buf)):
+            if buf[n][0] != "/div":
+                continue
+            q = _skip_ws(buf, n + 1)
+            if q >= len(buf):
+                if complete:
+                    continue
+                return ("more",)
+            if buf[q][0] == "/details":
+                return ("ok", buf[m + 1:n], q + 1)
+        if not complete:
+            return ("more",)
+    return ("fail",) if complete else ("more",)
+
+
+def _drop_details_tags(tokens: Iterable[Token]) -> Iterator[Token]:
+    for token in tokens:
+        if token[0] not in _DETAILS_KINDS:
+            yield token
+
+
+def _match_show_all_span(buf: List[Token], complete: bool):
+    # <span id="show-all-description">.*?</span>  ->  ""
+    for index in range(1, len(buf)):
+        if buf[index][0] == "/span":
+            return ("ok", [], index + 1)
+    return ("fail",) if complete else ("more",)
+
+
+def _match_image_block(buf: List[Token]) -> Tuple[str, int]:
+    # <p>\s*<img>(\s*[<strong>]<br>+[</strong>])*\s*</p>
+    i = _skip_ws(buf, 1)
+    if i >= len(buf):
+        return "more", -1
+    if buf[i][0] != "img":
+        return "fail", -1
+    i += 1
+    while True:
+        status, end = _match_br_group(buf, i)
+        if status == "more":
+            return "more", -1
+        if status == "fail":
+            break
+        i = end
+    i = _skip_ws(buf, i)
+    if i >= len(buf):
+        return "more", -1
+    if buf[i][0] != "/p":
+        return "fail", -1
+    return "ok", i + 1
+
+
+def _squeeze_leading_image_blocks(tokens: Iterable[Token]) -> Iterator[Token]:
+    """Baştaki görsel paragraflarını aradaki boşluklar olmadan art arda diz."""
+    source = iter(tokens)
+    buf: List[Token] = []
+    for token in source:
+        kind, raw = token
+        if not buf:
+            if kind == "ws":
+                continue
+            if kind == "text":
+                raw = raw.lstrip()
+                yield ("text", raw)
+                break
+            if kind != "p":
+                yield token
+                break
+        buf.append(token)
+        status, end = _match_image_block(buf)
+        if status == "more":
+            continue
+        if status == "fail":
+            yield from buf
+            buf = []
+            break
+        yield from buf[:end]
+        rest = buf[end:]
+        buf = []
+        if rest:
+            # Tampondaki fazla parçalar (yalnız boşluk olabilir) yeniden değerlendirilir.
+            yield from _squeeze_leading_image_blocks(chain(rest, source))
+            return
+    yield from buf
+    yield from source
+
+
+def normalize_description_images(description: str, image_style: str) -> str:
+    """Yalnız <img> etiketlerini yeniden yaz (stil şablonu + sınıf temizliği)."""
+    text = str(description or "").strip()
+    if not text or "<img" not in text.lower():
+        return text
+    return "".join(raw for _, raw in _rewrite_images(tokenize(text), image_style))
+
+
+def normalize_description_html(description: str, image_style: str) -> str:
+    """
+    Ürün açıklamasını normalize et (eski regex zinciriyle aynı çıktı):
+    görsel stili, görsel paragraflarındaki <br>'ler, boş paragraflar, 3+ <br>,
+    details/summary düzleştirme, "tümünü göster" span'i ve baştaki görsel blokları.
+    """
+    text = str(description or "").strip()
+    if not text:
+        return text
+    parsed = list(tokenize(text))
+    kinds = {kind for kind, _ in parsed}
+    # Tetikleyen parça türü hiç yoksa kural zincire eklenmez.
+    tokens: Iterable[Token] = parsed
+    if "img" in kinds:
+        tokens = _rewrite_images(tokens, image_style)
+    if "p" in kinds:
+        if "br" in kinds:
+            if "img" in kinds:
+                tokens = _buffered(tokens, "p", _match_image_paragraph_brs)
+            tokens = _buffered(tokens, "p", _match_empty_br_paragraph)
+        # Boş paragraf ya metinde vardır ya da <br> paragrafı silinince oluşur.
+        if "br" in kinds or _EMPTY_PARAGRAPH_RE.search(text):
+            tokens = _buffered(tokens, "p", _match_empty_paragraph)
+    if "br" in kinds:
+        tokens = _collapse_br_runs(tokens)
+    if kinds & _DETAILS_KINDS:
+        if "details" in kinds:
+            tokens = _buffered(tokens, "details", _match_details)
+        tokens = _drop_details_tags(tokens)
+    if "span_show_all" in kinds:
+        tokens = _buffered(tokens, "span_show_all", _match_show_all_span)
+    if "p" in kinds and "img" in kinds:
+        tokens = _squeeze_leading_image_blocks(tokens)
+    return "".join(raw for _, raw in tokens).strip()
+
+
+# Test için
+if __name__ == "__main__":
+    import time
+
+    style = "width:820px !important;max-width:100% !important;height:auto !important"
+    styled = f'style="{style}"'
+    golden = [
+        ("", ""),
+        ("<p>Düz metin</p>", "<p>Düz metin</p>"),
+        (
+            '<p><img src="a.webp" class="note-float-left"><br><br></p><p></p><p>Metin</p>',
+            f'<p><img src="a.webp" {styled}></p><p>Metin</p>',
+        ),
+        (
+            '<p>  </p><p><img src="x.jpg"></p>\n<p><img src="y.jpg"><strong><br></strong></p><p>Özellikler</p>',
+            f'<p><img src="x.jpg" {styled}></p><p><img src="y.jpg" {styled}></p><p>Özellikler</p>',
+        ),
+        ("<p>a</p><br><br>\n<br><p>b</p>", "<p>a</p><br><br><p>b</p>"),
+        ('<details><summary>Detay</summary><div class="c"><p>İçerik</p></div></details>', "<p>İçerik</p>"),
+        ('<p>Açıklama <span id="show-all-description">Tümünü göster</span></p>', "<p>Açıklama </p>"),
+        # Bilinçli fark: kapanmamış "<img" metindir; eski regex '<img<div style="...">' üretiyordu.
+        ("<img<div>", "<img<div>"),
+    ]
+    for source, expected in golden:
+        result = normalize_description_html(source, style)
+        print("OK " if result == expected else "HATA", repr(source[:60]))
+
+    image = '<p><img src="https://cdn.myikas.com/images/sabit.webp" class="note-float-left"></p>'
+    descriptions = [
+        f"{image}<p><strong>Ray-Ban RB{n} Güneş Gözlüğü</strong>, klasik çizgi.</p>"
+        f"<h2>Tasarım</h2><p>Hafif yapı.<br><br><br></p><p></p>"
+        f"<ul><li><strong>Model:</strong> RB{n}</li></ul>"
+        for n in range(5000)
+    ]
+    started = time.perf_counter()
+    for description in descriptions:
+        normalize_description_html(description, style)
+    print(f"{len(descriptions)} açıklama: {time.perf_counter() - started:.2f} sn")
@@ -0,0 +1,469 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - asyncio ikas İstemcisi
+Toplu işlerde yüzlerce/binlerce isteği thread açmadan yürütmek için
+asyncio.open_connection üzerine keep-alive HTTP/1.1 taşıyıcı ve GraphQL istemcisi.
+"""
+
+import asyncio
+import json
+import ssl
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from ikas_batch import (
+    DEFAULT_BATCH_SIZE,
+    BatchOperation,
+    BatchResult,
+    build_batch_document,
+    is_query_document,
+    map_batch_response,
+)
+from ikas_client import V2_GRAPHQL_URL, contains_permission_error
+from net import (
+    RETRYABLE_STATUSES,
+    THROTTLE_STATUSES,
+    backoff_delay,
+    get_adaptive_limiter,
+    get_circuit_breaker,
+    parse_retry_after,
+)
+
+DEFAULT_CONCURRENCY = 8
+
+
+class IkasAsyncError(Exception):
+    """asyncio ikas istemcisi hatası."""
+    pass
+
+
+class AsyncHttpResponse:
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content.decode("utf-8"))
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class AsyncHttpTransport:
+    """
+    Host başına keep-alive bağlantı havuzlu, minimal HTTP/1.1 istemcisi.
+    Content-Length ve chunked yanıtları okur; boştaki bağlantılar yeniden kullanılır.
+    Tek bir event loop içinde kullanılmalıdır.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = DEFAULT_CONCURRENCY,
+        timeout: Tuple[float, float] = (10, 120),
+    ):
+        self.max_connections_per_host = max(1, int(max_connections_per_host))
+        self.connect_timeout, self.read_timeout = float(timeout[0]), float(timeout[1])
+        self._ssl_context = ssl.create_default_context()
+        self._idle: Dict[Tuple[str, str, int], List[_Connection]] = {}
+        self._slots: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+        params: Optional[Dict[str, str]] = None,
+    ) -> AsyncHttpResponse:
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        key = (parts.scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        query = parts.query
+        if params:
+            query = f"{query}&{urlencode(params)}" if query else urlencode(params)
+        if query:
+            path = f"{path}?{query}"
+
+        lines = [f"{method.upper()} {path} HTTP/1.1", f"Host: {parts.netloc}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive")
+        raw_request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = asyncio.Semaphore(self.max_connections_per_host)
+
+        async with slot:
+            for attempt in range(2):
+                conn, reused = await self._checkout(key, secure)
+                try:
+                    conn.writer.write(raw_request)
+                    await conn.writer.drain()
+                    response, keep_alive = await asyncio.wait_for(
+                        self._read_response(conn.reader), self.read_timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                    conn.close()
+                    # Sunucunun kapattığı boştaki bağlantı: yeni bağlantıyla bir kez daha dene.
+                    if reused and attempt == 0:
+                        continue
+                    raise IkasAsyncError(f"Bağlantı hatası: {exc}") from exc
+                except asyncio.TimeoutError as exc:
+                    conn.close()
+                    raise IkasAsyncError(f"Zaman aşımı: {url}") from exc
+
+                if keep_alive:
+                    self._idle.setdefault(key, []).append(conn)
+                else:
+                    conn.close()
+                return response
+        raise IkasAsyncError(f"İstek gönderilemedi: {url}")
+
+    async def _checkout(self, key: Tuple[str, str, int], secure: bool) -> Tuple[_Connection, bool]:
+        idle = self._idle.get(key) or []
+        while idle:
+            conn = idle.pop()
+            if not conn.reader.at_eof():
+                return conn, True
+            conn.close()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    key[1],
+                    key[2],
+                    ssl=self._ssl_context if secure else None,
+                    server_hostname=key[1] if secure else None,
+                ),
+                self.connect_timeout,
+            )
+        except asyncio.TimeoutError as exc:
+            raise IkasAsyncError(f"Bağlantı zaman aşımı: {key[1]}") from exc
+        except OSError as exc:
+            raise IkasAsyncError(f"Bağlantı hatası: {exc}") from exc
+        return _Connection(reader, writer), False
+
+    async def _read_response(self, reader: asyncio.StreamReader) -> Tuple[AsyncHttpResponse, bool]:
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("Sunucu yanıt vermeden bağlantıyı kapattı.")
+            parts = status_line.decode("latin-1").split(" ", 2)
+            status = int(parts[1])
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if status != 100:
+                break
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if status in (204, 304):
+            content = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b"".join(chunks)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        else:
+            content = await reader.read()
+            keep_alive = False
+        return AsyncHttpResponse(status, _HeaderView(headers), content), keep_alive
+
+    async def close(self):
+        for connections in self._idle.values():
+            for conn in connections:
+                conn.close()
+        self._idle.clear()
+
+
+class _HeaderView(dict):
+    """Büyük/küçük harf duyarsız başlık okuma (requests ile aynı kullanım)."""
+
+    def get(self, key, default=None):
+        return super().get(str(key).lower(), default)
+
+
+class AsyncIkasClient:
+    """
+    Runner'daki _graphql ile aynı kurallar: Authorization başlığı, 401/403 veya
+    yetki hatasında tek seferlik OAuth fallback, 429/Retry-After ve 5xx'te
+    jitter'lı tekrar (mutation'lar yalnız 429'da), endpoint devre kesicisi.
+    Eşzamanlılık, thread'li istemciyle paylaşılan "ikas_graphql" AIMD limiter'ından
+    alınır; Retry-After duraklaması iki istemci için de geçerlidir.
+    """
+
+    def __init__(
+        self,
+        auth_header: str,
+        config: dict = None,
+        oauth_fallback: Optional[Callable[[], str]] = None,
+        transport: Optional[AsyncHttpTransport] = None,
+        logger: Optional[Callable[[str], None]] = None,
+    ):
+        self.config = config or {}
+        self.auth_header = auth_header
+        self.oauth_fallback = oauth_fallback
+        self.oauth_fallback_used = False
+        self.concurrency = max(1, int(self.config.get("ikas_async_concurrency", DEFAULT_CONCURRENCY) or 1))
+        self.max_retries = max(0, int(self.config.get("ikas_rate_limit_retries", 4) or 0))
+        self.transport = transport or AsyncHttpTransport(
+            max_connections_per_host=self.concurrency,
+            timeout=(
+                self.config.get("request_timeout_connect", 10),
+                self.config.get("request_timeout_read", 120),
+            ),
+        )
+        self.breaker = get_circuit_breaker("ikas_graphql", self.config)
+        self.limiter = get_adaptive_limiter("ikas_graphql", self.config)
+        self.logger = logger or (lambda msg: None)
+
+    async def _acquire_slot(self):
+        # Limiter thread kilidiyle çalışır; event loop bloklanmadan yoklanır.
+        while True:
+            wait_for = self.limiter.try_acquire()
+            if wait_for is None:
+                return
+            await asyncio.sleep(min(wait_for, 1.0))
+
+    async def _post_graphql(self, query: str, variables: Optional[Dict]) -> AsyncHttpResponse:
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        idempotent = is_query_document(query)
+
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            await self._acquire_slot()
+            started = time.monotonic()
+            try:
+                response = await self.transport.request(
+                    "POST",
+                    V2_GRAPHQL_URL,
+                    headers={
+                        "Authorization": self.auth_header,
+                        "Content-Type": "application/json",
+                    },
+                    body=body,
+                )
+            except IkasAsyncError as exc:
+                self.limiter.release(None)
+                self.breaker.record_failure(str(exc))
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # İptal (CancelledError) vb.: paylaşılan limiter'da slot sızmasın.
+                self.limiter.release(None)
+                raise
+
+            status = response.status_code
+            self.limiter.release(time.monotonic() - started, status)
+            self.breaker.record_response(status)
+            if status not in RETRYABLE_STATUSES:
+                return response
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None and status in THROTTLE_STATUSES:
+                self.limiter.pause(retry_after)
+            if not (status == 429 or idempotent) or attempt >= self.max_retries:
+                return response
+            delay = backoff_delay(attempt)
+            if retry_after is not None and status in THROTTLE_STATUSES:
+                delay = max(delay, retry_after)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _switch_to_oauth(self, reason: str) -> bool:
+        if self.oauth_fallback is None or self.oauth_fallback_used:
+            return False
+        self.logger(f"MCP token yetkisi yetersiz ({reason}), OAuth fallback denenecek.")
+        self.auth_header = self.oauth_fallback()
+        self.oauth_fallback_used = True
+        return True
+
+    async def graphql_raw(
+        self, query: str, variables: Optional[Dict] = None
+    ) -> Tuple[Optional[Dict], List[Dict]]:
+        """HTTP hatasında raise eder, GraphQL hatalarını (data, errors) olarak döndürür."""
+        response = await self._post_graphql(query, variables)
+        if response.status_code in (401, 403) and self._switch_to_oauth(f"HTTP {response.status_code}"):
+            response = await self._post_graphql(query, variables)
+        if response.status_code != 200:
+            raise IkasAsyncError(f"GraphQL HTTP hatası: {response.status_code}")
+
+        body = response.json()
+        errors = body.get("errors") or []
+        if errors and contains_permission_error(errors) and self._switch_to_oauth("public/permission"):
+            return await self.graphql_raw(query, variables)
+        return body.get("data") or {}, errors
+
+    async def graphql(
+        self, query: str, variables: Optional[Dict] = None, allow_errors: bool = False
+    ) -> Tuple[Optional[Dict], List[Dict]]:
+        data, errors = await self.graphql_raw(query, variables)
+        if errors and not allow_errors:
+            raise IkasAsyncError(errors[0].get("message", "GraphQL hatası"))
+        return data, errors
+
+    async def close(self):
+        await self.transport.close()
+
+
+async def run_bounded(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[Any]:
+    """
+    items üzerinde func'ı en fazla `concurrency` eşzamanlı görevle çalıştır.
+    Sabit sayıda işçi kullanılır; bellek uçuştaki istek sayısıyla sınırlı kalır.
+    Sonuçlar items sırasındadır; hata veren öğe için exception nesnesi döner.
+    """
+    items = list(items)
+    results: List[Any] = [None] * len(items)
+    queue = iter(enumerate(items))
+
+    async def worker():
+        for index, item in queue:
+            try:
+                results[index] = await func(item)
+            except Exception as exc:
+                results[index] = exc
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, min(concurrency, len(items))))]
+    if workers:
+        await asyncio.gather(*workers)
+    return results
+
+
+async def execute_batched_async(
+    graphql_raw: Callable[[str, Dict], Awaitable[Tuple[Optional[Dict], Optional[List[Dict]]]]],
+    operations: List[BatchOperation],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    operation_type: str = "mutation",
+    on_batch_done: Optional[Callable[[int, int], None]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[BatchResult]:
+    """ikas_batch.execute_batched ile aynı sonuç; batch'ler eşzamanlı gönderilir."""
+    batch_size = max(1, int(batch_size or 1))
+    total = len(operations)
+    chunks = [operations[start:start + batch_size] for start in range(0, total, batch_size)]
+    done_count = [0]
+
+    async def run_chunk(chunk: List[BatchOperation]) -> List[BatchResult]:
+        results = await _run_single_batch_async(graphql_raw, chunk, operation_type)
+        done_count[0] += len(chunk)
+        if on_batch_done:
+            on_batch_done(done_count[0], total)
+        return results
+
+    chunk_results = await run_bounded(run_chunk, chunks, concurrency)
+    results: List[BatchResult] = []
+    for chunk, outcome in zip(chunks, chunk_results):
+        if isinstance(outcome, Exception):
+            outcome = [BatchResult(operation=op, errors=[{"message": str(outcome)}]) for op in chunk]
+        results.extend(outcome)
+    return results
+
+
+async def _run_single_batch_async(graphql_raw, operations, operation_type) -> List[BatchResult]:
+    query, variables, aliases = build_batch_document(operations, operation_type)
+    try:
+        data, errors = await graphql_raw(query, variables)
+    except Exception as exc:
+        return [BatchResult(operation=op, errors=[{"message": str(exc)}]) for op in operations]
+
+    results, retry_individually = map_batch_response(
+        operations, aliases, data, errors, operation_type
+    )
+    if not retry_individually:
+        return results
+    final = []
+    for result in results:
+        if result.errors:
+            final.append(result)
+        else:
+            final.extend(await _run_single_batch_async(graphql_raw, [result.operation], operation_type))
+    return final
+
+
+def run_batched_sync(
+    auth_header: str,
+    operations: List[BatchOperation],
+    config: dict = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    operation_type: str = "mutation",
+    on_batch_done: Optional[Callable[[int, int], None]] = None,
+    oauth_fallback: Optional[Callable[[], str]] = None,
+) -> List[BatchResult]:
+    """Event loop'u olmayan iş parçacıklarından (GUI arka plan işleri) çağırmak için."""
+
+    async def main():
+        client = AsyncIkasClient(auth_header, config=config, oauth_fallback=oauth_fallback)
+        try:
+            return await execute_batched_async(
+                client.graphql_raw,
+                operations,
+                batch_size=batch_size,
+                operation_type=operation_type,
+                on_batch_done=on_batch_done,
+                concurrency=client.concurrency,
+            )
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+# Test için
+if __name__ == "__main__":
+
+    async def _demo():
+        transport = AsyncHttpTransport(max_connections_per_host=4, timeout=(10, 30))
+        started = time.time()
+
+        async def fetch(_):
+            response = await transport.request("GET", "https://api.myikas.com/")
+            return response.status_code
+
+        try:
+            statuses = await run_bounded(fetch, range(8), concurrency=4)
+            print("Durumlar:", statuses, f"{time.time() - started:.2f} sn")
+        finally:
+            await transport.close()
+
+    asyncio.run(_demo())
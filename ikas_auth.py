@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - ikas OAuth Token Sağlayıcı
+Access token'ı bellekte ve yerel dosyada (DPAPI/Fernet ile şifreli, değilse
+0600 izinli) tutar; expires_in'e göre süresi dolmadan yeniler. GUI, runner ve
+yükleme aynı sağlayıcıyı paylaşır.
+"""
+
+import base64
+import getpass
+import hashlib
+import hmac
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import requests
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # opsiyonel: yoksa token yalnız 0600 izinli dosyada düz tutulur
+    Fernet = None
+    InvalidToken = ValueError
+
+from net import get_adaptive_limiter, get_circuit_breaker, request_with_limiter
+
+DEFAULT_EXPIRES_IN = 3600
+DEFAULT_REFRESH_MARGIN = 120
+
+
+class TokenError(Exception):
+    """OAuth token alınamadı."""
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Diskte saklama: Windows'ta DPAPI (kullanıcı hesabına bağlı); diğerlerinde
+# cryptography kuruluysa client_secret + kullanıcı/makine kimliğinden türetilen
+# anahtarla Fernet (AES-128-CBC + HMAC-SHA256). İkisi de yoksa sahte şifreleme
+# yapılmaz: token düz JSON olarak yalnız sahibin okuyabildiği (0600) dosyada durur.
+# ---------------------------------------------------------------------------
+
+def _dpapi(data: bytes, protect: bool) -> Optional[bytes]:
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class DATA_BLOB(ctypes.Structure):
+            _fields_ = [("cbData", wintypes.DWORD), ("pbData", ctypes.POINTER(ctypes.c_char))]
+
+        buffer = ctypes.create_string_buffer(data, len(data))
+        blob_in = DATA_BLOB(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+        blob_out = DATA_BLOB()
+        crypt32 = ctypes.windll.crypt32
+        func = crypt32.CryptProtectData if protect else crypt32.CryptUnprotectData
+        if not func(ctypes.byref(blob_in), None, None, None, None, 0, ctypes.byref(blob_out)):
+            return None
+        try:
+            return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+        finally:
+            ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+    except Exception:
+        return None
+
+
+def _derive_key(secret: str) -> bytes:
+    identity = f"{getpass.getuser()}@{socket.gethostname()}"
+    return hmac.new(
+        str(secret or "").encode("utf-8"), f"ikas-token-cache|{identity}".encode("utf-8"), hashlib.sha256
+    ).digest()
+
+
+def encrypt_blob(plain: bytes, secret: str) -> Dict[str, str]:
+    protected = _dpapi(plain, protect=True)
+    if protected is not None:
+        return {"scheme": "dpapi", "data": base64.b64encode(protected).decode("ascii")}
+    if Fernet is not None:
+        key = base64.urlsafe_b64encode(_derive_key(secret))
+        return {"scheme": "fernet", "data": Fernet(key).encrypt(plain).decode("ascii")}
+    return {"scheme": "plain", "data": plain.decode("utf-8")}
+
+
+def decrypt_blob(blob: Dict[str, str], secret: str) -> Optional[bytes]:
+    scheme = blob.get("scheme")
+    data = blob.get("data") or ""
+    if scheme == "plain":
+        return data.encode("utf-8")
+    if scheme == "fernet":
+        if Fernet is None:
+            return None
+        key = base64.urlsafe_b64encode(_derive_key(secret))
+        try:
+            return Fernet(key).decrypt(data.encode("ascii"))
+        except (InvalidToken, ValueError, TypeError):
+            return None
+    try:
+        raw = base64.b64decode(data)
+    except (ValueError, TypeError):
+        return None
+    if scheme == "dpapi":
+        return _dpapi(raw, protect=False)
+    # Eski "hmac" kayıtları okunmaz; token bir kez yeniden alınır.
+    return None
+
+
+class TokenProvider:
+    """
+    Mağaza + client_id başına paylaşılan OAuth token sağlayıcı.
+
+    - Token geçerliyse ağ isteği yapılmaz.
+    - Kalan süre refresh_margin'in altına inerse çağrı yeniler (bloklayarak);
+      iki katının altındaysa mevcut token döner, yenileme arka planda yapılır.
+    - 401 alındığında invalidate() ile bellek + dosya kaydı silinir.
+    """
+
+    def __init__(
+        self,
+        store_name: str,
+        client_id: str,
+        client_secret: str,
+        cache_path: Optional[str] = None,
+        config: dict = None,
+        refresh_margin: int = DEFAULT_REFRESH_MARGIN,
+    ):
+        self.store_name = str(store_name or "").strip()
+        self.client_id = str(client_id or "").strip()
+        self.client_secret = str(client_secret or "").strip()
+        self.cache_path = cache_path
+        self.config = config or {}
+        self.refresh_margin = max(0, int(refresh_margin))
+        self.session = requests.Session()
+        self._token = ""
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def token_url(self) -> str:
+        return f"https://{self.store_name}.myikas.com/api/admin/oauth/token"
+
+    def has_credentials(self) -> bool:
+        return bool(self.store_name and self.client_id and self.client_secret)
+
+    def get_auth_header(self, force_refresh: bool = False) -> str:
+        return f"Bearer {self.get_token(force_refresh)}"
+
+    def get_token(self, force_refresh: bool = False) -> str:
+        if not self.has_credentials():
+            raise TokenError("İkas kimlik bilgileri eksik (store_name, client_id, client_secret).")
+
+        background = False
+        with self._lock:
+            if not force_refresh and not self._token:
+                self._load_from_disk()
+            remaining = self._expires_at - time.time()
+            if force_refresh or not self._token or remaining <= self.refresh_margin:
+                self._fetch()
+                return self._token
+            if remaining <= self.refresh_margin * 2 and not self._refreshing:
+                self._refreshing = background = True
+            token = self._token
+
+        if background:
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+        return token
+
+    def invalidate(self):
+        with self._lock:
+            self._token = ""
+            self._expires_at = 0.0
+            if self.cache_path:
+                try:
+                    os.remove(self.cache_path)
+                except OSError:
+                    pass
+
+    def expires_in(self) -> float:
+        with self._lock:
+            return max(0.0, self._expires_at - time.time())
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                if self._expires_at - time.time() <= self.refresh_margin * 2:
+                    self._fetch()
+        except Exception:
+            # Mevcut token hala geçerli; bir sonraki çağrı tekrar dener.
+            pass
+        finally:
+            self._refreshing = False
+
+    def _fetch(self):
+        try:
+            response = request_with_limiter(
+                get_adaptive_limiter("ikas_oauth", self.config),
+                lambda: self.session.post(
+                    self.token_url,
+                    data={
+                        "grant_type": "client_credentials",
+                        "client_id": self.client_id,
+                        "client_secret": self.client_secret,
+                    },
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                    timeout=(
+                        self.config.get("request_timeout_connect", 10),
+                        self.config.get("request_timeout_read", 120),
+                    ),
+                ),
+                breaker=get_circuit_breaker("ikas_oauth", self.config),
+            )
+            response.raise_for_status()
+            body = response.json() or {}
+        except (requests.RequestException, ValueError) as exc:
+            raise TokenError(f"OAuth token alınamadı: {exc}") from exc
+
+        token = str(body.get("access_token") or "").strip()
+        if not token:
+            raise TokenError("OAuth token yanıtında access_token bulunamadı.")
+        try:
+            expires_in = float(body.get("expires_in") or DEFAULT_EXPIRES_IN)
+        except (TypeError, ValueError):
+            expires_in = DEFAULT_EXPIRES_IN
+        self._token = token
+        self._expires_at = time.time() + expires_in
+        self._save_to_disk()
+
+    def _identity(self) -> Tuple[str, str]:
+        return self.store_name, self.client_id
+
+    def _load_from_disk(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                blob = json.load(f)
+            plain = decrypt_blob(blob, self.client_secret)
+            record = json.loads(plain.decode("utf-8")) if plain else {}
+        except (OSError, ValueError):
+            return
+        if (record.get("store_name"), record.get("client_id")) != self._identity():
+            return
+        self._token = str(record.get("access_token") or "")
+        self._expires_at = float(record.get("expires_at") or 0)
+
+    def _save_to_disk(self):
+        if not self.cache_path:
+            return
+        record = {
+            "store_name": self.store_name,
+            "client_id": self.client_id,
+            "access_token": self._token,
+            "expires_at": self._expires_at,
+        }
+        blob = encrypt_blob(json.dumps(record).encode("utf-8"), self.client_secret)
+        try:
+            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            # Şemadan bağımsız olarak dosya yalnız sahibine açık oluşturulur.
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(blob, f)
+            if os.name != "nt":
+                os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+
+_providers: Dict[Tuple[str, str, str], TokenProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_token_provider(config: dict = None) -> TokenProvider:
+    """Konfigürasyondaki kimlik bilgileri için paylaşılan sağlayıcı."""
+    config = config or {}
+    store_name = str(config.get("store_name", "") or "").strip()
+    client_id = str(config.get("client_id", "") or "").strip()
+    client_secret = str(config.get("client_secret", "") or "").strip()
+    key = (store_name, client_id, hashlib.sha256(client_secret.encode("utf-8")).hexdigest())
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            safe_store = re.sub(r"[^a-z0-9_-]+", "_", store_name.lower() or "default")
+            provider = TokenProvider(
+                store_name,
+                client_id,
+                client_secret,
+                cache_path=os.path.join(config.get("cache_dir", "cache"), f"ikas_token_{safe_store}.json"),
+                config=config,
+                refresh_margin=config.get("ikas_token_refresh_margin_seconds", DEFAULT_REFRESH_MARGIN),
+            )
+            _providers[key] = provider
+        return provider
+
+
+# Test için
+if __name__ == "__main__":
+    blob = encrypt_blob(b'{"access_token": "abc"}', "gizli")
+    print("Şema:", blob["scheme"])
+    print("Çözüldü:", decrypt_blob(blob, "gizli"))
+    print("Yanlış anahtar:", decrypt_blob(blob, "baska"))
@@ -4,11 +4,14 @@ Kepekci Optik - ikas tam otomasyon
 Output klasorunden urunleri okuyup upsert + gorsel yukleme yapar.
 """
 
-import base64
 import csv
+import hashlib
 import html
+import json
 import os
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -17,11 +20,46 @@ from typing import Callable, Dict, List, Optional, Tuple
 import pandas as pd
 import requests
 
-V2_GRAPHQL_URL = "https://api.myikas.com/api/v2/admin/graphql"
-IMAGE_UPLOAD_URL = "https://api.myikas.com/api/v1/admin/product/upload/image"
+from catalog_store import get_catalog_store, list_product_query
+from description_cache import description_cache_key, get_description_cache
+from description_memo import get_description_memo, memoized
+from html_normalizer import normalize_description_html, normalize_description_images
+from ikas_batch import DEFAULT_BATCH_SIZE, BatchOperation, execute_batched
+from ikas_client import IkasClientError, get_ikas_client
+from ikas_diff import diff_product_update, prices_equal, sales_channels_equal
+from price_match import ModelMatch, ModelMatchIndex
+from net import CircuitOpenError, circuit_breaker_snapshots, get_circuit_breaker, get_latency_tracker
+from upload_manifest import get_upload_manifest
+from upload_prep import UPLOAD_CACHE_DIRNAME, UploadPreparer
+from run_journal import build_run_key, get_run_journal
+
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
 DEFAULT_GOOGLE_TAXONOMY_ID = "178"
 DEFAULT_DESCRIPTION_IMAGE_WIDTH_PX = 820
+GEMINI_DESCRIPTION_MODEL = "gemini-1.5-flash"
+# Aciklama prompt'lari degisince artirilir; eski onbellek kayitlari kullanilmaz.
+DESCRIPTION_PROMPT_VERSION = "2"
+OPENAI_DESCRIPTION_SYSTEM_PROMPT = (
+    "You generate detailed Turkish ecommerce product descriptions with structured HTML blocks."
+)
+_OPENAI_DESCRIPTION_RULES = (
+    "Uzunluk 190-280 kelime olsun. "
+    "Emoji destekli bölüm yapısı kullan: 🕶️, ☀️, ✨, 🎨. "
+    "Bölümler: Giriş, Koruma/Performans, Tasarım/Konfor, Varyantlar. "
+)
+OPENAI_DESCRIPTION_INSTRUCTIONS = (
+    "Türkçe, e-ticaret için daha gelişmiş bir ürün açıklaması yaz. "
+    + _OPENAI_DESCRIPTION_RULES
+    + "Yanıt sadece HTML olsun; <p>, <strong>, <br> kullanabilirsin. "
+    "Aşırı reklam dili kullanma, teknik ve anlaşılır kal."
+)
+# Toplu istek: yanit JSON nesnesidir; "yalniz HTML" talimati JSON istegiyle celisirdi.
+OPENAI_DESCRIPTION_BATCH_INSTRUCTIONS = (
+    "Her ürün için Türkçe, e-ticaret için daha gelişmiş bir ürün açıklaması yaz. "
+    + _OPENAI_DESCRIPTION_RULES
+    + "Her açıklama HTML metni olsun; <p>, <strong>, <br> kullanabilirsin. "
+    "Aşırı reklam dili kullanma, teknik ve anlaşılır kal."
+)
 DESCRIPTION_IMAGE_STYLE_TEMPLATE = (
     "width:{width}px !important;"
     "max-width:100% !important;"
@@ -140,6 +178,12 @@ class ProductSignals:
     is_polarized: bool
 
 
+def _strip_html_tags(value: str) -> str:
+    text = re.sub(r"<[^>]+>", " ", str(value or ""))
+    text = html.unescape(text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
 def _normalize_text(value: str) -> str:
     value = str(value or "").strip().lower()
     value = re.sub(r"\s+", " ", value)
@@ -166,15 +210,6 @@ def _normalize_slug(value: str) -> str:
     return value or "X"
 
 
-def _to_float_or_none(value) -> Optional[float]:
-    if value is None or (isinstance(value, float) and pd.isna(value)):
-        return None
-    text = str(value).strip().replace(",", ".")
-    if not text:
-        return None
-    return float(text)
-
-
 def _to_model_text(value) -> str:
     if value is None or (isinstance(value, float) and pd.isna(value)):
         return ""
@@ -186,87 +221,183 @@ def _to_model_text(value) -> str:
     return text.upper()
 
 
+def _column_key(name) -> str:
+    return (
+        _normalize_text(name)
+        .replace("ı", "i")
+        .replace("ş", "s")
+        .replace("ğ", "g")
+        .replace("ç", "c")
+        .replace("ö", "o")
+        .replace("ü", "u")
+    )
+
+
 def _find_column(columns: List[str], candidates: List[str]) -> Optional[str]:
-    normalized_map = {
-        _normalize_text(col).replace("ı", "i").replace("ş", "s").replace("ğ", "g").replace("ç", "c").replace("ö", "o").replace("ü", "u"): col
-        for col in columns
-    }
+    normalized_map = {_column_key(col): col for col in columns}
     for cand in candidates:
-        key = (
-            _normalize_text(cand)
-            .replace("ı", "i")
-            .replace("ş", "s")
-            .replace("ğ", "g")
-            .replace("ç", "c")
-            .replace("ö", "o")
-            .replace("ü", "u")
-        )
+        key = _column_key(cand)
         if key in normalized_map:
             return normalized_map[key]
     return None
 
 
+PRICE_COLUMN_CANDIDATES = {
+    "Marka": ["Marka", "Brand"],
+    "Model": ["Model"],
+    "Satış Fiyatı": ["Satış Fiyatı", "Satis Fiyati", "Satış Fiyati", "Satis Fiyatı"],
+    "İndirimli Fiyatı": ["İndirimli Fiyatı", "Indirimli Fiyati", "İndirimli Fiyati", "Indirimli Fiyatı"],
+    "Alış Fiyatı": ["Alış Fiyatı", "Alis Fiyati", "Alış Fiyati", "Alis Fiyatı"],
+}
+PRICE_RULES_SNAPSHOT_VERSION = 1
+
+
+def price_rules_snapshot_path(path: str) -> Path:
+    # Derlenmis kurallar fiyat dosyasinin yaninda gizli JSON olarak tutulur.
+    source = Path(path)
+    return source.with_name(f".{source.name}.price_rules.json")
+
+
+def _price_file_signature(path: str) -> Dict:
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return {
+        "version": PRICE_RULES_SNAPSHOT_VERSION,
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def _text_column(series: "pd.Series") -> "pd.Series":
+    # Bos hucre -> "" (pandas surumunden bagimsiz), sonra str + strip.
+    return series.where(series.notna(), "").astype(str).str.strip()
+
+
+def _key_column(series: "pd.Series") -> "pd.Series":
+    # _normalize_text'in vektorel karsiligi (girdi zaten strip edilmis).
+    return series.str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def _model_column(series: "pd.Series") -> "pd.Series":
+    # _to_model_text'in vektorel karsiligi: "2140.0" -> "2140", digerleri buyuk harf.
+    text = _text_column(series)
+    whole_number = text.str.fullmatch(r"\d+\.0")
+    return text.str.split(".", n=1).str[0].where(whole_number, text.str.upper())
+
+
+def _price_column(series: "pd.Series", label: str) -> List[Optional[float]]:
+    # Bos -> None, virgul ondalik ayraci kabul edilir, okunamayan deger -> hata.
+    text = _text_column(series).str.replace(",", ".", regex=False)
+    values = pd.to_numeric(text.where(text != ""), errors="coerce")
+    invalid = values.isna() & (text != "")
+    if invalid.any():
+        raise AutomationError(
+            f"Fiyat dosyasinda gecersiz {label}: {text[invalid].iloc[0]}"
+        )
+    return [None if pd.isna(value) else float(value) for value in values.tolist()]
+
+
+def _price_payload(price: PriceRule) -> Dict:
+    # Kuralda indirim yoksa discountPrice acikca null gonderilir: listeden kaldirilan
+    # indirim ikas'ta da temizlenir (alan atlansaydi eski indirim kalirdi).
+    # Bos alis fiyati ise gonderilmez; ikas'taki kayitli maliyet silinmez.
+    payload = {
+        "sellPrice": float(price.sell_price),
+        "discountPrice": None if price.discount_price is None else float(price.discount_price),
+    }
+    if price.buy_price is not None:
+        payload["buyPrice"] = float(price.buy_price)
+    return payload
+
+
+def _has_remote_discount(variant: Dict) -> bool:
+    prices = variant.get("prices") or []
+    return bool(prices) and (prices[0] or {}).get("discountPrice") is not None
+
+
+def _same_price(left: PriceRule, right: PriceRule) -> bool:
+    return (left.sell_price, left.discount_price, left.buy_price) == (
+        right.sell_price,
+        right.discount_price,
+        right.buy_price,
+    )
+
+
 class PriceRuleResolver:
     def __init__(self):
         self.exact_rules: Dict[Tuple[str, str], PriceRule] = {}
         self.brand_fallback_rules: Dict[str, PriceRule] = {}
+        self._match_index: Optional[ModelMatchIndex] = None
 
     @classmethod
     def from_excel(cls, path: str) -> "PriceRuleResolver":
         if not path or not os.path.exists(path):
             raise AutomationError(f"Fiyat dosyasi bulunamadi: {path}")
 
-        df = pd.read_excel(path)
-        columns = list(df.columns)
+        # Dosya degismediyse (yol + boyut + mtime + sha256) derlenmis kurallar kullanilir.
+        signature = _price_file_signature(path)
+        snapshot_path = price_rules_snapshot_path(path)
+        resolver = cls._load_snapshot(snapshot_path, signature)
+        if resolver is not None:
+            return resolver
 
-        col_brand = _find_column(columns, ["Marka", "Brand"])
-        col_model = _find_column(columns, ["Model"])
-        col_sell = _find_column(columns, ["Satış Fiyatı", "Satis Fiyati", "Satış Fiyati", "Satis Fiyatı"])
-        col_discount = _find_column(
-            columns,
-            ["İndirimli Fiyatı", "Indirimli Fiyati", "İndirimli Fiyati", "Indirimli Fiyatı"],
-        )
-        col_buy = _find_column(columns, ["Alış Fiyatı", "Alis Fiyati", "Alış Fiyati", "Alis Fiyatı"])
-
-        required_missing = []
-        if not col_brand:
-            required_missing.append("Marka")
-        if not col_model:
-            required_missing.append("Model")
-        if not col_sell:
-            required_missing.append("Satış Fiyatı")
-        if not col_discount:
-            required_missing.append("İndirimli Fiyatı")
-        if not col_buy:
-            required_missing.append("Alış Fiyatı")
+        resolver = cls._compile_excel(path)
+        resolver._save_snapshot(snapshot_path, signature)
+        return resolver
 
+    @classmethod
+    def _compile_excel(cls, path: str) -> "PriceRuleResolver":
+        wanted = {
+            _column_key(name)
+            for candidates in PRICE_COLUMN_CANDIDATES.values()
+            for name in candidates
+        }
+        # Tedarikci listelerindeki diger kolonlar hic okunmaz.
+        df = pd.read_excel(path, usecols=lambda name: _column_key(name) in wanted)
+        columns = list(df.columns)
+
+        found = {
+            label: _find_column(columns, candidates)
+            for label, candidates in PRICE_COLUMN_CANDIDATES.items()
+        }
+        required_missing = [label for label, column in found.items() if not column]
         if required_missing:
             raise AutomationError(
                 "Fiyat dosyasi kolonlari eksik: " + ", ".join(required_missing)
             )
 
-        resolver = cls()
-
-        for _, row in df.iterrows():
-            brand = str(row.get(col_brand, "")).strip()
-            model = _to_model_text(row.get(col_model, ""))
-            if not brand:
-                continue
+        brands = _text_column(df[found["Marka"]])
+        models = _model_column(df[found["Model"]])
+        sell_prices = _price_column(df[found["Satış Fiyatı"]], "Satış Fiyatı")
+        discount_prices = _price_column(df[found["İndirimli Fiyatı"]], "İndirimli Fiyatı")
+        buy_prices = _price_column(df[found["Alış Fiyatı"]], "Alış Fiyatı")
+        brand_keys = _key_column(brands)
+        model_keys = _key_column(models)
 
-            sell_price = _to_float_or_none(row.get(col_sell))
-            if sell_price is None:
+        resolver = cls()
+        for brand, model, brand_key, model_key, sell_price, discount_price, buy_price in zip(
+            brands.tolist(),
+            models.tolist(),
+            brand_keys.tolist(),
+            model_keys.tolist(),
+            sell_prices,
+            discount_prices,
+            buy_prices,
+        ):
+            if not brand or sell_price is None:
                 continue
-
             rule = PriceRule(
                 brand=brand,
                 model=model,
                 sell_price=sell_price,
-                discount_price=_to_float_or_none(row.get(col_discount)),
-                buy_price=_to_float_or_none(row.get(col_buy)),
+                discount_price=discount_price,
+                buy_price=buy_price,
             )
-
-            brand_key = _normalize_text(brand)
-            model_key = _normalize_text(model)
             if model_key:
                 resolver.exact_rules[(brand_key, model_key)] = rule
             else:
@@ -277,19 +408,210 @@ class PriceRuleResolver:
 
         return resolver
 
+    @classmethod
+    def _load_snapshot(cls, snapshot_path: Path, signature: Dict) -> Optional["PriceRuleResolver"]:
+        try:
+            with open(snapshot_path, "r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(payload, dict) or payload.get("signature") != signature:
+            return None
+
+        resolver = cls()
+        try:
+            for brand_key, model_key, *fields in payload.get("exact") or []:
+                resolver.exact_rules[(brand_key, model_key)] = PriceRule(*fields)
+            for brand_key, *fields in payload.get("fallback") or []:
+                resolver.brand_fallback_rules[brand_key] = PriceRule(*fields)
+        except (TypeError, ValueError):
+            return None
+        if not resolver.exact_rules and not resolver.brand_fallback_rules:
+            return None
+        return resolver
+
+    def _save_snapshot(self, snapshot_path: Path, signature: Dict):
+        def _fields(rule: PriceRule) -> List:
+            return [rule.brand, rule.model, rule.sell_price, rule.discount_price, rule.buy_price]
+
+        payload = {
+            "signature": signature,
+            "exact": [[b, m, *_fields(rule)] for (b, m), rule in self.exact_rules.items()],
+            "fallback": [[b, *_fields(rule)] for b, rule in self.brand_fallback_rules.items()],
+        }
+        tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(payload, handle, ensure_ascii=False)
+            os.replace(tmp_path, snapshot_path)
+        except OSError:
+            # Salt okunur klasor: derlenmis kopya olmadan devam edilir.
+            pass
+
+    def match_index(self) -> ModelMatchIndex:
+        # Ilk cozumde bir kez kurulur; es zamanli iki kurulum ayni sonucu verir.
+        if self._match_index is None:
+            self._match_index = ModelMatchIndex(
+                self.exact_rules,
+                self.brand_fallback_rules,
+                model_of=lambda rule: rule.model,
+                same_rule=_same_price,
+            )
+        return self._match_index
+
+    def resolve_match(self, brand: str, model: str) -> Optional[ModelMatch]:
+        """Kural + eslesme nedeni (exact, canonical, core, ngram, brand)."""
+        return self.match_index().match(
+            _normalize_text(brand), _normalize_text(model), str(model or "").strip()
+        )
+
     def resolve(self, brand: str, model: str) -> Optional[PriceRule]:
-        brand_key = _normalize_text(brand)
-        model_key = _normalize_text(model)
+        match = self.resolve_match(brand, model)
+        return match.rule if match else None
 
-        if brand_key and model_key:
-            exact = self.exact_rules.get((brand_key, model_key))
-            if exact:
-                return exact
 
-        if brand_key:
-            return self.brand_fallback_rules.get(brand_key)
+UPDATE_VARIANT_PRICES_MUTATION = """
+mutation UpdateVariantPrices($input: UpdateVariantPricesInput!) {
+  updateVariantPrices(input: $input) {
+    errors {
+      errorCode
+      inputArrayIndex
+    }
+  }
+}
+"""
+DEFAULT_PRICE_SYNC_BATCH_SIZE = 200
+
+PRODUCT_STATE_KEYS = (
+    "description",
+    "googleTaxonomyId",
+    "brand",
+    "categories",
+    "tags",
+    "salesChannels",
+    "translations",
+    "metaData",
+    "attributes",
+    "variants",
+)
+VARIANT_STATE_KEYS = ("id", "sku", "attributes", "images", "variantValues", "prices")
+# listProduct profili -> onbellekte bulunmasi gereken (urun, varyant) alanlari.
+PROFILE_STATE_KEYS = {
+    "full": (PRODUCT_STATE_KEYS, VARIANT_STATE_KEYS),
+    "images": (("variants",), ("id", "sku", "variantValues", "images")),
+}
 
-        return None
+
+class ProductStateCache:
+    """
+    Tek calisma boyunca urun durumunu id bazinda tutar.
+    Mutation yanitlari uzerine birlestirilir; eksik alan varsa yeniden cekilir.
+    Calisma basinda tum katalog yuklenirse (snapshot) isim/SKU indeksi
+    uzerinden ag istegi olmadan arama yapilir.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, Dict] = {}
+        self._id_by_name: Dict[str, str] = {}
+        self._id_by_sku: Dict[str, str] = {}
+        self.snapshot_complete = False
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load_snapshot(self, products: List[Dict]):
+        self._by_id.clear()
+        self._id_by_name.clear()
+        self._id_by_sku.clear()
+        for product in products or []:
+            self.merge(product)
+        self.snapshot_complete = True
+
+    def get(self, product_id: str) -> Optional[Dict]:
+        return self._by_id.get(str(product_id or ""))
+
+    def get_by_name(self, product_name: str) -> Optional[Dict]:
+        product_id = self._id_by_name.get(_normalize_text(product_name))
+        return self._by_id.get(product_id) if product_id else None
+
+    def get_by_sku(self, sku: str) -> Optional[Dict]:
+        product_id = self._id_by_sku.get(_normalize_text(sku))
+        return self._by_id.get(product_id) if product_id else None
+
+    def _reindex(self, product_id: str, previous: Dict, current: Dict):
+        old_name = _normalize_text(previous.get("name") or "")
+        if old_name and self._id_by_name.get(old_name) == product_id:
+            del self._id_by_name[old_name]
+        for variant in previous.get("variants") or []:
+            old_sku = _normalize_text((variant or {}).get("sku") or "")
+            if old_sku and self._id_by_sku.get(old_sku) == product_id:
+                del self._id_by_sku[old_sku]
+
+        name = _normalize_text(current.get("name") or "")
+        if name:
+            self._id_by_name[name] = product_id
+        for variant in current.get("variants") or []:
+            sku = _normalize_text((variant or {}).get("sku") or "")
+            if sku:
+                self._id_by_sku[sku] = product_id
+
+    def merge(self, product: Optional[Dict]) -> Optional[Dict]:
+        product_id = str((product or {}).get("id") or "")
+        if not product_id:
+            return None
+
+        previous = self._by_id.get(product_id) or {}
+        current = dict(previous)
+        for key, value in product.items():
+            if key == "variants":
+                continue
+            current[key] = value
+
+        if "variants" in product:
+            previous_variants = {
+                str((v or {}).get("id") or ""): v for v in (current.get("variants") or [])
+            }
+            merged_variants = []
+            for variant in product.get("variants") or []:
+                variant_id = str((variant or {}).get("id") or "")
+                merged = dict(previous_variants.get(variant_id) or {})
+                merged.update(variant or {})
+                merged_variants.append(merged)
+            current["variants"] = merged_variants
+
+        self._by_id[product_id] = current
+        self._reindex(product_id, previous, current)
+        return current
+
+    def update_variant(self, product_id: str, variant_id: str, **fields):
+        product = self._by_id.get(str(product_id or ""))
+        if not product:
+            return
+        for variant in product.get("variants") or []:
+            if str((variant or {}).get("id") or "") == str(variant_id):
+                variant.update(fields)
+                return
+
+    def drop_variant_field(self, product_id: str, variant_id: str, field: str):
+        product = self._by_id.get(str(product_id or ""))
+        if not product:
+            return
+        for variant in product.get("variants") or []:
+            if str((variant or {}).get("id") or "") == str(variant_id):
+                variant.pop(field, None)
+                return
+
+    def is_complete(self, product_id: str, profile: str = "full") -> bool:
+        product = self._by_id.get(str(product_id or ""))
+        if not product:
+            return False
+        product_keys, variant_keys = PROFILE_STATE_KEYS[profile]
+        if any(key not in product for key in product_keys):
+            return False
+        for variant in product.get("variants") or []:
+            if any(key not in (variant or {}) for key in variant_keys):
+                return False
+        return True
 
 
 class AutomationReport:
@@ -394,6 +716,15 @@ def ensure_permanent_description_images(
     description: str,
     width_px: int = DEFAULT_DESCRIPTION_IMAGE_WIDTH_PX,
 ) -> str:
+    # Ayni metin (mevcut aciklama / sablon) tekrar islenmesin.
+    return memoized(
+        ("permanent_images", width_px),
+        description,
+        lambda text: _ensure_permanent_description_images(text, width_px),
+    )
+
+
+def _ensure_permanent_description_images(description: str, width_px: int) -> str:
     text = str(description or "").strip()
     image_block = build_permanent_description_image_html(width_px)
     if not text:
@@ -493,9 +824,8 @@ class IkasAutomationRunner:
         self.progress_callback = progress_callback or (lambda _payload: None)
 
         self.session = requests.Session()
-        self.auth_header = ""
-        self.using_mcp_token = False
-        self.oauth_fallback_used = False
+        # ikas GraphQL + gorsel yukleme: ortak havuz, kimlik, limiter ve olcum.
+        self.client = get_ikas_client(self.config, logger=self._log)
         self.google_taxonomy_id = str(
             self.config.get("ikas_google_taxonomy_id", DEFAULT_GOOGLE_TAXONOMY_ID)
         ).strip() or DEFAULT_GOOGLE_TAXONOMY_ID
@@ -509,7 +839,21 @@ class IkasAutomationRunner:
         self.ai_description_model = str(
             self.config.get("ikas_description_model", "gpt-4o-mini")
         ).strip() or "gpt-4o-mini"
+        self.description_cache = get_description_cache(self.config)
+        self.description_memo = get_description_memo(self.config)
+        # Memo surec genelinde paylasilir; sayaclar calisma basindaki degere gore raporlanir.
+        self._memo_baseline = self.description_memo.stats()
+        self.description_pool: Optional[ThreadPoolExecutor] = None
+        self.description_futures: Dict[str, Future] = {}
+        self.upload_workers = max(1, int(self.config.get("ikas_upload_workers", 3) or 1))
+        self.graphql_batch_size = max(
+            1, int(self.config.get("ikas_graphql_batch_size", DEFAULT_BATCH_SIZE) or 1)
+        )
         self.fitguide_attribute_id = ""
+        self.product_cache = ProductStateCache()
+        self.upload_manifest = get_upload_manifest(self.config)
+        self.upload_preparer: Optional[UploadPreparer] = None
+        self.journal = get_run_journal(self.config)
         self.report = AutomationReport()
 
         self.summary = {
@@ -523,7 +867,8 @@ class IkasAutomationRunner:
             "variant_failures": 0,
         }
 
-    def run(self, output_dir: str = "output") -> Dict:
+    def run(self, output_dir: str = "output", resume: bool = False) -> Dict:
+        self._memo_baseline = self.description_memo.stats()
         self._log("Fiyat kurallari okunuyor...")
         price_rules = PriceRuleResolver.from_excel(self.price_rules_path)
 
@@ -532,6 +877,7 @@ class IkasAutomationRunner:
         if not candidates:
             raise AutomationError("Output klasorunde islenecek urun bulunamadi.")
 
+        completed = self._open_journal(output_dir, resume)
         self.summary["total_products"] = len(candidates)
         self._log(f"{len(candidates)} urun bulundu.")
         self._progress(
@@ -542,31 +888,89 @@ class IkasAutomationRunner:
         )
 
         self._log("Token hazirlaniyor...")
-        self.auth_header = self._resolve_auth_header()
+        self._prepare_auth()
 
         channels = self._list_sales_channels()
         sales_channel_payload = self._build_sales_channel_payload(channels)
 
+        self._load_catalog_snapshot()
+        self._start_description_prefetch(candidates, completed, price_rules)
+
+        self.upload_preparer = UploadPreparer(
+            Path(output_dir) / UPLOAD_CACHE_DIRNAME,
+            max_edge=self.config.get("ikas_upload_max_edge", 2048),
+            fmt=self.config.get("ikas_upload_format", "jpeg"),
+            quality=self.config.get("ikas_upload_quality", 88),
+            workers=self.config.get("ikas_upload_prep_workers", 0),
+            enabled=self.config.get("ikas_upload_optimize", True),
+        )
+
         total = len(candidates)
-        for idx, product in enumerate(candidates, start=1):
-            self._log(f"⏳ [{idx}/{total}] Isleniyor: {product.name}")
-            self._progress(
-                stage="product_start",
-                current=idx - 1,
-                total=total,
-                product_name=product.name,
-                message=f"{product.name} isleniyor...",
-            )
-            status = self._process_product(product, price_rules, sales_channel_payload)
-            self._progress(
-                stage="product_done",
-                current=idx,
-                total=total,
-                product_name=product.name,
-                status=status,
-                message=f"{product.name} tamamlandi ({status}).",
-            )
-            self._log(f"➡️ Sonraki urune geciliyor ({idx}/{total}).")
+        try:
+            for idx, product in enumerate(candidates, start=1):
+                if product.name in completed:
+                    status = completed[product.name]
+                    self._log(f"⏭️ [{idx}/{total}] Onceki calismada tamamlandi: {product.name} ({status})")
+                    self._progress(
+                        stage="product_done",
+                        current=idx,
+                        total=total,
+                        product_name=product.name,
+                        status=status,
+                        message=f"{product.name} onceki calismada tamamlandi ({status}).",
+                    )
+                    continue
+
+                self._log(f"⏳ [{idx}/{total}] Isleniyor: {product.name}")
+                self._progress(
+                    stage="product_start",
+                    current=idx - 1,
+                    total=total,
+                    product_name=product.name,
+                    message=f"{product.name} isleniyor...",
+                )
+                summary_before = dict(self.summary)
+                report_start = len(self.report.entries)
+                status = self._process_product(product, price_rules, sales_channel_payload)
+                self.journal.complete_product(
+                    product.name,
+                    status,
+                    {
+                        key: value - summary_before.get(key, 0)
+                        for key, value in self.summary.items()
+                        if isinstance(value, int) and value != summary_before.get(key, 0)
+                    },
+                    self.report.entries[report_start:],
+                )
+                self._progress(
+                    stage="product_done",
+                    current=idx,
+                    total=total,
+                    product_name=product.name,
+                    status=status,
+                    message=f"{product.name} tamamlandi ({status}).",
+                )
+                self._log(f"➡️ Sonraki urune geciliyor ({idx}/{total}).")
+        finally:
+            self.upload_preparer.close()
+            self._stop_description_prefetch()
+
+        try:
+            # Bu calismada degisen urunler bir sonraki okumada artimli senkronla gelsin.
+            get_catalog_store(self.config).mark_stale()
+        except Exception:
+            pass
+
+        limiter_state = self.client.limiter.snapshot()
+        upload_state = self.client.upload_limiter.snapshot()
+        self._log(
+            f"ikas eszamanlilik limiti: GraphQL {limiter_state['limit']} "
+            f"(taban gecikme {limiter_state['base_latency']} sn), "
+            f"yukleme {upload_state['limit']}"
+        )
+        self._record_circuit_states()
+        self._log_client_stats()
+        self.journal.finish()
 
         report_path = self.report.save(self.config.get("report_dir", "reports"))
         self._progress(
@@ -580,9 +984,294 @@ class IkasAutomationRunner:
             "summary": self.summary,
         }
 
+    def run_price_sync(self) -> Dict:
+        """
+        Yalniz fiyat senkronu: gorsel/aciklama/metadata yapilmaz.
+        Katalog aynasi artimli tazelenir, her urunun kurali isimden cozulur ve
+        yalniz fiyati farkli varyantlar cok urunlu buyuk updateVariantPrices
+        isteklerinde gonderilir.
+        """
+        self._memo_baseline = self.description_memo.stats()
+        self._log("Fiyat kurallari okunuyor...")
+        price_rules = PriceRuleResolver.from_excel(self.price_rules_path)
+
+        self._log("Token hazirlaniyor...")
+        self._prepare_auth()
+
+        self._log("Katalog aynasi tazeleniyor...")
+        store = get_catalog_store(self.config)
+        try:
+            stats = store.sync(lambda query, variables: self._graphql(query, variables)[0])
+            products = store.list_products()
+        except Exception as exc:
+            raise AutomationError(f"Katalog okunamadi, fiyat senkronu yapilamaz: {exc}") from exc
+        self._log(
+            f"Katalog hazir: {len(products)} urun (degisen {stats['changed']}, silinen {stats['deleted']})."
+        )
+
+        summary = {
+            "total_products": len(products),
+            "priced_products": 0,
+            "no_price_products": 0,
+            "changed_variants": 0,
+            "updated_variants": 0,
+            "failed_variants": 0,
+            "cleared_discounts": 0,
+            "requests": 0,
+        }
+        self.summary = summary
+        pending, labels = self._plan_price_updates(products, price_rules, summary)
+        summary["changed_variants"] = len(pending)
+        self._log(
+            f"{summary['priced_products']} urun icin kural bulundu, "
+            f"{len(pending)} varyantin fiyati degisecek "
+            f"({summary['cleared_discounts']} varyantta indirim kaldirilacak)."
+        )
+
+        batch_size = max(
+            1,
+            int(self.config.get("ikas_price_sync_batch_size", DEFAULT_PRICE_SYNC_BATCH_SIZE) or 1),
+        )
+        total = len(pending)
+        for start in range(0, total, batch_size):
+            chunk = pending[start:start + batch_size]
+            try:
+                failed = self._send_variant_prices(chunk)
+            except (AutomationError, CircuitOpenError) as exc:
+                failed = {idx: str(exc) for idx in range(len(chunk))}
+            summary["requests"] += 1
+            for idx, price_input in enumerate(chunk):
+                product_name, variant_name = labels[start + idx]
+                if idx in failed:
+                    summary["failed_variants"] += 1
+                    self.report.add(
+                        "FAILED", product_name, variant_name, f"Fiyat guncellenemedi: {failed[idx]}"
+                    )
+                else:
+                    summary["updated_variants"] += 1
+                    price = price_input["price"]
+                    self.report.add(
+                        "UPDATED",
+                        product_name,
+                        variant_name,
+                        "Fiyat: "
+                        + ", ".join(
+                            f"{key}={'kaldirildi' if value is None else value}"
+                            for key, value in price.items()
+                        ),
+                    )
+            done = min(start + batch_size, total)
+            self._progress(
+                stage="price_sync",
+                current=done,
+                total=total,
+                message=f"Fiyat senkronu: {done}/{total} varyant gonderildi.",
+            )
+
+        if total:
+            # Degisen urunler bir sonraki okumada artimli senkronla gelsin.
+            store.mark_stale()
+        self._log_client_stats()
+        self._log(
+            f"Fiyat senkronu bitti: {summary['updated_variants']} varyant guncellendi, "
+            f"{summary['failed_variants']} hata, {summary['requests']} istek."
+        )
+
+        report_path = self.report.save(self.config.get("report_dir", "reports"))
+        self._progress(
+            stage="price_sync_done",
+            current=total,
+            total=total,
+            message="Fiyat senkronu tamamlandi.",
+        )
+        return {"report_path": report_path, "summary": summary}
+
+    def _plan_price_updates(
+        self,
+        products: List[Dict],
+        price_rules: PriceRuleResolver,
+        summary: Dict[str, int],
+    ) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+        """Katalog urunlerinden yalniz fiyati farkli varyant girdilerini cikar."""
+        pending: List[Dict] = []
+        labels: List[Tuple[str, str]] = []
+        for product in products:
+            name = str(product.get("name") or "").strip()
+            product_id = str(product.get("id") or "")
+            if not name or not product_id:
+                continue
+            brand, model = _extract_brand_model(name)
+            price_match = price_rules.resolve_match(brand, model)
+            remote_brand = str(((product.get("brand") or {}).get("name")) or "").strip()
+            if price_match is None and remote_brand and _normalize_text(remote_brand) != _normalize_text(brand):
+                price_match = price_rules.resolve_match(remote_brand, model)
+            if price_match is None:
+                summary["no_price_products"] += 1
+                continue
+
+            summary["priced_products"] += 1
+            price_rule = price_match.rule
+            if price_match.reason != "exact":
+                self.report.add(
+                    "PRICE_MATCH",
+                    name,
+                    "",
+                    f"Fiyat kurali: {price_rule.brand} {price_match.describe()}",
+                )
+            price_payload = _price_payload(price_rule)
+
+            for variant in product.get("variants") or []:
+                variant_id = str(variant.get("id") or "")
+                if not variant_id or prices_equal(variant.get("prices"), price_payload):
+                    continue
+                if price_payload["discountPrice"] is None and _has_remote_discount(variant):
+                    # Kuralda indirim yok, ikas'ta var: null gonderilerek temizlenir.
+                    summary["cleared_discounts"] += 1
+                pending.append(
+                    {"productId": product_id, "variantId": variant_id, "price": dict(price_payload)}
+                )
+                labels.append((name, self._remote_variant_key(variant)))
+        return pending, labels
+
     def _log(self, message: str):
         self.logger(message)
 
+    def _start_description_prefetch(
+        self,
+        candidates: List[ProductCandidate],
+        completed: Dict[str, str],
+        price_rules: PriceRuleResolver,
+    ):
+        """
+        Aciklamasi uretilecek urunler icin LLM cagrilarini onceden baslat.
+        Karar katalog snapshot'ina gore verilir: urun yoksa ya da mevcut aciklama
+        kisaysa uretim gerekir. Snapshot yoksa onceden uretim yapilmaz.
+        """
+        workers = int(self.config.get("ai_description_prefetch_workers", 4) or 0)
+        if not self.ai_description_enabled or workers <= 0 or not self.product_cache.snapshot_complete:
+            return
+
+        needed = [
+            product
+            for product in candidates
+            if product.name not in completed
+            and self.journal.step_detail(product.name, "metadata") is None
+            and price_rules.resolve(product.brand, product.model)
+            and self._needs_generated_description(product)
+        ]
+        if not needed:
+            return
+
+        self._log(f"{len(needed)} urun icin AI aciklama arka planda hazirlaniyor ({workers} is parcacigi).")
+        self.description_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="description")
+        batch_size = max(1, int(self.config.get("ai_description_batch_size", 5) or 1))
+        if batch_size == 1 or not str(self.config.get("openai_api_key", "") or "").strip():
+            for product in needed:
+                self.description_futures[product.name] = self.description_pool.submit(
+                    self._generate_description, product, self._detect_product_signals(product)
+                )
+            return
+
+        # Onbellekte olmayanlar K'lik gruplar halinde tek OpenAI istegiyle uretilir.
+        pending = []
+        for product in needed:
+            signals = self._detect_product_signals(product)
+            if self._cached_description(product, signals, log=False) is None:
+                pending.append((product, signals))
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            future = self.description_pool.submit(self._generate_description_batch, chunk)
+            for product, _ in chunk:
+                self.description_futures[product.name] = future
+
+    def _needs_generated_description(self, product: ProductCandidate) -> bool:
+        existing = self.product_cache.get_by_name(product.name)
+        for variant in product.variants or []:
+            if existing:
+                break
+            existing = self.product_cache.get_by_sku(variant.sku)
+        description = str((existing or {}).get("description") or "")
+        return len(self._strip_html_tags(description)) < 60
+
+    def _take_description(self, product: ProductCandidate, signals: ProductSignals) -> str:
+        # Onceden baslatilan uretim varsa sonucunu bekle; yoksa satir ici uret.
+        future = self.description_futures.pop(product.name, None)
+        if future is not None and not future.cancelled():
+            try:
+                result = future.result()
+                if isinstance(result, dict):
+                    result = result.get(product.name)
+                if result:
+                    return result
+            except Exception as exc:
+                self._log(f"WARN: On-uretilen aciklama alinamadi ({product.name}): {exc}")
+        return self._generate_description(product, signals)
+
+    def _stop_description_prefetch(self):
+        if self.description_pool is None:
+            return
+        # Kullanilmayan (atlanan/hatali) urunlerin bekleyen cagrilari iptal edilir.
+        self.description_pool.shutdown(wait=False, cancel_futures=True)
+        self.description_pool = None
+        self.description_futures.clear()
+
+    def _open_journal(self, output_dir: str, resume: bool) -> Dict[str, str]:
+        """Calisma gunlugunu ac; devam modunda tamamlanan urunleri ve rapor/ozeti geri yukle."""
+        run_key = build_run_key(output_dir, self.price_rules_path)
+        resumed = self.journal.resume(run_key) if resume else None
+        if not resumed:
+            if resume:
+                self._log("Devam edilecek yarim calisma bulunamadi, bastan baslaniyor.")
+            self.journal.start(run_key)
+            return {}
+
+        for key, value in resumed["summary"].items():
+            if key in self.summary and key != "total_products":
+                self.summary[key] += value
+        self.report.entries.extend(resumed["report"])
+        self._log(
+            f"Yarim kalan calisma devam ediyor: {len(resumed['statuses'])} urun onceki "
+            "calismada tamamlanmis, atlanacak."
+        )
+        return resumed["statuses"]
+
+    def _record_circuit_states(self):
+        # Calisma boyunca acilan veya hata goren devreler rapora ve ozete yazilir.
+        states = {}
+        for name, state in circuit_breaker_snapshots().items():
+            if not state["calls"]:
+                continue
+            states[name] = state["state"]
+            if state["opened_count"] or state["consecutive_failures"]:
+                detail = (
+                    f"durum={state['state']}, acilma={state['opened_count']}, "
+                    f"reddedilen={state['rejected_count']}, ardisik_hata={state['consecutive_failures']}, "
+                    f"son_hata={state['last_error']}"
+                )
+                self.report.add("CIRCUIT", name, "", detail)
+                self._log(f"WARN: {name} devresi: {detail}")
+        self.summary["circuit_breakers"] = states
+
+    def _log_client_stats(self):
+        # Islem bazli ikas gecikmeleri; en cok zaman alanlar once.
+        stats = self.client.stats()
+        ranked = sorted(
+            stats.items(), key=lambda item: item[1]["count"] * item[1]["avg_ms"], reverse=True
+        )
+        for name, item in ranked[:8]:
+            self._log(
+                f"ikas {name}: {item['count']} cagri, {item['errors']} hata, "
+                f"ort {item['avg_ms']} ms, en fazla {item['max_ms']} ms"
+            )
+        memo = self.description_memo.stats()
+        hits = max(0, memo["hits"] - self._memo_baseline["hits"])
+        misses = max(0, memo["misses"] - self._memo_baseline["misses"])
+        if hits or misses:
+            self._log(
+                f"Aciklama hafizasi (bu calisma): {hits} isabet, {misses} hesap, "
+                f"{memo['entries']} kayit"
+            )
+
     def _progress(
         self,
         stage: str,
@@ -612,136 +1301,28 @@ class IkasAutomationRunner:
         read_timeout = int(self.config.get("request_timeout_read", 120))
         return connect_timeout, read_timeout
 
-    def _resolve_auth_header(self) -> str:
-        mcp_token = self.config.get("ikas_mcp_token") or os.environ.get("IKAS_MCP_TOKEN")
-        if mcp_token:
-            token = str(mcp_token).strip()
-            if token:
-                self._log("MCP token kullaniliyor.")
-                self.using_mcp_token = True
-                return token if token.lower().startswith("bearer ") else f"Bearer {token}"
-
-        self.using_mcp_token = False
-        return self._resolve_oauth_auth_header()
-
-    def _resolve_oauth_auth_header(self) -> str:
-        store_name = str(self.config.get("store_name", "")).strip()
-        client_id = str(self.config.get("client_id", "")).strip()
-        client_secret = str(self.config.get("client_secret", "")).strip()
-
-        if not (store_name and client_id and client_secret):
-            raise AutomationError(
-                "Token alinamadi. ikas_mcp_token veya OAuth bilgileri eksik."
-            )
-
-        token_url = f"https://{store_name}.myikas.com/api/admin/oauth/token"
-        response = self.session.post(
-            token_url,
-            data={
-                "grant_type": "client_credentials",
-                "client_id": client_id,
-                "client_secret": client_secret,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-            timeout=self._timeout(),
-        )
-        response.raise_for_status()
-        access_token = response.json().get("access_token")
-        if not access_token:
-            raise AutomationError("OAuth token yanitinda access_token bulunamadi.")
-        self._log("OAuth token alindi.")
-        return f"Bearer {access_token}"
-
-    def _has_oauth_credentials(self) -> bool:
-        store_name = str(self.config.get("store_name", "")).strip()
-        client_id = str(self.config.get("client_id", "")).strip()
-        client_secret = str(self.config.get("client_secret", "")).strip()
-        return bool(store_name and client_id and client_secret)
-
-    def _contains_permission_error(self, errors: List[Dict]) -> bool:
-        candidates = [
-            "public",
-            "permission",
-            "forbidden",
-            "unauthorized",
-            "not authorized",
-            "access denied",
-            "login_required",
-            "login required",
-        ]
-        for err in errors or []:
-            text = _normalize_text(err.get("message", ""))
-            if any(key in text for key in candidates):
-                return True
-        return False
-
-    def _try_switch_to_oauth(self, reason: str) -> bool:
-        if not self.using_mcp_token:
-            return False
-        if self.oauth_fallback_used:
-            return False
-        if not self._has_oauth_credentials():
-            return False
-
-        self._log(f"MCP token yazma yetkisi yetersiz ({reason}), OAuth fallback denenecek.")
-        self.auth_header = self._resolve_oauth_auth_header()
-        self.using_mcp_token = False
-        self.oauth_fallback_used = True
-        return True
+    def _prepare_auth(self):
+        if self.client.using_mcp_token:
+            self._log("MCP token kullaniliyor.")
+            return
+        try:
+            self.client.auth_header()
+        except IkasClientError as exc:
+            raise AutomationError(str(exc)) from exc
+        self._log(f"OAuth token hazir (kalan sure {int(self.client.token_provider.expires_in())} sn).")
 
     def _graphql(
         self,
         query: str,
         variables: Optional[Dict] = None,
         allow_errors: bool = False,
-        retry_on_oauth_fallback: bool = True,
     ):
-        payload = {"query": query}
-        if variables:
-            payload["variables"] = variables
-
-        response = self.session.post(
-            V2_GRAPHQL_URL,
-            headers={
-                "Authorization": self.auth_header,
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=self._timeout(),
-        )
-        if response.status_code != 200:
-            if (
-                retry_on_oauth_fallback
-                and response.status_code in (401, 403)
-                and self._try_switch_to_oauth(f"HTTP {response.status_code}")
-            ):
-                return self._graphql(
-                    query,
-                    variables,
-                    allow_errors=allow_errors,
-                    retry_on_oauth_fallback=False,
-                )
-            raise AutomationError(f"GraphQL HTTP hatasi: {response.status_code}")
-
-        body = response.json()
-        errors = body.get("errors")
-        if (
-            retry_on_oauth_fallback
-            and errors
-            and self._contains_permission_error(errors)
-            and self._try_switch_to_oauth("public/permission")
-        ):
-            return self._graphql(
-                query,
-                variables,
-                allow_errors=allow_errors,
-                retry_on_oauth_fallback=False,
-            )
-
-        if errors and not allow_errors:
-            raise AutomationError(errors[0].get("message", "GraphQL hatasi"))
-
-        return body.get("data"), errors
+        # MCP -> OAuth fallback, 401'de token yenileme, 429/5xx tekrar ve devre
+        # kesici ortak istemcide; burada yalniz hata tipi eslenir.
+        try:
+            return self.client.graphql(query, variables, allow_errors=allow_errors)
+        except IkasClientError as exc:
+            raise AutomationError(str(exc)) from exc
 
     def _list_sales_channels(self) -> List[Dict]:
         query = """
@@ -804,10 +1385,15 @@ class IkasAutomationRunner:
 
         products: List[ProductCandidate] = []
 
-        for product_dir in sorted([p for p in output_dir.iterdir() if p.is_dir()]):
+        # Nokta ile baslayan klasorler (ör. .ikas_upload turev onbellegi) urun degildir.
+        for product_dir in sorted(
+            [p for p in output_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        ):
             brand, model = _extract_brand_model(product_dir.name)
 
-            subdirs = sorted([p for p in product_dir.iterdir() if p.is_dir()])
+            subdirs = sorted(
+                [p for p in product_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+            )
             variants: List[VariantCandidate] = []
 
             if subdirs:
@@ -914,140 +1500,22 @@ class IkasAutomationRunner:
         return labels
 
     def _strip_html_tags(self, value: str) -> str:
-        text = re.sub(r"<[^>]+>", " ", str(value or ""))
-        text = html.unescape(text)
-        return re.sub(r"\s+", " ", text).strip()
+        return self.description_memo.get_or_compute("strip_tags", value, _strip_html_tags)
 
     def _normalize_description_images(self, description: str) -> str:
-        text = str(description or "").strip()
-        if not text:
-            return text
-        if "<img" not in text.lower():
-            return text
-
         # Her normalize turunda style tekrar birikmesini engellemek icin
         # img style'i sabit ve tek bir template'e zorlanir.
-        removable_keys = {
-            "width",
-            "max-width",
-            "height",
-            "display",
-            "margin",
-            "float",
-            "clear",
-            "border-radius",
-            "box-shadow",
-        }
-
-        def _replacer(match: re.Match) -> str:
-            tag = match.group(0)
-            style_match = re.search(r"""style\s*=\s*(['"])(.*?)\1""", tag, re.IGNORECASE | re.DOTALL)
-            kept_styles: List[str] = []
-            if style_match:
-                raw_style = style_match.group(2)
-                for part in raw_style.split(";"):
-                    piece = part.strip()
-                    if not piece or ":" not in piece:
-                        continue
-                    key, value = piece.split(":", 1)
-                    key_fold = _normalize_text(key).replace(" ", "")
-                    if key_fold in removable_keys:
-                        continue
-                    # Yalnizca zararsiz ek stilleri koru; temel layout stilleri
-                    # her zaman template'ten gelsin.
-                    kept_styles.append(f"{key.strip()}: {value.strip()}")
-
-            merged_style = self.description_image_style
-            if kept_styles:
-                merged_style = f"{'; '.join(kept_styles)}; {merged_style}"
-
-            if style_match:
-                start, end = style_match.span()
-                tag = f'{tag[:start]}style="{merged_style}"{tag[end:]}'
-            else:
-                closing = "/>" if tag.endswith("/>") else ">"
-                body = tag[:-2] if tag.endswith("/>") else tag[:-1]
-                tag = f'{body} style="{merged_style}"{closing}'
-
-            def _clean_class_attr(class_match: re.Match) -> str:
-                raw_classes = class_match.group(2)
-                classes = [c.strip() for c in re.split(r"\s+", raw_classes) if c.strip()]
-                classes = [c for c in classes if _normalize_text(c) != "note-float-left"]
-                if classes:
-                    return f' class="{" ".join(classes)}"'
-                return ""
-
-            tag = re.sub(
-                r"""\sclass\s*=\s*(['"])(.*?)\1""",
-                _clean_class_attr,
-                tag,
-                flags=re.IGNORECASE | re.DOTALL,
-            )
-
-            # Önceki bozuk dönüşümlerden kalan yalın note-float-left kalıntılarını temizle.
-            tag = re.sub(r"""\s*=\s*(['"])note-float-left\1""", "", tag, flags=re.IGNORECASE)
-            tag = re.sub(r"""note-float-left""", "", tag, flags=re.IGNORECASE)
-            tag = re.sub(r"""""\s*(?=/?>)""", '"', tag)
-            tag = re.sub(r"""\s{2,}""", " ", tag)
-
-            return tag
-
-        return re.sub(r"<img\b[^>]*>", _replacer, text, flags=re.IGNORECASE)
+        return normalize_description_images(description, self.description_image_style)
 
     def _normalize_description_html(self, description: str) -> str:
-        text = str(description or "").strip()
-        if not text:
-            return text
-        text = self._normalize_description_images(text)
-        text = re.sub(
-            r"(<p>\s*<img\b[^>]*>)\s*(?:<strong>\s*)?(?:<br\s*/?>\s*)+(?:</strong>\s*)?\s*(</p>)",
-            r"\1\2",
-            text,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-
-        # Truncate scriptinin etiketi bozmasını engellemek için boş satırları azalt.
-        text = re.sub(
-            r"<p>\s*(?:<strong>\s*)?(?:<br\s*/?>\s*)+(?:</strong>\s*)?</p>",
-            "",
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(r"<p>\s*</p>", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"(?:\s*<br\s*/?>\s*){3,}", "<br><br>", text, flags=re.IGNORECASE)
-
-        # Storefront tarafinda details/summary bazen bozuldugu icin bu etiketleri duzlestir.
-        text = re.sub(
-            r"<details\b[^>]*>\s*<summary\b[^>]*>.*?</summary>\s*<div\b[^>]*>(.*?)</div>\s*</details>",
-            r"\1",
-            text,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-        text = re.sub(r"</?details\b[^>]*>", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"</?summary\b[^>]*>", "", text, flags=re.IGNORECASE)
-        text = re.sub(
-            r"""<span\b[^>]*\bid\s*=\s*(['"])show-all-description\1[^>]*>.*?</span>""",
-            "",
-            text,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-        image_block_re = re.compile(
-            r"^\s*<p>\s*<img\b[^>]*>(?:\s*(?:<strong>\s*)?(?:<br\s*/?>\s*)+(?:</strong>\s*)?)*\s*</p>",
-            flags=re.IGNORECASE | re.DOTALL,
+        # Tek parcalama + zincirlenmis kurallar (bkz. html_normalizer); sonuc
+        # icerik parmak iziyle hafizada tutulur.
+        style = self.description_image_style
+        return self.description_memo.get_or_compute(
+            ("normalize_html", style),
+            description,
+            lambda text: normalize_description_html(text, style),
         )
-        image_blocks: List[str] = []
-        remaining = text
-        while True:
-            match = image_block_re.match(remaining)
-            if not match:
-                break
-            image_blocks.append(match.group(0).strip())
-            remaining = remaining[match.end() :].lstrip()
-
-        if image_blocks:
-            text = "".join(image_blocks) + (remaining if remaining else "")
-
-        return text.strip()
 
     def _description_has_fit_guide(self, description: str) -> bool:
         text = str(description or "")
@@ -1225,6 +1693,10 @@ class IkasAutomationRunner:
         if not openai_key:
             return None
 
+        prompt = self._description_facts(product, signals) + "\n" + OPENAI_DESCRIPTION_INSTRUCTIONS
+        return self._openai_chat_completion(openai_key, prompt)
+
+    def _description_facts(self, product: ProductCandidate, signals: ProductSignals) -> str:
         traits = []
         if signals.is_polarized:
             traits.append("polarize")
@@ -1232,39 +1704,73 @@ class IkasAutomationRunner:
             traits.append("çocuk")
         trait_text = ", ".join(traits) if traits else "standart"
         variant_text = ", ".join(self._list_variant_labels(product)) or "standart varyant"
-
-        prompt = (
+        return (
             f"Ürün adı: {product.name}\n"
             f"Marka: {product.brand}\n"
             f"Model: {product.model}\n"
             f"Özellik ipucu: {trait_text}\n"
-            f"Varyantlar: {variant_text}\n\n"
-            "Türkçe, e-ticaret için daha gelişmiş bir ürün açıklaması yaz. "
-            "Uzunluk 190-280 kelime olsun. "
-            "Emoji destekli bölüm yapısı kullan: 🕶️, ☀️, ✨, 🎨. "
-            "Bölümler: Giriş, Koruma/Performans, Tasarım/Konfor, Varyantlar. "
-            "Yanıt sadece HTML olsun; <p>, <strong>, <br> kullanabilirsin. "
-            "Aşırı reklam dili kullanma, teknik ve anlaşılır kal."
+            f"Varyantlar: {variant_text}\n"
         )
 
-        response = self.session.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {openai_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": self.ai_description_model,
-                "temperature": 0.5,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You generate detailed Turkish ecommerce product descriptions with structured HTML blocks.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-            },
-            timeout=self._timeout(),
+    def _generate_descriptions_batch_with_openai(
+        self, items: List[Tuple[ProductCandidate, ProductSignals]]
+    ) -> Dict[str, str]:
+        """
+        Birden cok urunun aciklamasini tek istekte uret.
+        Talimatlar bir kez gonderilir; yanit {"p1": "<html>", ...} JSON nesnesidir.
+        Gecersiz/kisa/eksik sonuclar donmez, cagiran tekli istege duser.
+        """
+        openai_key = str(self.config.get("openai_api_key", "") or "").strip()
+        if not openai_key or not items:
+            return {}
+
+        keyed = {f"p{idx}": pair for idx, pair in enumerate(items, start=1)}
+        prompt = (
+            "Aşağıdaki her ürün için ayrı bir açıklama yaz. "
+            + OPENAI_DESCRIPTION_BATCH_INSTRUCTIONS
+            + "\nYanıtı JSON nesnesi olarak ver: anahtar ürün kodu (p1, p2, ...), "
+            "değer o ürünün HTML açıklaması. Başka alan ekleme.\n\n"
+            + "\n".join(
+                f"[{key}]\n{self._description_facts(product, signals)}"
+                for key, (product, signals) in keyed.items()
+            )
+        )
+        content = self._openai_chat_completion(
+            openai_key, prompt, response_format={"type": "json_object"}
+        )
+        try:
+            parsed = json.loads(content)
+        except ValueError as exc:
+            raise AutomationError(f"OpenAI toplu aciklama yaniti JSON degil: {exc}") from exc
+        if not isinstance(parsed, dict):
+            raise AutomationError("OpenAI toplu aciklama yaniti nesne degil.")
+
+        results: Dict[str, str] = {}
+        for key, (product, _) in keyed.items():
+            text = parsed.get(key)
+            if isinstance(text, str) and len(self._strip_html_tags(text)) >= 140:
+                results[product.name] = text.strip()
+        return results
+
+    def _openai_chat_completion(self, openai_key: str, prompt: str, **options) -> str:
+        response = get_circuit_breaker("openai", self.config).call(
+            lambda: self.session.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {openai_key}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "model": self.ai_description_model,
+                    "temperature": 0.5,
+                    "messages": [
+                        {"role": "system", "content": OPENAI_DESCRIPTION_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt},
+                    ],
+                    **options,
+                },
+                timeout=self._timeout(),
+            )
         )
         if response.status_code != 200:
             raise AutomationError(f"OpenAI aciklama istegi basarisiz: {response.status_code}")
@@ -1285,34 +1791,25 @@ class IkasAutomationRunner:
         if not gemini_key:
             return None
 
-        traits = []
-        if signals.is_polarized:
-            traits.append("polarize")
-        if signals.is_child:
-            traits.append("çocuk")
-        trait_text = ", ".join(traits) if traits else "standart"
-        variant_text = ", ".join(self._list_variant_labels(product)) or "standart varyant"
-
         prompt = (
-            f"Ürün adı: {product.name}\n"
-            f"Marka: {product.brand}\n"
-            f"Model: {product.model}\n"
-            f"Özellik ipucu: {trait_text}\n"
-            f"Varyantlar: {variant_text}\n\n"
+            self._description_facts(product, signals)
+            + "\n"
             "Türkçe, 190-280 kelime arası gelişmiş bir e-ticaret açıklaması yaz. "
             "Emoji destekli bölüm yapısı kullan: 🕶️, ☀️, ✨, 🎨. "
             "Yanıt sadece HTML olsun; <p>, <strong>, <br> kullan."
         )
 
-        response = self.session.post(
-            "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent",
-            params={"key": gemini_key},
-            headers={"Content-Type": "application/json"},
-            json={
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {"temperature": 0.5},
-            },
-            timeout=self._timeout(),
+        response = get_circuit_breaker("gemini", self.config).call(
+            lambda: self.session.post(
+                f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_DESCRIPTION_MODEL}:generateContent",
+                params={"key": gemini_key},
+                headers={"Content-Type": "application/json"},
+                json={
+                    "contents": [{"parts": [{"text": prompt}]}],
+                    "generationConfig": {"temperature": 0.5},
+                },
+                timeout=self._timeout(),
+            )
         )
         if response.status_code != 200:
             raise AutomationError(f"Gemini aciklama istegi basarisiz: {response.status_code}")
@@ -1331,25 +1828,173 @@ class IkasAutomationRunner:
         if not self.ai_description_enabled:
             return self._build_fallback_description(product, signals)
 
+        # Ayni girdiyle daha once uretilen aciklama varsa hicbir saglayici cagrilmaz.
+        cached = self._cached_description(product, signals)
+        if cached:
+            return cached
+
+        providers = [
+            ("OpenAI", self.ai_description_model, self._generate_description_with_openai),
+            ("Gemini", GEMINI_DESCRIPTION_MODEL, self._generate_description_with_gemini),
+        ]
+        if self._hedge_enabled():
+            winner = self._generate_description_hedged(product, signals, providers)
+            if winner:
+                label, model_id, ai_text = winner
+                self.description_cache.put(
+                    self._description_cache_key(product, signals, label, model_id), label, ai_text
+                )
+                return ensure_permanent_description_images(ai_text)
+            return self._build_fallback_description(product, signals)
+
+        for label, model_id, generate in providers:
+            try:
+                ai_text = self._timed_generate(label, generate, product, signals)
+                if ai_text:
+                    self._log(f"AI aciklama kullanildi ({label}): {product.name}")
+                    if len(self._strip_html_tags(ai_text)) >= 140:
+                        self.description_cache.put(
+                            self._description_cache_key(product, signals, label, model_id),
+                            label,
+                            ai_text,
+                        )
+                        return ensure_permanent_description_images(ai_text)
+            except Exception as exc:
+                self._log(f"WARN: {label} aciklama hatasi ({product.name}): {exc}")
+
+        return self._build_fallback_description(product, signals)
+
+    def _hedge_enabled(self) -> bool:
+        return bool(
+            self.config.get("ai_description_hedge", False)
+            and str(self.config.get("openai_api_key", "") or "").strip()
+            and str(self.config.get("gemini_api_key", "") or "").strip()
+        )
+
+    def _timed_generate(
+        self,
+        label: str,
+        generate: Callable[[ProductCandidate, ProductSignals], Optional[str]],
+        product: ProductCandidate,
+        signals: ProductSignals,
+    ) -> Optional[str]:
+        # Yanit veren cagrilarin suresi saglayici bazinda tutulur (hedge gecikmesi icin).
+        started = time.monotonic()
+        text = generate(product, signals)
+        if text:
+            get_latency_tracker(f"ai_{label.lower()}").record(time.monotonic() - started)
+        return text
+
+    def _generate_description_hedged(
+        self,
+        product: ProductCandidate,
+        signals: ProductSignals,
+        providers: List[Tuple[str, str, Callable]],
+    ) -> Optional[Tuple[str, str, str]]:
+        """
+        Birincil saglayiciya gonder; p90 gecikmesi icinde gecerli yanit gelmezse
+        ikinciyi de baslat ve ilk gecerli yaniti al. Kaybeden istek arka planda
+        biter, sonucu yok sayilir.
+
+        Returns:
+            (saglayici, model, metin) veya None
+        """
+        primary, secondary = providers[0], providers[1]
+        delay = get_latency_tracker(f"ai_{primary[0].lower()}").percentile(
+            0.9, default=float(self.config.get("ai_description_hedge_delay_seconds", 8) or 0)
+        )
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+        futures = {
+            pool.submit(self._timed_generate, primary[0], primary[2], product, signals): primary
+        }
+        hedged = False
         try:
-            ai_text = self._generate_description_with_openai(product, signals)
-            if ai_text:
-                self._log(f"AI aciklama kullanildi (OpenAI): {product.name}")
-                if len(self._strip_html_tags(ai_text)) >= 140:
-                    return ensure_permanent_description_images(ai_text)
-        except Exception as exc:
-            self._log(f"WARN: OpenAI aciklama hatasi ({product.name}): {exc}")
+            done, _ = wait(futures, timeout=delay)
+            while True:
+                for future in done:
+                    label, model_id, _ = futures.pop(future)
+                    try:
+                        ai_text = future.result()
+                    except Exception as exc:
+                        self._log(f"WARN: {label} aciklama hatasi ({product.name}): {exc}")
+                        continue
+                    if ai_text and len(self._strip_html_tags(ai_text)) >= 140:
+                        suffix = ", hedge" if hedged else ""
+                        self._log(f"AI aciklama kullanildi ({label}{suffix}): {product.name}")
+                        return label, model_id, ai_text
+                if not hedged:
+                    hedged = True
+                    if futures:
+                        self._log(
+                            f"{primary[0]} {delay:.1f} sn icinde yanit vermedi, "
+                            f"{secondary[0]} de deneniyor: {product.name}"
+                        )
+                    futures[
+                        pool.submit(self._timed_generate, secondary[0], secondary[2], product, signals)
+                    ] = secondary
+                if not futures:
+                    return None
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _cached_description(
+        self, product: ProductCandidate, signals: ProductSignals, log: bool = True
+    ) -> Optional[str]:
+        for label, model_id in (
+            ("OpenAI", self.ai_description_model),
+            ("Gemini", GEMINI_DESCRIPTION_MODEL),
+        ):
+            cached = self.description_cache.get(
+                self._description_cache_key(product, signals, label, model_id)
+            )
+            if cached:
+                if log:
+                    self._log(f"AI aciklama onbellekten ({label}): {product.name}")
+                return ensure_permanent_description_images(cached)
+        return None
 
+    def _generate_description_batch(
+        self, items: List[Tuple[ProductCandidate, ProductSignals]]
+    ) -> Dict[str, str]:
+        """Toplu OpenAI istegi; sonucu gelmeyen urunler tekli akisla uretilir."""
         try:
-            ai_text = self._generate_description_with_gemini(product, signals)
-            if ai_text:
-                self._log(f"AI aciklama kullanildi (Gemini): {product.name}")
-                if len(self._strip_html_tags(ai_text)) >= 140:
-                    return ensure_permanent_description_images(ai_text)
+            texts = self._generate_descriptions_batch_with_openai(items)
         except Exception as exc:
-            self._log(f"WARN: Gemini aciklama hatasi ({product.name}): {exc}")
+            self._log(f"WARN: OpenAI toplu aciklama hatasi ({len(items)} urun): {exc}")
+            texts = {}
 
-        return self._build_fallback_description(product, signals)
+        results: Dict[str, str] = {}
+        for product, signals in items:
+            text = texts.get(product.name)
+            if not text:
+                results[product.name] = self._generate_description(product, signals)
+                continue
+            self._log(f"AI aciklama kullanildi (OpenAI toplu): {product.name}")
+            self.description_cache.put(
+                self._description_cache_key(product, signals, "OpenAI", self.ai_description_model),
+                "OpenAI",
+                text,
+            )
+            results[product.name] = ensure_permanent_description_images(text)
+        return results
+
+    def _description_cache_key(
+        self, product: ProductCandidate, signals: ProductSignals, provider: str, model_id: str
+    ) -> str:
+        return description_cache_key(
+            {
+                "name": _normalize_text(product.name),
+                "brand": _normalize_text(product.brand),
+                "model": _normalize_text(product.model),
+                "is_child": signals.is_child,
+                "is_polarized": signals.is_polarized,
+                "variants": self._list_variant_labels(product),
+                "provider": provider,
+                "model_id": model_id,
+                "prompt_version": DESCRIPTION_PROMPT_VERSION,
+            }
+        )
 
     def _apply_product_metadata(
         self,
@@ -1357,11 +2002,12 @@ class IkasAutomationRunner:
         product: ProductCandidate,
         sales_channels: List[Dict],
     ) -> Dict:
-        # createProduct yanitinda metadata alanlari gelmedigi icin tam urun kaydini tekrar cek
-        latest = self._find_product_by_name(product.name) or remote_product
-        product_id = str((latest or {}).get("id") or "")
+        product_id = str((remote_product or {}).get("id") or "")
         if not product_id:
             raise AutomationError(f"Urun id bulunamadi: {product.name}")
+        # Durum onbellekten gelir; yalnizca eksik alan varsa tekrar cekilir.
+        self._ensure_product_state([product_id])
+        latest = self.product_cache.get(product_id) or remote_product
 
         signals = self._detect_product_signals(product)
         desired_categories = self._build_category_names(signals)
@@ -1393,7 +2039,7 @@ class IkasAutomationRunner:
         description = (
             existing_description
             if len(clean_description) >= 60
-            else self._generate_description(product, signals)
+            else self._take_description(product, signals)
         )
         description = ensure_permanent_description_images(
             description,
@@ -1444,13 +2090,25 @@ class IkasAutomationRunner:
           }
         }
         """
-        data, errors = self._graphql(mutation, {"input": update_input}, allow_errors=True)
-        if errors:
-            raise AutomationError(errors[0].get("message", "Urun metadata guncellenemedi."))
-
-        updated = (data or {}).get("updateProduct")
-        if not updated:
-            raise AutomationError("Urun metadata guncelleme yaniti bos dondu.")
+        # Yalnizca uzak kayittan farkli alanlar gonderilir; fark yoksa mutation atlanir.
+        changes = diff_product_update(latest, update_input)
+        if changes:
+            data, errors = self._graphql(mutation, {"input": changes}, allow_errors=True)
+            if errors:
+                raise AutomationError(errors[0].get("message", "Urun metadata guncellenemedi."))
+
+            updated = (data or {}).get("updateProduct")
+            if not updated:
+                raise AutomationError("Urun metadata guncelleme yaniti bos dondu.")
+            written = {
+                key: changes[key]
+                for key in ("salesChannels", "translations", "metaData")
+                if key in changes
+            }
+            self.product_cache.merge(dict(written, id=product_id))
+            updated = self.product_cache.merge(updated) or updated
+        else:
+            updated = latest
 
         existing_attributes = (latest or {}).get("attributes") or []
         self._apply_fitguide_special_field(
@@ -1460,8 +2118,19 @@ class IkasAutomationRunner:
             existing_variants=(latest or {}).get("variants") or [],
         )
 
+        if not changes:
+            self._log(f"SKIP METADATA: {product.name} -> metadata zaten guncel.")
+            self.report.add(
+                "SKIPPED_UNCHANGED",
+                product.name,
+                "",
+                "Marka/kategori/etiket/google kategori/aciklama zaten guncel, mutation gonderilmedi.",
+            )
+            return updated
+
         self._log(
             f"METADATA UPDATED: {product.name} | "
+            f"fields={', '.join(k for k in changes if k != 'id')} | "
             f"brand={brand_name or '-'} | "
             f"categories={', '.join(merged_categories)} | "
             f"tags={', '.join(merged_tags)} | "
@@ -1475,66 +2144,76 @@ class IkasAutomationRunner:
         )
         return updated
 
-    def _find_product_by_name(self, product_name: str) -> Optional[Dict]:
-        query = """
-        query FindProduct($search: String!) {
-          listProduct(search: $search, pagination: {page: 1, limit: 50}) {
-            data {
-              id
-              name
-              description
-              googleTaxonomyId
-              brand {
-                id
-                name
-              }
-              categories {
-                id
-                name
-              }
-              tags {
-                id
-                name
-              }
-              attributes {
-                productAttributeId
-                value
-              }
-              variants {
-                id
-                sku
-                attributes {
-                  productAttributeId
-                  value
-                }
-                images {
-                  imageId
-                  isMain
-                  order
-                }
-                variantValues {
-                  variantTypeName
-                  variantValueName
-                }
-                prices {
-                  sellPrice
-                  discountPrice
-                  buyPrice
-                }
-              }
-            }
-          }
-        }
-        """
+    def _load_catalog_snapshot(self):
+        self._log("Katalog onbellegi yukleniyor...")
+        try:
+            store = get_catalog_store(self.config)
+            # Yazan calisma: ayna taze gorunse bile artimli senkron zorunlu. snapshot_complete
+            # iken indekste olmayan urun "yok" sayilip olusturulur; son senkrondan sonra
+            # baska yerde acilan urun eski aynayla cift olusturulurdu.
+            stats = store.sync(lambda query, variables: self._graphql(query, variables)[0])
+            products = store.list_products()
+        except Exception as exc:
+            self._log(f"WARN: Katalog onbellegi yuklenemedi, urun aramasi API uzerinden yapilacak: {exc}")
+            return
+
+        self.product_cache.load_snapshot(products)
+        self._log(
+            f"Katalog onbellegi hazir: {len(products)} urun "
+            f"(degisen {stats['changed']}, silinen {stats['deleted']})."
+        )
+
+    def _find_product_by_name(
+        self, product_name: str, skus: Optional[List[str]] = None
+    ) -> Optional[Dict]:
+        cached = self.product_cache.get_by_name(product_name)
+        if cached:
+            return cached
+        for sku in skus or []:
+            cached = self.product_cache.get_by_sku(sku)
+            if cached:
+                return cached
+        if self.product_cache.snapshot_complete:
+            # Tum katalog yuklu; indekste yoksa urun ikas'ta yok demektir.
+            return None
+
+        # Eslesen urun zaten tam durumla gelir; ikinci bir id sorgusu gerekmez.
+        query = list_product_query(
+            "FindProduct",
+            "full",
+            "$search: String!",
+            "search: $search, pagination: {page: 1, limit: 50}",
+        )
         data, _ = self._graphql(query, {"search": product_name})
         product_list = ((data or {}).get("listProduct") or {}).get("data") or []
 
         target_name = _normalize_text(product_name)
         for product in product_list:
             if _normalize_text(product.get("name", "")) == target_name:
-                return product
+                return self.product_cache.merge(product)
         return None
 
+    def _ensure_product_state(self, product_ids: List[str], profile: str = "full"):
+        """Onbellekte profilin alanlari eksik olan urunleri tek sorguyla yenile."""
+        missing = [
+            str(pid)
+            for pid in dict.fromkeys(product_ids or [])
+            if pid and not self.product_cache.is_complete(pid, profile)
+        ]
+        if not missing:
+            return
+
+        # Eksik kalan urunler tek bir coklu-id sorgusuyla yenilenir.
+        query = list_product_query(
+            "RefreshProducts",
+            profile,
+            "$ids: [String!]!, $limit: Int!",
+            "id: {in: $ids}, pagination: {page: 1, limit: $limit}",
+        )
+        data, _ = self._graphql(query, {"ids": missing, "limit": max(len(missing), 1)})
+        for item in ((data or {}).get("listProduct") or {}).get("data") or []:
+            self.product_cache.merge(item)
+
     def _remote_variant_key(self, variant: Dict) -> str:
         variant_values = variant.get("variantValues") or []
         if not variant_values:
@@ -1557,11 +2236,7 @@ class IkasAutomationRunner:
         return variant_map
 
     def _build_variant_input(self, candidate: VariantCandidate, price: PriceRule) -> Dict:
-        price_input = {"sellPrice": float(price.sell_price)}
-        if price.discount_price is not None:
-            price_input["discountPrice"] = float(price.discount_price)
-        if price.buy_price is not None:
-            price_input["buyPrice"] = float(price.buy_price)
+        price_input = _price_payload(price)
 
         variant_input = {
             "sku": candidate.sku,
@@ -1586,7 +2261,8 @@ class IkasAutomationRunner:
         sales_channels: List[Dict],
     ) -> str:
         try:
-            price_rule = price_rules.resolve(product.brand, product.model)
+            price_match = price_rules.resolve_match(product.brand, product.model)
+            price_rule = price_match.rule if price_match else None
             if not price_rule:
                 self.summary["skipped_products"] += 1
                 self.report.add(
@@ -1597,33 +2273,66 @@ class IkasAutomationRunner:
                 )
                 self._log(f"SKIP: {product.name} -> fiyat kurali yok.")
                 return "SKIPPED_NO_PRICE"
+            if price_match.reason != "exact":
+                detail = f"Fiyat kurali: {price_rule.brand} {price_match.describe()}"
+                self.report.add("PRICE_MATCH", product.name, "", detail)
+                self._log(f"{product.name} -> {detail}")
+
+            # Yarim kalan calismada bulunan/olusturulan urun gunlukten gelir; tekrar aranmaz.
+            existing = None
+            created_before = False
+            resolved = self.journal.step_detail(product.name, "resolved")
+            if resolved:
+                previous_result, _, resolved_id = resolved.partition(":")
+                self._ensure_product_state([resolved_id])
+                existing = self.product_cache.get(resolved_id)
+                created_before = existing is not None and previous_result == "CREATED"
+            if existing is None:
+                existing = self._find_product_by_name(
+                    product.name, skus=[v.sku for v in product.variants]
+                )
 
-            existing = self._find_product_by_name(product.name)
             if existing:
                 remote_product = self._update_existing_product(
                     existing, product, price_rule, sales_channels
                 )
-                remote_product = self._apply_product_metadata(
-                    remote_product, product, sales_channels
-                )
-                self.summary["updated_products"] += 1
-                self.report.add("UPDATED", product.name, "", "Urun upsert edildi.")
-                result = "UPDATED"
+                result = "CREATED" if created_before else "UPDATED"
             else:
                 remote_product = self._create_new_product(product, price_rule, sales_channels)
+                result = "CREATED"
+            product_id = remote_product["id"]
+            self.journal.mark_step(product.name, "resolved", detail=f"{result}:{product_id}")
+
+            if self.journal.step_detail(product.name, "metadata") is None:
                 remote_product = self._apply_product_metadata(
                     remote_product, product, sales_channels
                 )
+                self.journal.mark_step(product.name, "metadata")
+            else:
+                remote_product = self.product_cache.get(product_id) or remote_product
+
+            if result == "CREATED":
                 self.summary["created_products"] += 1
                 self.report.add("CREATED", product.name, "", "Yeni urun olusturuldu.")
-                result = "CREATED"
+            else:
+                self.summary["updated_products"] += 1
+                self.report.add("UPDATED", product.name, "", "Urun upsert edildi.")
 
-            remote_variant_map = self._build_remote_variant_map(remote_product)
-            self._update_variant_prices(remote_product["id"], product, price_rule, remote_variant_map)
+            if self.journal.step_detail(product.name, "prices") is None:
+                remote_variant_map = self._build_remote_variant_map(remote_product)
+                failures_before = self.summary["variant_failures"]
+                self._update_variant_prices(product_id, product, price_rule, remote_variant_map)
+                if self.summary["variant_failures"] == failures_before:
+                    self.journal.mark_step(product.name, "prices")
 
-            refreshed = self._find_product_by_name(product.name) or remote_product
+            # Yukleme yalniz varyant anahtari ve gorselleri okur; eksikse "images" profili yeter.
+            self._ensure_product_state([product_id], profile="images")
+            refreshed = self.product_cache.get(product_id) or remote_product
             refreshed_variant_map = self._build_remote_variant_map(refreshed)
             self._upload_variant_images(product, refreshed_variant_map)
+            for remote_variant in refreshed_variant_map.values():
+                # Yeni gorsel id'leri bilinmiyor; sonraki okuma gerekirse yeniden cekilsin.
+                self.product_cache.drop_variant_field(product_id, remote_variant.get("id"), "images")
             self._log(f"✅ Islem tamamlandi: {product.name}")
             return result
 
@@ -1678,6 +2387,29 @@ class IkasAutomationRunner:
         if not created:
             raise AutomationError("createProduct bos dondu.")
 
+        # Yeni urunde metadata/ozel alan bos; fiyatlar gonderdigimiz degerler.
+        inputs_by_sku = {v["sku"]: v for v in variant_inputs}
+        state = dict(created)
+        state.setdefault("description", "")
+        state.setdefault("googleTaxonomyId", None)
+        state.setdefault("brand", None)
+        state.setdefault("categories", [])
+        state.setdefault("tags", [])
+        state.setdefault("salesChannels", list(sales_channels))
+        state.setdefault("translations", [])
+        state.setdefault("metaData", None)
+        state.setdefault("attributes", [])
+        state_variants = []
+        for variant in created.get("variants") or []:
+            variant_state = dict(variant)
+            variant_state.setdefault("attributes", [])
+            sent = inputs_by_sku.get(variant_state.get("sku"))
+            if sent is not None:
+                variant_state.setdefault("prices", sent["prices"])
+            state_variants.append(variant_state)
+        state["variants"] = state_variants
+        created = self.product_cache.merge(state) or created
+
         for variant in product.variants:
             self.report.add(
                 "CREATED",
@@ -1697,32 +2429,26 @@ class IkasAutomationRunner:
         sales_channels: List[Dict],
     ) -> Dict:
         product_id = existing["id"]
-
-        update_mutation = """
-        mutation UpdateProduct($input: UpdateProductInput!) {
-          updateProduct(input: $input) {
-            id
-            name
-          }
-        }
-        """
-        update_input = {
-            "id": product_id,
-            "salesChannels": sales_channels,
-        }
-        _, update_errors = self._graphql(update_mutation, {"input": update_input}, allow_errors=True)
-        if update_errors:
-            self._log(
-                f"WARN: {product.name} satis kanali guncellemesi basarisiz: "
-                f"{update_errors[0].get('message', 'bilinmeyen hata')}"
-            )
-
         remote_variant_map = self._build_remote_variant_map(existing)
-        added_any = False
 
-        add_variant_mutation = """
-        mutation AddVariant($input: AddVariantToProductInput!) {
-          addVariantToProduct(input: $input) {
+        # Satis kanali guncellemesi ve eksik varyant eklemeleri bagimsiz oldugu
+        # icin alias'li tek bir mutation isteginde gonderilir.
+        operations = []
+        if not sales_channels_equal(existing.get("salesChannels"), sales_channels):
+            operations.append(
+                BatchOperation(
+                    field="updateProduct",
+                    args={
+                        "input": (
+                            "UpdateProductInput!",
+                            {"id": product_id, "salesChannels": sales_channels},
+                        )
+                    },
+                    selection="id name",
+                    key="salesChannels",
+                )
+            )
+        add_variant_selection = """
             id
             name
             variants {
@@ -1738,39 +2464,65 @@ class IkasAutomationRunner:
                 variantValueName
               }
             }
-          }
-        }
         """
-
         for candidate in product.variants:
             key = _normalize_variant(candidate.variant_value)
             if key in remote_variant_map:
                 continue
-
             variant_input = self._build_variant_input(candidate, price_rule)
-            add_input = {
-                "productId": product_id,
-                "variant": variant_input,
-            }
-            data, add_errors = self._graphql(
-                add_variant_mutation,
-                {"input": add_input},
-                allow_errors=True,
+            operations.append(
+                BatchOperation(
+                    field="addVariantToProduct",
+                    args={
+                        "input": (
+                            "AddVariantToProductInput!",
+                            {"productId": product_id, "variant": variant_input},
+                        )
+                    },
+                    selection=add_variant_selection,
+                    key=(candidate, variant_input),
+                )
             )
-            if add_errors:
+
+        if not operations:
+            return self.product_cache.get(product_id) or existing
+
+        results = execute_batched(
+            lambda query, variables: self._graphql(query, variables, allow_errors=True),
+            operations,
+            batch_size=self.graphql_batch_size,
+        )
+
+        for result in results:
+            if result.operation.key == "salesChannels":
+                if result.ok:
+                    self.product_cache.merge({"id": product_id, "salesChannels": sales_channels})
+                else:
+                    self._log(
+                        f"WARN: {product.name} satis kanali guncellemesi basarisiz: "
+                        f"{result.error_message or 'bilinmeyen hata'}"
+                    )
+                continue
+
+            candidate, variant_input = result.operation.key
+            if not result.ok:
                 self.summary["variant_failures"] += 1
                 self.report.add(
                     "FAILED",
                     product.name,
                     candidate.variant_value,
-                    f"Varyant eklenemedi: {add_errors[0].get('message', 'hata')}",
+                    f"Varyant eklenemedi: {result.error_message or 'hata'}",
                 )
                 continue
 
-            added_any = True
-            latest_product = (data or {}).get("addVariantToProduct")
+            latest_product = result.data
             if latest_product:
-                remote_variant_map = self._build_remote_variant_map(latest_product)
+                latest_product = self.product_cache.merge(latest_product) or latest_product
+                for variant in latest_product.get("variants") or []:
+                    if variant.get("sku") == candidate.sku and "attributes" not in variant:
+                        # Yeni eklenen varyantin ozel alani yok; fiyat gonderdigimiz deger.
+                        variant["attributes"] = []
+                        variant["prices"] = variant_input["prices"]
             self.report.add(
                 "CREATED",
                 product.name,
@@ -1778,12 +2530,7 @@ class IkasAutomationRunner:
                 f"Eksik varyant eklendi (SKU={candidate.sku})",
             )
 
-        if added_any:
-            refreshed = self._find_product_by_name(product.name)
-            if refreshed:
-                return refreshed
-
-        return existing
+        return self.product_cache.get(product_id) or existing
 
     def _update_variant_prices(
         self,
@@ -1799,11 +2546,10 @@ class IkasAutomationRunner:
             if not remote_variant:
                 continue
 
-            price_payload = {"sellPrice": float(price_rule.sell_price)}
-            if price_rule.discount_price is not None:
-                price_payload["discountPrice"] = float(price_rule.discount_price)
-            if price_rule.buy_price is not None:
-                price_payload["buyPrice"] = float(price_rule.buy_price)
+            price_payload = _price_payload(price_rule)
+
+            if prices_equal(remote_variant.get("prices"), price_payload):
+                continue
 
             variant_price_inputs.append(
                 {
@@ -1816,19 +2562,37 @@ class IkasAutomationRunner:
         if not variant_price_inputs:
             return
 
-        mutation = """
-        mutation UpdateVariantPrices($input: UpdateVariantPricesInput!) {
-          updateVariantPrices(input: $input) {
-            errors {
-              errorCode
-              inputArrayIndex
-            }
-          }
-        }
+        failed = self._send_variant_prices(variant_price_inputs)
+        for idx, price_input in enumerate(variant_price_inputs):
+            if idx not in failed:
+                self.product_cache.update_variant(
+                    product_id, price_input["variantId"], prices=[dict(price_input["price"])]
+                )
+        for idx, error_code in failed.items():
+            failed_input = variant_price_inputs[idx]
+            variant_id = failed_input.get("variantId")
+            variant_name = variant_id
+            for key, variant in remote_variant_map.items():
+                if variant.get("id") == variant_id:
+                    variant_name = key
+                    break
+            self.summary["variant_failures"] += 1
+            self.report.add(
+                "FAILED",
+                product.name,
+                str(variant_name),
+                f"Fiyat guncellenemedi: {error_code}",
+            )
+
+    def _send_variant_prices(self, variant_price_inputs: List[Dict]) -> Dict[int, str]:
         """
+        Tek updateVariantPrices istegi (girdiler farkli urunlere ait olabilir).
 
+        Returns:
+            Basarisiz girdi sirasi -> errorCode
+        """
         data, errors = self._graphql(
-            mutation,
+            UPDATE_VARIANT_PRICES_MUTATION,
             {"input": {"variantPriceInputs": variant_price_inputs}},
             allow_errors=True,
         )
@@ -1836,30 +2600,22 @@ class IkasAutomationRunner:
             raise AutomationError(errors[0].get("message", "updateVariantPrices hatasi"))
 
         response = (data or {}).get("updateVariantPrices") or {}
-        err_list = response.get("errors") or []
-        for err in err_list:
+        failed: Dict[int, str] = {}
+        for err in response.get("errors") or []:
             idx = int(err.get("inputArrayIndex", 0))
             if 0 <= idx < len(variant_price_inputs):
-                failed_input = variant_price_inputs[idx]
-                variant_id = failed_input.get("variantId")
-                variant_name = variant_id
-                for key, variant in remote_variant_map.items():
-                    if variant.get("id") == variant_id:
-                        variant_name = key
-                        break
-                self.summary["variant_failures"] += 1
-                self.report.add(
-                    "FAILED",
-                    product.name,
-                    str(variant_name),
-                    f"Fiyat guncellenemedi: {err.get('errorCode', 'UNKNOWN')}",
-                )
+                failed[idx] = str(err.get("errorCode", "UNKNOWN"))
+        return failed
 
     def _upload_variant_images(
         self,
         product: ProductCandidate,
         remote_variant_map: Dict[str, Dict],
     ):
+        # Her varyant icin (order, path) listesi; yuklemeler urun genelinde havuzla paralel.
+        # Manifesto (varyant, sira, icerik ozeti, imageId) ile yalniz eksik/degisen dosyalar yuklenir.
+        variant_jobs: List[Tuple[VariantCandidate, str, List[Tuple[int, Path]]]] = []
+        job_hashes: Dict[Tuple[str, int], str] = {}
         for candidate in product.variants:
             variant_key = _normalize_variant(candidate.variant_value)
             remote_variant = remote_variant_map.get(variant_key)
@@ -1873,40 +2629,116 @@ class IkasAutomationRunner:
                 )
                 continue
 
-            existing_images = remote_variant.get("images") or []
-            if existing_images:
-                self.summary["skipped_has_images"] += 1
+            if not candidate.image_paths:
+                self.summary["variant_failures"] += 1
                 self.report.add(
-                    "SKIPPED_HAS_IMAGES",
+                    "FAILED",
                     product.name,
                     candidate.variant_value,
-                    "Varyantta zaten gorsel var, yukleme atlandi.",
+                    f"Gorsel bulunamadi ({candidate.folder_path}).",
                 )
                 continue
 
-            if not candidate.image_paths:
+            previous_upload = self.journal.step_detail(
+                product.name, "images", candidate.variant_value
+            )
+            if previous_upload is not None:
+                # Yarim kalan calismada bu varyantin gorselleri tamamlanmisti.
+                self.summary["uploaded_images"] += int(previous_upload or 0)
+                self.report.add(
+                    "UPDATED",
+                    product.name,
+                    candidate.variant_value,
+                    f"Gorseller onceki calismada tamamlandi ({previous_upload or 0} yuklendi).",
+                )
+                continue
+
+            variant_id = remote_variant["id"]
+            try:
+                todo, skipped, superseded = self.upload_manifest.plan(
+                    variant_id,
+                    list(enumerate(candidate.image_paths)),
+                    remote_variant.get("images"),
+                )
+            except OSError as exc:
                 self.summary["variant_failures"] += 1
                 self.report.add(
                     "FAILED",
                     product.name,
                     candidate.variant_value,
-                    f"Gorsel bulunamadi ({candidate.folder_path}).",
+                    f"Gorsel okunamadi: {exc}",
                 )
                 continue
 
+            for order, image_path, old_image_id in superseded:
+                # ikas'ta gorsel degistirme/silme yok; yuklemek eski gorselin yanina kopya ekler.
+                self.report.add(
+                    "SKIPPED_IMAGE_CHANGED",
+                    product.name,
+                    candidate.variant_value,
+                    f"{image_path.name} (sira {order}) degisti ancak eski gorsel ({old_image_id or '-'}) "
+                    "ikas'ta duruyor; panelden silinince sonraki calismada yuklenecek.",
+                )
+
+            if not todo:
+                self.journal.mark_step(product.name, "images", candidate.variant_value, "0")
+                self.summary["skipped_has_images"] += 1
+                self.report.add(
+                    "SKIPPED_HAS_IMAGES",
+                    product.name,
+                    candidate.variant_value,
+                    f"Varyantin {skipped} gorseli zaten yuklu, yukleme atlandi.",
+                )
+                continue
+            if skipped:
+                self._log(
+                    f"{product.name} / {candidate.variant_value}: {skipped} gorsel zaten yuklu, "
+                    f"{len(todo)} gorsel yuklenecek."
+                )
+
+            for order, _image_path, digest in todo:
+                job_hashes[(variant_id, order)] = digest
+            variant_jobs.append(
+                (candidate, variant_id, [(order, image_path) for order, image_path, _ in todo])
+            )
+
+        if not variant_jobs:
+            return
+
+        # Manifesto kaynak dosya ozetiyle calisir; ikas'a kucultulmus turev gonderilir.
+        upload_paths: Dict[Path, Path] = {}
+        if self.upload_preparer is not None:
+            upload_paths = self.upload_preparer.prepare(
+                [image_path for _, _, jobs in variant_jobs for _, image_path in jobs]
+            )
+        upload_jobs = [
+            (candidate, variant_id, [(order, upload_paths.get(p, p)) for order, p in jobs])
+            for candidate, variant_id, jobs in variant_jobs
+        ]
+
+        results = self._run_upload_jobs(upload_jobs)
+
+        for (candidate, variant_id, jobs), variant_results in zip(variant_jobs, results):
             uploaded = 0
-            for order, image_path in enumerate(candidate.image_paths):
-                ok, error_text = self._upload_image(remote_variant["id"], image_path, order)
+            for (order, image_path), (ok, detail) in zip(jobs, variant_results):
                 if ok:
                     uploaded += 1
                     self.summary["uploaded_images"] += 1
+                    # Basarili yuklemede detail ikas imageId (varsa), hatada mesajdir.
+                    self.upload_manifest.record(
+                        variant_id,
+                        order,
+                        job_hashes[(variant_id, order)],
+                        detail or None,
+                        image_path.name,
+                    )
                 else:
                     self.summary["variant_failures"] += 1
                     self.report.add(
                         "FAILED",
                         product.name,
                         candidate.variant_value,
-                        f"{image_path.name} yuklenemedi: {error_text}",
+                        f"{image_path.name} yuklenemedi: {detail}",
                     )
 
             if uploaded > 0:
@@ -1916,33 +2748,59 @@ class IkasAutomationRunner:
                     candidate.variant_value,
                     f"{uploaded} gorsel yuklendi.",
                 )
+            if uploaded == len(jobs):
+                self.journal.mark_step(product.name, "images", candidate.variant_value, str(uploaded))
 
-    def _upload_image(self, variant_id: str, image_path: Path, order: int) -> Tuple[bool, str]:
-        try:
-            with open(image_path, "rb") as f:
-                image_b64 = base64.b64encode(f.read()).decode("utf-8")
-        except Exception as exc:
-            return False, str(exc)
+    def _run_upload_jobs(
+        self,
+        variant_jobs: List[Tuple[VariantCandidate, str, List[Tuple[int, Path]]]],
+    ) -> List[List[Tuple[bool, str]]]:
+        results: List[List[Tuple[bool, str]]] = [
+            [(False, "")] * len(jobs) for _, _, jobs in variant_jobs
+        ]
+        total_jobs = sum(len(jobs) for _, _, jobs in variant_jobs)
+        workers = min(self.upload_workers, total_jobs)
+
+        if workers <= 1:
+            for v_idx, (_, variant_id, jobs) in enumerate(variant_jobs):
+                for j_idx, (order, image_path) in enumerate(jobs):
+                    results[v_idx][j_idx] = self._upload_image_job(variant_id, image_path, order)
+            return results
+
+        # Ana gorsel (order=0) once gider; ikas ilk gelen gorseli ana gorsel
+        # sayabilecegi icin varyantin diger gorselleri ana gorsel bitince kuyruga girer.
+        # Havuzdaki diger isciler bir sonraki dosyayi okuyup base64'e cevirirken
+        # mevcut POST devam eder.
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ikas-upload") as pool:
+            pending = {}
+            for v_idx, (_, variant_id, jobs) in enumerate(variant_jobs):
+                order, image_path = jobs[0]
+                future = pool.submit(self._upload_image_job, variant_id, image_path, order)
+                pending[future] = (v_idx, 0)
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    v_idx, j_idx = pending.pop(future)
+                    results[v_idx][j_idx] = future.result()
+                    if j_idx != 0:
+                        continue
+                    _, variant_id, jobs = variant_jobs[v_idx]
+                    for next_idx in range(1, len(jobs)):
+                        order, image_path = jobs[next_idx]
+                        next_future = pool.submit(
+                            self._upload_image_job, variant_id, image_path, order
+                        )
+                        pending[next_future] = (v_idx, next_idx)
 
-        payload = {
-            "productImage": {
-                "variantIds": [str(variant_id)],
-                "base64": image_b64,
-                "order": order,
-                "isMain": order == 0,
-            }
-        }
+        return results
 
-        response = self.session.post(
-            IMAGE_UPLOAD_URL,
-            headers={
-                "Authorization": self.auth_header,
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=self._timeout(),
-        )
-        if response.status_code == 200:
-            return True, ""
+    def _upload_image_job(self, variant_id: str, image_path: Path, order: int) -> Tuple[bool, str]:
+        try:
+            return self._upload_image(variant_id, image_path, order)
+        except (requests.RequestException, CircuitOpenError, OSError) as exc:
+            return False, str(exc)
 
-        return False, response.text[:300]
+    def _upload_image(self, variant_id: str, image_path: Path, order: int) -> Tuple[bool, str]:
+        # Govde mmap + parca base64 ile akitilir; basarida detay ikas imageId'dir.
+        return self.client.upload_image(variant_id, image_path, order)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - ikas GraphQL Toplu İşlem Katmanı
+Birbirinden bağımsız K işlemi alias'lı tek bir GraphQL isteğinde gönderir,
+işlem bazlı hataları çağırana geri eşler.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BATCH_SIZE = 10
+
+# Toplu mutation belgesi data=null döndüğünde hatası olmayan işlemlerin sonucu.
+UNKNOWN_OUTCOME_CODE = "BATCH_OUTCOME_UNKNOWN"
+
+# (query, variables) -> (data, errors); GraphQL hatalarında raise etmemeli.
+RawGraphQL = Callable[[str, Dict], Tuple[Optional[Dict], Optional[List[Dict]]]]
+
+
+@dataclass
+class BatchOperation:
+    """
+    Tek bir GraphQL alan çağrısı.
+
+    Args:
+        field: Mutation/query alanı (ör. "updateProduct")
+        args: arg adı -> (GraphQL tipi, değer), ör. {"input": ("UpdateProductInput!", {...})}
+        selection: Dönüş alanları (skaler dönüşlerde boş)
+        key: Çağıranın sonucu eşlemek için kullandığı serbest anahtar
+    """
+    field: str
+    args: Dict[str, Tuple[str, Any]]
+    selection: str = ""
+    key: Any = None
+
+
+@dataclass
+class BatchResult:
+    operation: BatchOperation
+    data: Any = None
+    errors: List[Dict] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def outcome_unknown(self) -> bool:
+        """İşlem uygulanmış olabilir; tekrar gönderilmemeli, ikas'tan doğrulanmalı."""
+        return any(
+            ((err or {}).get("extensions") or {}).get("code") == UNKNOWN_OUTCOME_CODE
+            for err in self.errors
+        )
+
+    @property
+    def error_message(self) -> str:
+        if not self.errors:
+            return ""
+        return str(self.errors[0].get("message") or "GraphQL hatası")
+
+
+def is_query_document(query: str) -> bool:
+    """Doküman salt okuma (query) mı? Mutation'lar idempotent sayılmaz."""
+    lines = [line.strip() for line in str(query or "").splitlines()]
+    text = " ".join(line for line in lines if line and not line.startswith("#"))
+    return text.startswith("{") or text.startswith("query")
+
+
+def build_batch_document(
+    operations: List[BatchOperation], operation_type: str = "mutation"
+) -> Tuple[str, Dict, List[str]]:
+    """Alias'lı tek bir GraphQL dokümanı ve değişkenlerini üret."""
+    var_defs: List[str] = []
+    fields: List[str] = []
+    variables: Dict[str, Any] = {}
+    aliases: List[str] = []
+
+    for index, op in enumerate(operations):
+        alias = f"op{index}"
+        aliases.append(alias)
+        call_args = []
+        for arg_name, (arg_type, value) in op.args.items():
+            var_name = f"{alias}_{arg_name}"
+            var_defs.append(f"${var_name}: {arg_type}")
+            call_args.append(f"{arg_name}: ${var_name}")
+            variables[var_name] = value
+        args_text = f"({', '.join(call_args)})" if call_args else ""
+        selection = " ".join(op.selection.split())
+        selection = f" {{ {selection} }}" if selection else ""
+        fields.append(f"  {alias}: {op.field}{args_text}{selection}")
+
+    header = f"{operation_type} Batch"
+    if var_defs:
+        header += f"({', '.join(var_defs)})"
+    query = header + " {\n" + "\n".join(fields) + "\n}"
+    return query, variables, aliases
+
+
+def map_batch_response(
+    operations: List[BatchOperation],
+    aliases: List[str],
+    data: Optional[Dict],
+    errors: Optional[List[Dict]],
+    operation_type: str = "mutation",
+) -> Tuple[List[BatchResult], bool]:
+    """
+    Alias'lı yanıtı işlem sonuçlarına eşle.
+
+    Returns:
+        (sonuçlar, tekil_tekrar_gerekli). İkincisi True ise doküman hiç
+        çalışmamıştır (path'siz doğrulama hatası) ya da query'dir; kendi hatası
+        olmayan işlemler tek tek yeniden gönderilmelidir.
+    """
+    results = [BatchResult(operation=op) for op in operations]
+    data = data or {}
+    unmapped: List[Dict] = []
+    alias_index = {alias: i for i, alias in enumerate(aliases)}
+    for err in errors or []:
+        path = err.get("path") or []
+        idx = alias_index.get(path[0]) if path else None
+        if idx is None:
+            unmapped.append(err)
+        else:
+            results[idx].errors.append(err)
+
+    for alias, result in zip(aliases, results):
+        result.data = data.get(alias)
+
+    if (unmapped or errors) and not data and len(operations) > 1:
+        # Path'siz hatalar doğrulama hatasıdır: doküman hiç çalışmamıştır.
+        # Query'ler yan etkisiz olduğundan her durumda tekrar denenebilir.
+        if operation_type == "query" or all(not err.get("path") for err in errors or []):
+            return results, True
+        # Mutation alanları sırayla çalışır; non-null yayılımıyla data=null
+        # gelmesi diğer alanların çalışmadığı anlamına gelmez. Tekrar gönderim
+        # (ör. addVariantToProduct) çift kayıt üretebilir; sonuç bilinmiyor denir.
+        for result in results:
+            if not result.errors:
+                result.errors = [
+                    {
+                        "message": "Toplu işlem sonucu bilinmiyor (data=null); işlem uygulanmış olabilir, tekrar gönderilmedi.",
+                        "extensions": {"code": UNKNOWN_OUTCOME_CODE},
+                    }
+                ]
+        return results, False
+
+    if unmapped:
+        for result in results:
+            if result.data is None and not result.errors:
+                result.errors = list(unmapped)
+
+    return results, False
+
+
+def _run_single_batch(
+    graphql: RawGraphQL,
+    operations: List[BatchOperation],
+    operation_type: str,
+) -> List[BatchResult]:
+    query, variables, aliases = build_batch_document(operations, operation_type)
+
+    try:
+        data, errors = graphql(query, variables)
+    except Exception as exc:
+        return [BatchResult(operation=op, errors=[{"message": str(exc)}]) for op in operations]
+
+    results, retry_individually = map_batch_response(
+        operations, aliases, data, errors, operation_type
+    )
+    if retry_individually:
+        return [
+            result if result.errors else _run_single_batch(graphql, [result.operation], operation_type)[0]
+            for result in results
+        ]
+    return results
+
+
+def execute_batched(
+    graphql: RawGraphQL,
+    operations: List[BatchOperation],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    operation_type: str = "mutation",
+    on_batch_done: Optional[Callable[[int, int], None]] = None,
+) -> List[BatchResult]:
+    """
+    İşlemleri batch_size'lık gruplar halinde gönder.
+
+    Returns:
+        operations ile aynı sırada BatchResult listesi.
+    """
+    batch_size = max(1, int(batch_size or 1))
+    results: List[BatchResult] = []
+    total = len(operations)
+    for start in range(0, total, batch_size):
+        chunk = operations[start:start + batch_size]
+        results.extend(_run_single_batch(graphql, chunk, operation_type))
+        if on_batch_done:
+            on_batch_done(min(start + batch_size, total), total)
+    return results
+
+
+# Test için
+if __name__ == "__main__":
+    ops = [
+        BatchOperation(
+            field="updateProduct",
+            args={"input": ("UpdateProductInput!", {"id": f"p{i}"})},
+            selection="id name",
+            key=i,
+        )
+        for i in range(3)
+    ]
+    doc, variables, aliases = build_batch_document(ops)
+    print(doc)
+    print(variables)
+
+    # op1 non-null yayılımıyla belgeyi düşürdü: op0/op2 tekrar gönderilmez.
+    results, retry = map_batch_response(
+        ops, aliases, None, [{"message": "boom", "path": ["op1", "id"]}]
+    )
+    print(retry, [(r.operation.key, r.outcome_unknown, r.error_message) for r in results])
+    # Path'siz doğrulama hatası: belge hiç çalışmadı, tekil tekrar güvenli.
+    print(map_batch_response(ops, aliases, None, [{"message": "invalid"}])[1])
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - Ortak ikas İstemcisi
+GUI ve tam otomasyonun tüm GraphQL ve görsel yükleme çağrıları buradan geçer:
+ayarlı keep-alive bağlantı havuzu, kimlik doğrulama (MCP token / OAuth fallback),
+hata eşleme, AIMD limit + devre kesici ve işlem bazlı gecikme ölçümü.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import requests
+
+from ikas_auth import TokenError, get_token_provider
+from ikas_batch import is_query_document
+from image_upload import Base64JsonUploadBody
+from net import CircuitOpenError, create_session, get_adaptive_limiter, get_circuit_breaker, request_with_limiter
+
+V2_GRAPHQL_URL = "https://api.myikas.com/api/v2/admin/graphql"
+IMAGE_UPLOAD_URL = "https://api.myikas.com/api/v1/admin/product/upload/image"
+
+PERMISSION_ERROR_MARKERS = (
+    "public",
+    "permission",
+    "forbidden",
+    "unauthorized",
+    "not authorized",
+    "access denied",
+    "login_required",
+    "login required",
+)
+
+_OPERATION_NAME = re.compile(r"^\s*(query|mutation)\s+(\w+)")
+
+
+class IkasClientError(Exception):
+    """ikas API çağrısı başarısız."""
+    pass
+
+
+def contains_permission_error(errors: Optional[List[Dict]]) -> bool:
+    for err in errors or []:
+        text = str((err or {}).get("message", "")).lower()
+        if any(marker in text for marker in PERMISSION_ERROR_MARKERS):
+            return True
+    return False
+
+
+def operation_name(query: str) -> str:
+    match = _OPERATION_NAME.match(str(query or ""))
+    return match.group(2) if match else "anonymous"
+
+
+class IkasClient:
+    """
+    Süreç genelinde paylaşılan ikas istemcisi.
+
+    Kimlik: ikas_mcp_token (veya IKAS_MCP_TOKEN) varsa o kullanılır; yetki
+    hatasında bir kez OAuth'a geçilir. OAuth modunda başlık her çağrıda token
+    sağlayıcıdan alınır, böylece uzun çalışmalarda süresi dolan token yenilenir.
+    """
+
+    def __init__(self, config: dict = None, logger: Optional[Callable[[str], None]] = None):
+        self.config = config or {}
+        self.logger = logger or (lambda msg: None)
+        pool_size = max(
+            int(self.config.get("ikas_max_concurrency", 8) or 1),
+            int(self.config.get("ikas_upload_workers", 3) or 1),
+        )
+        self.session = create_session(self.config, pool_maxsize=pool_size)
+        # Aile başına ayrı limiter; yükleme süresi dosya boyutuna bağlı olduğundan
+        # yükleme limiti gecikmeye değil yalnızca 429/5xx'e tepki verir.
+        self.limiter = get_adaptive_limiter("ikas_graphql", self.config)
+        self.upload_limiter = get_adaptive_limiter("ikas_upload", self.config, latency_factor=None)
+        self.max_retries = max(0, int(self.config.get("ikas_rate_limit_retries", 4) or 0))
+        self.token_provider = get_token_provider(self.config)
+
+        mcp_token = str(
+            self.config.get("ikas_mcp_token") or os.environ.get("IKAS_MCP_TOKEN") or ""
+        ).strip()
+        if mcp_token and not mcp_token.lower().startswith("bearer "):
+            mcp_token = f"Bearer {mcp_token}"
+        self.mcp_auth_header = mcp_token
+        self.using_mcp_token = bool(mcp_token)
+        self.oauth_fallback_used = False
+
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    # --- kimlik -------------------------------------------------------------
+
+    def has_oauth_credentials(self) -> bool:
+        return self.token_provider.has_credentials()
+
+    def auth_header(self, force_refresh: bool = False) -> str:
+        if self.using_mcp_token:
+            return self.mcp_auth_header
+        if not self.has_oauth_credentials():
+            raise IkasClientError("Token alinamadi. ikas_mcp_token veya OAuth bilgileri eksik.")
+        try:
+            return self.token_provider.get_auth_header(force_refresh=force_refresh)
+        except TokenError as exc:
+            raise IkasClientError(str(exc)) from exc
+
+    def _switch_to_oauth(self, reason: str) -> bool:
+        if not self.using_mcp_token or self.oauth_fallback_used or not self.has_oauth_credentials():
+            return False
+        self.logger(f"MCP token yazma yetkisi yetersiz ({reason}), OAuth fallback denenecek.")
+        self.using_mcp_token = False
+        self.oauth_fallback_used = True
+        return True
+
+    # --- taşıma -------------------------------------------------------------
+
+    def timeout(self) -> Tuple[int, int]:
+        return (
+            int(self.config.get("request_timeout_connect", 10)),
+            int(self.config.get("request_timeout_read", 120)),
+        )
+
+    def _request(
+        self,
+        operation: str,
+        send: Callable[[], requests.Response],
+        idempotent: bool,
+        family: str,
+    ) -> requests.Response:
+        started = time.monotonic()
+        failed = True
+        try:
+            response = request_with_limiter(
+                self.upload_limiter if family == "ikas_upload" else self.limiter,
+                send,
+                idempotent=idempotent,
+                max_retries=self.max_retries,
+                breaker=get_circuit_breaker(family, self.config),
+            )
+            failed = response.status_code != 200
+            return response
+        finally:
+            self._record(operation, time.monotonic() - started, failed)
+
+    def _record(self, operation: str, elapsed: float, failed: bool):
+        with self._stats_lock:
+            item = self._stats.setdefault(
+                operation, {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            item["count"] += 1
+            item["errors"] += int(failed)
+            item["total_seconds"] += elapsed
+            item["max_seconds"] = max(item["max_seconds"], elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """İşlem adı -> {count, errors, avg_ms, max_ms}."""
+        with self._stats_lock:
+            return {
+                name: {
+                    "count": int(item["count"]),
+                    "errors": int(item["errors"]),
+                    "avg_ms": round(item["total_seconds"] * 1000 / max(1, item["count"]), 1),
+                    "max_ms": round(item["max_seconds"] * 1000, 1),
+                }
+                for name, item in self._stats.items()
+            }
+
+    # --- GraphQL ------------------------------------------------------------
+
+    def graphql_raw(
+        self,
+        query: str,
+        variables: Optional[Dict] = None,
+        auth_header: Optional[str] = None,
+        _retry_auth: bool = True,
+    ) -> Tuple[Dict, List[Dict]]:
+        """
+        GraphQL çağrısı; HTTP hatasında IkasClientError, GraphQL hatalarını döndürür.
+
+        Args:
+            auth_header: Verilirse bu başlık kullanılır ve kimlik fallback'i yapılmaz.
+        """
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        header = auth_header or self.auth_header()
+
+        try:
+            response = self._request(
+                operation_name(query),
+                lambda: self.session.post(
+                    V2_GRAPHQL_URL,
+                    headers={"Authorization": header, "Content-Type": "application/json"},
+                    json=payload,
+                    timeout=self.timeout(),
+                ),
+                idempotent=is_query_document(query),
+                family="ikas_graphql",
+            )
+        except (requests.RequestException, CircuitOpenError) as exc:
+            raise IkasClientError(f"GraphQL istegi basarisiz: {exc}") from exc
+
+        if response.status_code != 200:
+            if response.status_code == 401 and not self.using_mcp_token:
+                # Önbellekteki token iptal edilmiş olabilir; bir sonraki çağrı yenisini alır.
+                self.token_provider.invalidate()
+            if _retry_auth and auth_header is None:
+                if response.status_code in (401, 403) and self._switch_to_oauth(
+                    f"HTTP {response.status_code}"
+                ):
+                    return self.graphql_raw(query, variables, _retry_auth=False)
+                if response.status_code == 401 and self.has_oauth_credentials():
+                    return self.graphql_raw(query, variables, _retry_auth=False)
+            raise IkasClientError(f"GraphQL HTTP hatasi: {response.status_code}")
+
+        body = response.json()
+        errors = body.get("errors") or []
+        if (
+            _retry_auth
+            and auth_header is None
+            and errors
+            and contains_permission_error(errors)
+            and self._switch_to_oauth("public/permission")
+        ):
+            return self.graphql_raw(query, variables, _retry_auth=False)
+        return body.get("data") or {}, errors
+
+    def graphql(
+        self,
+        query: str,
+        variables: Optional[Dict] = None,
+        allow_errors: bool = False,
+        auth_header: Optional[str] = None,
+    ) -> Tuple[Dict, List[Dict]]:
+        data, errors = self.graphql_raw(query, variables, auth_header=auth_header)
+        if errors and not allow_errors:
+            raise IkasClientError(errors[0].get("message", "GraphQL hatasi"))
+        return data, errors
+
+    # --- görsel yükleme -----------------------------------------------------
+
+    def upload_image(
+        self,
+        variant_id: str,
+        image_path: Union[str, Path],
+        order: int,
+        is_main: Optional[bool] = None,
+        auth_header: Optional[str] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Görseli varyanta yükle.
+
+        Returns:
+            (True, ikas imageId veya "") ya da (False, hata metni)
+        """
+        try:
+            body = Base64JsonUploadBody(
+                image_path,
+                variant_ids=[str(variant_id)],
+                order=order,
+                is_main=(order == 0) if is_main is None else is_main,
+            )
+            header = auth_header or self.auth_header()
+            response = self._request(
+                "uploadImage",
+                lambda: self.session.post(
+                    IMAGE_UPLOAD_URL,
+                    headers={"Authorization": header, "Content-Type": "application/json"},
+                    data=body,
+                    timeout=self.timeout(),
+                ),
+                idempotent=False,
+                family="ikas_upload",
+            )
+        except (requests.RequestException, CircuitOpenError, IkasClientError, OSError) as exc:
+            return False, str(exc)
+
+        if response.status_code == 200:
+            return True, _uploaded_image_id(response)
+        if response.status_code == 401 and not self.using_mcp_token:
+            self.token_provider.invalidate()
+        return False, response.text[:300]
+
+
+def _uploaded_image_id(response) -> str:
+    try:
+        body = response.json()
+    except ValueError:
+        return ""
+    if not isinstance(body, dict):
+        return ""
+    image = body.get("productImage") if isinstance(body.get("productImage"), dict) else body
+    return str(image.get("imageId") or image.get("id") or "")
+
+
+_clients: Dict[Tuple[str, ...], IkasClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_ikas_client(config: dict = None, logger: Optional[Callable[[str], None]] = None) -> IkasClient:
+    """
+    Kimlik bilgileri başına paylaşılan istemci. Ayarlar değişirse yeni istemci oluşur.
+    logger verilirse istemcinin log hedefi güncellenir.
+    """
+    config = config or {}
+    key = tuple(
+        hashlib.sha256(str(config.get(name) or "").strip().encode("utf-8")).hexdigest()
+        for name in ("store_name", "client_id", "client_secret", "ikas_mcp_token")
+    )
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = IkasClient(config, logger=logger)
+            _clients[key] = client
+        elif logger is not None:
+            client.logger = logger
+        return client
+
+
+# Test için
+if __name__ == "__main__":
+    print(operation_name("\n  mutation UpdateVariantPrices($input: X!) { a }"))
+    print(contains_permission_error([{"message": "Access denied for public token"}]))
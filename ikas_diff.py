@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - ikas Durum Farkı
+İstenen durum ile ikas'taki mevcut durumu alan bazında karşılaştırır;
+yalnızca gerçekten değişiklik yapacak mutation girdilerini üretir.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+PRICE_FIELDS = ("sellPrice", "discountPrice", "buyPrice")
+PRICE_TOLERANCE = 0.005
+# İstenen değer boşsa karşılaştırılmayan alanlar (gönderilmez, uzaktaki korunur).
+KEEP_REMOTE_WHEN_EMPTY = ("buyPrice",)
+
+
+def _name_key(value) -> str:
+    text = re.sub(r"\s+", " ", str(value or "").strip().lower())
+    return (
+        text.replace("ı", "i")
+        .replace("ş", "s")
+        .replace("ğ", "g")
+        .replace("ç", "c")
+        .replace("ö", "o")
+        .replace("ü", "u")
+    )
+
+
+def _name_set(items: Optional[List[Dict]]) -> set:
+    return {_name_key((item or {}).get("name")) for item in (items or []) if (item or {}).get("name")}
+
+
+def _text(value) -> str:
+    return str(value or "").strip()
+
+
+def sales_channels_equal(remote: Optional[List[Dict]], desired: List[Dict]) -> bool:
+    """Kanal id + durum kümeleri birebir aynı mı?"""
+    if remote is None:
+        return False
+    remote_set = {(str((c or {}).get("id") or ""), _text((c or {}).get("status")).upper()) for c in remote}
+    desired_set = {(str(c.get("id") or ""), _text(c.get("status")).upper()) for c in desired or []}
+    return remote_set == desired_set
+
+
+def _price_value(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def prices_equal(remote_prices: Optional[List[Dict]], desired: Dict) -> bool:
+    """
+    Uzak ilk fiyat kaydı istenen fiyatla aynı mı?
+
+    PRICE_FIELDS'in tamamı karşılaştırılır; desired'da olmayan alan None sayılır.
+    Böylece uzakta dolu, kuralda boş olan alan (ör. kaldırılmış indirim) fark olur.
+    KEEP_REMOTE_WHEN_EMPTY alanları (alış fiyatı) boş istenirse atlanır.
+    """
+    if not remote_prices:
+        return False
+    current = remote_prices[0] or {}
+    for key in PRICE_FIELDS:
+        remote_value = _price_value(current.get(key))
+        desired_value = _price_value(desired.get(key))
+        if desired_value is None and key in KEEP_REMOTE_WHEN_EMPTY:
+            continue
+        if remote_value is None or desired_value is None:
+            if remote_value is not desired_value:
+                return False
+            continue
+        if abs(remote_value - desired_value) > PRICE_TOLERANCE:
+            return False
+    return True
+
+
+def _translations_equal(remote: Optional[List[Dict]], desired: List[Dict]) -> bool:
+    if remote is None:
+        return False
+    remote_by_locale = {_text((t or {}).get("locale")).lower(): t or {} for t in remote}
+    for item in desired or []:
+        current = remote_by_locale.get(_text(item.get("locale")).lower())
+        if current is None:
+            return False
+        for key, value in item.items():
+            if key == "locale":
+                continue
+            if _text(current.get(key)) != _text(value):
+                return False
+    return True
+
+
+def _meta_equal(remote: Optional[Dict], desired: Dict) -> bool:
+    if remote is None:
+        return False
+    return all(_text(remote.get(key)) == _text(value) for key, value in (desired or {}).items())
+
+
+def diff_product_update(remote: Dict, update_input: Dict) -> Dict:
+    """
+    updateProduct girdisinden yalnızca değişen alanları içeren girdi üret.
+
+    Args:
+        remote: Mevcut ürün kaydı (listProduct şekli)
+        update_input: Yazılmak istenen tam UpdateProductInput
+
+    Returns:
+        Değişiklik yoksa {}; aksi halde "id" + değişen alanlar.
+    """
+    remote = remote or {}
+    changes: Dict = {}
+
+    for key, desired in update_input.items():
+        if key == "id":
+            continue
+        if key not in remote:
+            changes[key] = desired
+            continue
+        current = remote.get(key)
+
+        if key == "salesChannels":
+            same = sales_channels_equal(current, desired)
+        elif key == "brand":
+            same = _name_key((current or {}).get("name")) == _name_key((desired or {}).get("name"))
+        elif key in ("categories", "tags"):
+            same = _name_set(current) == _name_set(desired)
+        elif key == "translations":
+            same = _translations_equal(current, desired)
+        elif key == "metaData":
+            same = _meta_equal(current, desired)
+        else:
+            same = _text(current) == _text(desired)
+
+        if not same:
+            changes[key] = desired
+
+    # Açıklama değişirse çeviri kaydı da aynı içerikle gönderilir.
+    if "description" in changes and "translations" in update_input:
+        changes["translations"] = update_input["translations"]
+
+    if not changes:
+        return {}
+    changes["id"] = update_input.get("id")
+    return changes
+
+
+# Test için
+if __name__ == "__main__":
+    remote = {
+        "id": "p1",
+        "description": "<p>x</p>",
+        "brand": {"name": "Rayban"},
+        "categories": [{"name": "Güneş Gözlüğü"}],
+        "tags": [{"name": "Rayban"}],
+        "salesChannels": [{"id": "s1", "status": "VISIBLE"}],
+    }
+    desired = {
+        "id": "p1",
+        "description": "<p>x</p>",
+        "brand": {"name": "rayban"},
+        "categories": [{"name": "Gunes Gozlugu"}],
+        "tags": [{"name": "Rayban"}],
+        "salesChannels": [{"id": "s1", "status": "VISIBLE"}],
+    }
+    print("Fark (boş olmalı):", diff_product_update(remote, desired))
+    print("Fiyat aynı:", prices_equal([{"sellPrice": 100.0}], {"sellPrice": 100}))
+    print(
+        "İndirim kalktı:",
+        prices_equal([{"sellPrice": 100.0, "discountPrice": 80.0}], {"sellPrice": 100}),
+    )
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - ikas Görsel Yükleme Gövdesi
+Görseli belleğe tamamen almadan, mmap + parça parça base64 ile JSON gövdesi akıtır.
+Yükleme başına tepe bellek görsel boyutundan bağımsız kalır.
+"""
+
+import base64
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Iterator, List, Union
+
+# 3'ün katı olmalı; aksi halde parça sınırlarında base64 dolgu ('=') oluşur.
+DEFAULT_CHUNK_BYTES = 3 * 64 * 1024
+
+
+class Base64JsonUploadBody:
+    """
+    ikas REST görsel yükleme isteği için akış gövdesi.
+
+    requests bu nesneyi iterable olarak gönderir; __len__ sayesinde
+    Content-Length başlığı önceden hesaplanır (chunked encoding gerekmez).
+    """
+
+    def __init__(
+        self,
+        image_path: Union[str, Path],
+        variant_ids: List[str],
+        order: int,
+        is_main: bool,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    ):
+        self.image_path = str(image_path)
+        # Dosya erişim hatası istek başlamadan yüzeye çıksın.
+        self.file_size = os.path.getsize(self.image_path)
+        self.chunk_bytes = max(3, chunk_bytes - (chunk_bytes % 3))
+
+        head = {
+            "variantIds": [str(v) for v in variant_ids],
+            "order": int(order),
+            "isMain": bool(is_main),
+        }
+        head_json = json.dumps(head, ensure_ascii=False)
+        # '{"variantIds": [...], "order": 0, "isMain": true' + ', "base64": "'
+        self._prefix = ('{"productImage": ' + head_json[:-1] + ', "base64": "').encode("utf-8")
+        self._suffix = b'"}}'
+
+    def encoded_length(self) -> int:
+        return 4 * ((self.file_size + 2) // 3)
+
+    def __len__(self) -> int:
+        return len(self._prefix) + self.encoded_length() + len(self._suffix)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._prefix
+        if self.file_size:
+            with open(self.image_path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for start in range(0, self.file_size, self.chunk_bytes):
+                        yield base64.b64encode(mapped[start:start + self.chunk_bytes])
+        yield self._suffix
+
+
+# Test için
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".bin") as tmp:
+        tmp.write(os.urandom(1_000_003))
+    body = Base64JsonUploadBody(tmp.name, ["v1"], 0, True)
+    raw = b"".join(body)
+    parsed = json.loads(raw)
+    with open(tmp.name, "rb") as f:
+        same = base64.b64decode(parsed["productImage"]["base64"]) == f.read()
+    print(f"Uzunluk doğru: {len(raw) == len(body)} | İçerik doğru: {same}")
+    os.unlink(tmp.name)
@@ -4,9 +4,13 @@ Kepekçi Optik - Ağ İstekleri Yönetimi
 Session yönetimi, retry, exponential backoff, timeout handling.
 """
 
+import random
+import threading
 import time
 import requests
-from typing import Optional, Dict, Any, Tuple
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional, Dict, Any, Tuple
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -28,10 +32,11 @@ class TimeoutError(NetworkError):
     pass
 
 
-def create_session(config: dict = None) -> requests.Session:
+def create_session(config: dict = None, pool_maxsize: int = 10) -> requests.Session:
     """
     Yeniden kullanılabilir Session oluştur.
     Aynı host'a ardışık çağrılarda daha iyi performans sağlar.
+    pool_maxsize eşzamanlı istek sayısından küçükse bağlantılar atılıp yeniden açılır.
     """
     session = requests.Session()
     
@@ -42,7 +47,7 @@ def create_session(config: dict = None) -> requests.Session:
         status_forcelist=[500, 502, 503, 504]
     )
     
-    adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=10)
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=max(1, int(pool_maxsize)))
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     
@@ -169,6 +174,424 @@ def post_json(session: requests.Session, url: str, config: dict = None,
     return request_json(session, "POST", url, config, retry_enabled, **kwargs)
 
 
+# ---------------------------------------------------------------------------
+# Uyarlanabilir eşzamanlılık (AIMD) + 429/Retry-After
+# ---------------------------------------------------------------------------
+
+THROTTLE_STATUSES = (429, 503)
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After başlığını saniyeye çevir (saniye veya HTTP tarihi)."""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    Aynı API'ye giden eşzamanlı istek sayısını AIMD ile ayarlar.
+
+    - Limit doluyken gelen, başarılı ve gecikmesi taban gecikmenin latency_factor
+      katını aşmayan her yanıtta limit 1/limit kadar artar (her tam pencerede +1).
+    - 429/5xx veya gecikme sıçramasında limit yarıya iner (pencere başına bir kez).
+      latency_factor None ise gecikme sinyali kullanılmaz (süresi boyuta bağlı
+      olan yüklemeler gibi); limit yalnızca 429/5xx ve bağlantı hatasıyla düşer.
+    - Retry-After gelirse yeni istekler o süre boyunca bekletilir.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        initial_limit: int = 2,
+        latency_factor: Optional[float] = 2.5,
+    ):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.latency_factor = float(latency_factor) if latency_factor else None
+        self.in_flight = 0
+        self.base_latency: Optional[float] = None
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait_for = self._paused_until - time.time()
+                if wait_for > 0:
+                    self._cond.wait(wait_for)
+                    continue
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._cond.wait(1.0)
+
+    def try_acquire(self) -> Optional[float]:
+        """
+        Bloklamadan slot almayı dene (asyncio çağıranlar için).
+
+        Returns:
+            Slot alındıysa None, alınamadıysa tekrar denemeden önce beklenecek süre (sn).
+        """
+        with self._cond:
+            wait_for = self._paused_until - time.time()
+            if wait_for > 0:
+                return wait_for
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return None
+            return 0.05
+
+    def release(self, latency: Optional[float] = None, status: Optional[int] = None):
+        """İsteği bitir; latency None ise (bağlantı hatası) aşırı yük sayılır."""
+        with self._cond:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight = max(0, self.in_flight - 1)
+            overloaded = latency is None or (status is not None and status in RETRYABLE_STATUSES)
+            if not overloaded and latency is not None:
+                if self.base_latency is None:
+                    self.base_latency = latency
+                else:
+                    # Taban gecikme yavaş yükselir, hızlı düşer.
+                    self.base_latency = min(latency, self.base_latency * 0.95 + latency * 0.05)
+                if self.latency_factor and latency > self.base_latency * self.latency_factor:
+                    overloaded = True
+            if overloaded:
+                self._decrease()
+            elif saturated:
+                # Limit yalnızca dolu kullanılırken büyür; boşta şişmesin.
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / max(1.0, self.limit))
+            self._cond.notify_all()
+
+    def _decrease(self):
+        now = time.time()
+        # Aynı anda uçuştaki isteklerin hepsi hata alırsa limit sıfıra çökmesin.
+        if now - self._last_decrease < (self.base_latency or 0.1):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit / 2.0)
+
+    def pause(self, seconds: float):
+        """Retry-After: belirtilen süre boyunca yeni istek başlatma."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.time() + max(0.0, seconds))
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "base_latency": round(self.base_latency or 0.0, 3),
+            }
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Tam jitter'lı üstel bekleme: [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def request_with_limiter(
+    limiter: AdaptiveLimiter,
+    send: Callable[[], requests.Response],
+    idempotent: bool = True,
+    max_retries: int = 4,
+    sleep: Callable[[float], None] = time.sleep,
+    breaker: Optional["CircuitBreaker"] = None,
+) -> requests.Response:
+    """
+    Limiter slotu içinde istek gönder; 429/5xx ve ağ hatalarında jitter'lı tekrar dene.
+
+    Args:
+        limiter: Paylaşılan AdaptiveLimiter
+        send: İsteği gönderen fonksiyon (Response döndürür)
+        idempotent: False ise yalnızca 429 (istek işlenmedi) tekrar denenir
+        max_retries: En fazla tekrar sayısı
+        breaker: Varsa her denemeden önce kontrol edilir, sonuç kaydedilir
+
+    Returns:
+        Son yanıt (tekrarlar tükendiyse başarısız yanıt da döner)
+
+    Raises:
+        requests.RequestException: Ağ hatası tekrarlarla çözülmediyse
+        CircuitOpenError: Devre açıksa (istek gönderilmez)
+    """
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = send()
+        except requests.RequestException as exc:
+            limiter.release(None)
+            if breaker is not None:
+                breaker.record_failure(type(exc).__name__)
+            if not idempotent or attempt >= max_retries:
+                raise
+            sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+        except BaseException:
+            # Beklenmeyen hata/KeyboardInterrupt: slot ve yarı açık devrenin
+            # deneme hakkı süreç boyunca kaybolmasın.
+            limiter.release(None)
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+
+        status = response.status_code
+        limiter.release(time.monotonic() - started, status)
+        if breaker is not None:
+            breaker.record_response(status)
+        if status not in RETRYABLE_STATUSES:
+            return response
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None and status in THROTTLE_STATUSES:
+            limiter.pause(retry_after)
+
+        can_retry = status == 429 or idempotent
+        if not can_retry or attempt >= max_retries:
+            return response
+        delay = backoff_delay(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        sleep(delay)
+        attempt += 1
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+# Aile başına başlangıç limiti ayarı ve varsayılanı.
+_INITIAL_LIMIT_KEYS = {
+    "ikas_graphql": ("ikas_graphql_initial_concurrency", 2),
+    "ikas_upload": ("ikas_upload_workers", 2),
+    "ikas_oauth": ("ikas_oauth_initial_concurrency", 1),
+}
+
+
+def get_adaptive_limiter(
+    name: str, config: dict = None, latency_factor: Optional[float] = 2.5
+) -> AdaptiveLimiter:
+    """
+    İşlem ailesi (ör. "ikas_graphql", "ikas_upload", "ikas_oauth") için süreç
+    genelinde paylaşılan limiter. Aileler ayrı tutulur; yavaş yüklemelerin
+    gecikmesi GraphQL'in taban gecikmesini ve limitini bozmaz.
+    latency_factor ve başlangıç limiti yalnızca ilk oluşturmada geçerlidir.
+    """
+    config = config or {}
+    initial_key, initial_default = _INITIAL_LIMIT_KEYS.get(name, (f"{name}_initial_concurrency", 2))
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                min_limit=config.get("ikas_min_concurrency", 1),
+                max_limit=config.get("ikas_max_concurrency", 8),
+                initial_limit=config.get(initial_key, initial_default),
+                latency_factor=latency_factor,
+            )
+            _limiters[name] = limiter
+        return limiter
+
+
+# ---------------------------------------------------------------------------
+# Devre kesici (endpoint ailesi başına)
+# ---------------------------------------------------------------------------
+
+class CircuitOpenError(NetworkError):
+    """Devre açık; istek gönderilmeden hızlı hata."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Ardışık hatalarda devreyi açar, reset_timeout sonra tek bir deneme isteğiyle
+    (half-open) servisi yoklar. Deneme başarılıysa kapanır, başarısızsa tekrar açılır.
+
+    Hata sayılanlar: ağ/timeout hataları ve 5xx. 4xx/429 servis ayakta demektir.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self.rejected_count = 0
+        self.calls = 0
+        self.last_error = ""
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """İstek öncesi çağrılır; devre açıksa CircuitOpenError fırlatır."""
+        with self._lock:
+            self.calls += 1
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.time() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected_count += 1
+            remaining = max(0.0, self.reset_timeout - (time.time() - self._opened_at))
+            raise CircuitOpenError(
+                f"{self.name} devresi açık ({self.consecutive_failures} ardışık hata, "
+                f"{remaining:.0f} sn sonra yeniden denenecek): {self.last_error}"
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, reason: str = ""):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = reason or self.last_error or "ağ hatası"
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened_count += 1
+                self.state = self.OPEN
+                self._opened_at = time.time()
+                self._probe_in_flight = False
+
+    def release_probe(self):
+        """Sonucu kaydedilemeyen istekten sonra (ör. istek kurulamadı) deneme hakkını geri ver."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_response(self, status: int):
+        if status >= 500:
+            self.record_failure(f"HTTP {status}")
+        else:
+            self.record_success()
+
+    def call(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """Tek isteği devre kontrolüyle gönder (limiter kullanılmayan API'ler için)."""
+        self.before_call()
+        try:
+            response = send()
+        except requests.RequestException as exc:
+            self.record_failure(type(exc).__name__)
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        self.record_response(response.status_code)
+        return response
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened_count": self.opened_count,
+                "rejected_count": self.rejected_count,
+                "calls": self.calls,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, config: dict = None) -> CircuitBreaker:
+    """Endpoint ailesi başına süreç genelinde paylaşılan devre kesici."""
+    config = config or {}
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=config.get("circuit_failure_threshold", 5),
+                reset_timeout=config.get("circuit_reset_seconds", 30),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def circuit_breaker_snapshots() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+class LatencyTracker:
+    """
+    Son N çağrının süresi (kayan pencere). Hedge gecikmesi gibi kendini
+    ayarlayan eşikler için yüzdelik verir. Thread-safe.
+    """
+
+    def __init__(self, name: str, window: int = 50):
+        self.name = name
+        self._samples = deque(maxlen=max(1, int(window)))
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(max(0.0, float(seconds)))
+
+    def percentile(self, q: float, default: Optional[float] = None, min_samples: int = 5) -> Optional[float]:
+        """q (0-1) yüzdeliği; örnek sayısı min_samples'tan azsa default döner."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < max(1, min_samples):
+            return default
+        index = min(len(samples) - 1, max(0, int(round(q * (len(samples) - 1)))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            count = len(self._samples)
+        return {
+            "name": self.name,
+            "samples": count,
+            "p50": self.percentile(0.5, min_samples=1),
+            "p90": self.percentile(0.9, min_samples=1),
+        }
+
+
+_latency_trackers: Dict[str, LatencyTracker] = {}
+_latency_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    """Sağlayıcı/endpoint başına süreç genelinde paylaşılan gecikme ölçer."""
+    with _latency_trackers_lock:
+        tracker = _latency_trackers.get(name)
+        if tracker is None:
+            tracker = LatencyTracker(name)
+            _latency_trackers[name] = tracker
+        return tracker
+
+
 # Test için
 if __name__ == "__main__":
     session = create_session()
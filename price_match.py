@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - Fiyat Kuralı Model Eşleştirme İndeksi
+Fiyat listesindeki model yazımı ile klasör/ürün adındaki yazım çoğu zaman
+birebir tutmaz ("RB2140", "RB 2140", "2140", "2140-01"). Bu modül marka başına
+önceden hesaplanmış anahtarlarla yakın yazımları tam eşleşme hızında bulur ve
+hangi kuralın neden seçildiğini döndürür.
+
+Eşleşme sırası (ilk tekil sonuç kazanır):
+    exact     -> normalize marka + model
+    canonical -> yalnız harf/rakam, baştaki sıfırlar atılmış ("RB-02140" = "rb2140")
+    core      -> harf öneki ve ek atılmış ana numara ("RB2140-01" = "2140")
+    ngram     -> aynı ana numaraya sahip modeller arasında 3-gram benzerliği
+    brand     -> markanın modelsiz kuralı
+Birden fazla kural aynı anahtara düşüyorsa (farklı fiyatlı) o seviye atlanır.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+NGRAM_SIZE = 3
+NGRAM_MIN_SCORE = 0.5
+
+_NON_ALNUM_RE = re.compile(r"[^0-9A-Z]+")
+_DIGIT_RUN_RE = re.compile(r"\d+")
+_CORE_RE = re.compile(r"(\d+)([A-Z]*)")
+_TR_UPPER = str.maketrans({"ı": "I", "i": "I", "ş": "S", "ğ": "G", "ç": "C", "ö": "O", "ü": "U"})
+_TR_FOLD = str.maketrans({"İ": "I", "Ş": "S", "Ğ": "G", "Ç": "C", "Ö": "O", "Ü": "U"})
+
+
+def _fold_upper(value: str) -> str:
+    return str(value or "").translate(_TR_UPPER).upper().translate(_TR_FOLD)
+
+
+def _strip_zeros(match: re.Match) -> str:
+    return match.group(0).lstrip("0") or "0"
+
+
+def canonical_brand(value: str) -> str:
+    """"Ray-Ban" / "RAY BAN" / "rayban" -> "RAYBAN"."""
+    return _NON_ALNUM_RE.sub("", _fold_upper(value))
+
+
+def canonical_model(value: str) -> str:
+    """Yalnız harf/rakam; rakam gruplarındaki baştaki sıfırlar atılır."""
+    text = _NON_ALNUM_RE.sub("", _fold_upper(value))
+    return _DIGIT_RUN_RE.sub(_strip_zeros, text)
+
+
+def model_core(value: str) -> str:
+    """
+    Ana model numarası: harf öneki ve ayraçtan sonraki ek atılır,
+    numaraya bitişik harfler korunur ("RB2140F" -> "2140F", "RB2140-01" -> "2140").
+    """
+    text = _NON_ALNUM_RE.sub(" ", _fold_upper(value))
+    match = _CORE_RE.search(text)
+    if not match:
+        return ""
+    return (match.group(1).lstrip("0") or "0") + match.group(2)
+
+
+def _primary_number(value: str) -> str:
+    match = _DIGIT_RUN_RE.search(canonical_model(value))
+    return match.group(0) if match else ""
+
+
+def _ngrams(text: str) -> Set[str]:
+    padded = f"^{text}$"
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+    return {padded[i : i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+@dataclass
+class ModelMatch:
+    rule: Any
+    reason: str  # exact | canonical | core | ngram | brand
+    matched_model: str = ""
+    score: float = 1.0
+
+    def describe(self) -> str:
+        if self.reason == "brand":
+            return "marka kurali (model eslesmedi)"
+        if self.reason == "ngram":
+            return f"{self.matched_model} ({self.reason}, benzerlik {self.score:.2f})"
+        return f"{self.matched_model} ({self.reason})"
+
+
+class _BrandIndex:
+    def __init__(self):
+        self.by_canonical: Dict[str, List[Tuple[str, Any]]] = {}
+        self.by_core: Dict[str, List[Tuple[str, Any]]] = {}
+        # Ana numara -> (model, 3-gram kümesi, kural); benzerlik yalnız bu kova içinde aranır.
+        self.by_number: Dict[str, List[Tuple[str, Set[str], Any]]] = {}
+
+    def add(self, model: str, rule: Any):
+        canonical = canonical_model(model)
+        if not canonical:
+            return
+        self.by_canonical.setdefault(canonical, []).append((model, rule))
+        core = model_core(model)
+        if core:
+            self.by_core.setdefault(core, []).append((model, rule))
+        self.by_number.setdefault(_primary_number(model), []).append((model, _ngrams(canonical), rule))
+
+
+def _unique(candidates: List[Tuple[str, Any]], same_rule) -> Optional[Tuple[str, Any]]:
+    if not candidates:
+        return None
+    first = candidates[0]
+    if all(same_rule(first[1], rule) for _, rule in candidates[1:]):
+        return first
+    return None
+
+
+class ModelMatchIndex:
+    """
+    Args:
+        exact_rules: (normalize_marka, normalize_model) -> kural
+        brand_rules: normalize_marka -> modelsiz kural
+        model_of: kuraldan listedeki model yazımını döndürür
+        same_rule: iki kural fiyat açısından aynı mı (çakışma kontrolü)
+    """
+
+    def __init__(
+        self,
+        exact_rules: Dict[Tuple[str, str], Any],
+        brand_rules: Dict[str, Any],
+        model_of: Callable[[Any], str],
+        same_rule: Optional[Callable[[Any, Any], bool]] = None,
+    ):
+        self.exact_rules = exact_rules
+        self.brand_rules = brand_rules
+        self.same_rule = same_rule or (lambda a, b: a == b)
+        self._brands: Dict[str, _BrandIndex] = {}
+        self._brand_alias: Dict[str, str] = {}
+
+        for (brand_key, _), rule in exact_rules.items():
+            self._brand_index(brand_key).add(model_of(rule), rule)
+        for brand_key in brand_rules:
+            self._brand_alias.setdefault(canonical_brand(brand_key), brand_key)
+
+    def _brand_index(self, brand_key: str) -> _BrandIndex:
+        index = self._brands.get(brand_key)
+        if index is None:
+            index = self._brands[brand_key] = _BrandIndex()
+            self._brand_alias.setdefault(canonical_brand(brand_key), brand_key)
+        return index
+
+    def _resolve_brand(self, brand_key: str) -> str:
+        if brand_key in self._brands or brand_key in self.brand_rules:
+            return brand_key
+        return self._brand_alias.get(canonical_brand(brand_key), "")
+
+    def match(self, brand_key: str, model_key: str, model: str = "") -> Optional[ModelMatch]:
+        """brand_key/model_key normalize edilmiş; model ham yazım (yoksa model_key)."""
+        if brand_key and model_key:
+            exact = self.exact_rules.get((brand_key, model_key))
+            if exact is not None:
+                return ModelMatch(exact, "exact", model or model_key)
+
+        resolved_brand = self._resolve_brand(brand_key) if brand_key else ""
+        if not resolved_brand:
+            return None
+
+        index = self._brands.get(resolved_brand)
+        raw_model = model or model_key
+        if index is not None and raw_model:
+            found = self._match_model(index, raw_model)
+            if found is not None:
+                return found
+
+        fallback = self.brand_rules.get(resolved_brand)
+        if fallback is not None:
+            return ModelMatch(fallback, "brand")
+        return None
+
+    def _match_model(self, index: _BrandIndex, model: str) -> Optional[ModelMatch]:
+        canonical = canonical_model(model)
+        if not canonical:
+            return None
+
+        hit = _unique(index.by_canonical.get(canonical, []), self.same_rule)
+        if hit:
+            return ModelMatch(hit[1], "canonical", hit[0])
+
+        core = model_core(model)
+        hit = _unique(index.by_core.get(core, []), self.same_rule) if core else None
+        if hit:
+            return ModelMatch(hit[1], "core", hit[0])
+
+        # Yalnız aynı ana numaralı modeller arasında benzerlik; numara farkı
+        # (2140 / 2141) farklı model demektir ve asla eşleşmez.
+        bucket = index.by_number.get(_primary_number(model))
+        if not bucket:
+            return None
+        grams = _ngrams(canonical)
+        scored = sorted(
+            (
+                (2.0 * len(grams & entry_grams) / (len(grams) + len(entry_grams)), position)
+                for position, (_, entry_grams, _) in enumerate(bucket)
+            ),
+            reverse=True,
+        )
+        best_score, best_position = scored[0]
+        if best_score < NGRAM_MIN_SCORE:
+            return None
+        best_model, _, best_rule = bucket[best_position]
+        for score, position in scored[1:]:
+            if score < best_score:
+                break
+            if not self.same_rule(best_rule, bucket[position][2]):
+                return None  # eşit benzerlikte farklı fiyat: belirsiz
+        return ModelMatch(best_rule, "ngram", best_model, best_score)
+
+
+# Test için
+if __name__ == "__main__":
+    import time
+
+    rules = {("ray-ban", "rb2140"): "RB2140", ("ray-ban", "rb3025"): "RB3025", ("prada", "spr17w"): "SPR17W"}
+    index = ModelMatchIndex(rules, {"ray-ban": "RAYBAN"}, model_of=lambda rule: rule)
+    for brand, model in [
+        ("ray-ban", "rb2140"),
+        ("ray-ban", "RB 02140"),
+        ("rayban", "2140-01"),
+        ("ray-ban", "2141"),
+        ("prada", "PR17WS"),
+    ]:
+        found = index.match(brand, model.lower(), model)
+        print(brand, model, "->", found.rule if found else None, found.describe() if found else "")
+
+    big = {("ray-ban", f"rb{n}"): f"RB{n}" for n in range(30000)}
+    index = ModelMatchIndex(big, {}, model_of=lambda rule: rule)
+    started = time.perf_counter()
+    for n in range(0, 30000, 3):
+        index.match("ray-ban", f"{n}-01", f"{n}-01")
+        index.match("ray-ban", f"rbx{n}f", f"RBX{n}F")
+    print(f"20000 yakın eşleşme: {(time.perf_counter() - started) * 1000 / 20000:.3f} ms/adet")
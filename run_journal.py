@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - Otomasyon Çalışma Günlüğü
+Tam otomasyonun ürün ve varyant bazlı ilerlemesini SQLite'a kalıcı yazar.
+Yarım kalan çalışma kaldığı yerden devam ettirilir; rapor satırları birleştirilir.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_key TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_key ON runs(run_key);
+CREATE TABLE IF NOT EXISTS products (
+    run_id INTEGER NOT NULL,
+    product TEXT NOT NULL,
+    status TEXT NOT NULL,
+    summary_delta TEXT NOT NULL,
+    report TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (run_id, product)
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL,
+    product TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    step TEXT NOT NULL,
+    detail TEXT,
+    PRIMARY KEY (run_id, product, variant, step)
+);
+"""
+
+# Bu durumla biten ürün devamda tekrar işlenir.
+RETRY_STATUSES = {"FAILED"}
+
+
+class RunJournal:
+    """
+    Tek bir çalışma anahtarı (output klasörü + fiyat dosyası) için ilerleme günlüğü.
+    Her kayıt anında commit edilir; uygulama kapansa da kaybolmaz.
+    """
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.run_id: Optional[int] = None
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # --- çalışma ------------------------------------------------------------
+
+    def start(self, run_key: str) -> int:
+        """Yeni çalışma aç; aynı anahtarın yarım kalanları terk edilmiş sayılır."""
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_key = ? AND finished_at IS NULL",
+                (now, run_key),
+            )
+            cursor = self._conn.execute(
+                "INSERT INTO runs(run_key, started_at) VALUES(?, ?)", (run_key, now)
+            )
+            self._conn.commit()
+            self.run_id = int(cursor.lastrowid)
+            return self.run_id
+
+    def resume(self, run_key: str) -> Optional[Dict]:
+        """
+        Anahtarın en son yarım kalan çalışmasını devral.
+
+        Returns:
+            None (devam edilecek çalışma yok) veya
+            {"run_id", "statuses": {ürün: durum}, "summary": {...}, "report": [...]}.
+            RETRY_STATUSES durumundaki ürünler sonuca dahil edilmez, yeniden işlenir.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id FROM runs WHERE run_key = ? AND finished_at IS NULL "
+                "ORDER BY run_id DESC LIMIT 1",
+                (run_key,),
+            ).fetchone()
+            if not row:
+                return None
+            self.run_id = int(row[0])
+            rows = self._conn.execute(
+                "SELECT product, status, summary_delta, report FROM products "
+                "WHERE run_id = ? ORDER BY completed_at",
+                (self.run_id,),
+            ).fetchall()
+
+            statuses: Dict[str, str] = {}
+            summary: Dict[str, int] = {}
+            report: List[Dict] = []
+            for product, status, summary_delta, report_json in rows:
+                if status in RETRY_STATUSES:
+                    # Tekrar işlenecek; eski adım kayıtları da geçersiz.
+                    self._conn.execute(
+                        "DELETE FROM products WHERE run_id = ? AND product = ?", (self.run_id, product)
+                    )
+                    self._conn.execute(
+                        "DELETE FROM steps WHERE run_id = ? AND product = ?", (self.run_id, product)
+                    )
+                    continue
+                statuses[product] = status
+                for key, value in json.loads(summary_delta).items():
+                    summary[key] = summary.get(key, 0) + int(value)
+                report.extend(json.loads(report_json))
+            self._conn.commit()
+            return {"run_id": self.run_id, "statuses": statuses, "summary": summary, "report": report}
+
+    def finish(self):
+        with self._lock:
+            if self.run_id is None:
+                return
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), self.run_id)
+            )
+            self._conn.commit()
+
+    # --- ürün / adım --------------------------------------------------------
+
+    def complete_product(
+        self, product: str, status: str, summary_delta: Dict[str, int], report: List[Dict]
+    ):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO products(run_id, product, status, summary_delta, report, completed_at) "
+                "VALUES(?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(run_id, product) DO UPDATE SET status = excluded.status, "
+                "summary_delta = excluded.summary_delta, report = excluded.report, "
+                "completed_at = excluded.completed_at",
+                (
+                    self.run_id,
+                    product,
+                    status,
+                    json.dumps(summary_delta, ensure_ascii=False),
+                    json.dumps(report, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def mark_step(self, product: str, step: str, variant: str = "", detail: str = ""):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO steps(run_id, product, variant, step, detail) VALUES(?, ?, ?, ?, ?) "
+                "ON CONFLICT(run_id, product, variant, step) DO UPDATE SET detail = excluded.detail",
+                (self.run_id, product, variant or "", step, str(detail or "")),
+            )
+            self._conn.commit()
+
+    def step_detail(self, product: str, step: str, variant: str = "") -> Optional[str]:
+        """Adım tamamlandıysa detayını (boş olabilir), değilse None döndür."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT detail FROM steps WHERE run_id = ? AND product = ? AND variant = ? AND step = ?",
+                (self.run_id, product, variant or "", step),
+            ).fetchone()
+        return None if row is None else str(row[0] or "")
+
+
+def get_run_journal(config: dict = None) -> RunJournal:
+    """Mağaza başına çalışma günlüğü (cache_dir altında)."""
+    config = config or {}
+    store_name = re.sub(r"[^a-z0-9_-]+", "_", str(config.get("store_name") or "default").strip().lower())
+    return RunJournal(os.path.join(config.get("cache_dir", "cache"), f"ikas_runs_{store_name}.sqlite3"))
+
+
+def build_run_key(output_dir: str, price_rules_path: str) -> str:
+    return "|".join(
+        os.path.normcase(os.path.abspath(str(path or ""))) for path in (output_dir, price_rules_path)
+    )
+
+
+# Test için
+if __name__ == "__main__":
+    import tempfile
+
+    journal = RunJournal(os.path.join(tempfile.mkdtemp(), "runs.sqlite3"))
+    key = build_run_key("output", "fiyat.xlsx")
+    journal.start(key)
+    journal.mark_step("Rayban 2140", "resolved", detail="CREATED:p1")
+    journal.complete_product("Rayban 2140", "CREATED", {"created_products": 1}, [{"status": "CREATED"}])
+    journal.complete_product("Rayban 3025", "FAILED", {"failed_products": 1}, [{"status": "FAILED"}])
+    journal.mark_step("Prada 17", "images", "C01", "3")
+
+    resumed = RunJournal(journal.db_path).resume(key)
+    print("Devam:", resumed["statuses"], resumed["summary"], len(resumed["report"]))
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - ikas Görsel Yükleme Manifestosu
+Her varyant için yüklenen görselleri (sıra, içerik özeti, ikas imageId) SQLite'ta tutar.
+Yeniden çalıştırmada yalnızca eksik veya içeriği değişen dosyalar yüklenir; değişen
+dosyanın eski görseli ikas'ta duruyorsa kopya oluşmasın diye yükleme bekletilir.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    variant_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    image_id TEXT,
+    file_name TEXT,
+    uploaded_at REAL,
+    PRIMARY KEY (variant_id, position)
+);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+"""
+
+
+class UploadManifest:
+    """
+    (varyant id, sıra) -> (içerik özeti, imageId) kaydı.
+    Dosya özetleri (yol, boyut, mtime) ile önbelleğe alınır; değişmeyen dosya tekrar okunmaz.
+    Tüm metodlar thread-safe'tir.
+    """
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # --- içerik özeti -------------------------------------------------------
+
+    def content_hash(self, image_path: Union[str, Path]) -> str:
+        """Dosyanın sha256 özeti; boyut/mtime değişmediyse kayıtlı özet döner."""
+        path = str(Path(image_path).resolve())
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash FROM file_hashes WHERE path = ?", (path,)
+            ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO file_hashes(path, size, mtime_ns, content_hash) VALUES(?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, "
+                "mtime_ns = excluded.mtime_ns, content_hash = excluded.content_hash",
+                (path, stat.st_size, stat.st_mtime_ns, value),
+            )
+            self._conn.commit()
+        return value
+
+    # --- kayıtlar -----------------------------------------------------------
+
+    def entries(self, variant_id: str) -> Dict[int, Dict]:
+        """Varyantın kayıtlı görselleri: sıra -> {content_hash, image_id, file_name}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, content_hash, image_id, file_name FROM uploads WHERE variant_id = ?",
+                (str(variant_id),),
+            ).fetchall()
+        return {
+            int(position): {"content_hash": content_hash, "image_id": image_id, "file_name": file_name}
+            for position, content_hash, image_id, file_name in rows
+        }
+
+    def record(
+        self,
+        variant_id: str,
+        position: int,
+        content_hash: str,
+        image_id: Optional[str] = None,
+        file_name: str = "",
+    ):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO uploads(variant_id, position, content_hash, image_id, file_name, uploaded_at) "
+                "VALUES(?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(variant_id, position) DO UPDATE SET content_hash = excluded.content_hash, "
+                "image_id = excluded.image_id, file_name = excluded.file_name, "
+                "uploaded_at = excluded.uploaded_at",
+                (str(variant_id), int(position), content_hash, image_id, file_name, time.time()),
+            )
+            self._conn.commit()
+
+    def plan(
+        self,
+        variant_id: str,
+        local_images: List[Tuple[int, Path]],
+        remote_images: Optional[List[Dict]],
+    ) -> Tuple[List[Tuple[int, Path, str]], int, List[Tuple[int, Path, str]]]:
+        """
+        Yüklenmesi gereken görselleri belirle.
+
+        İçeriği değişen dosyanın eski görseli ikas'ta hâlâ duruyorsa yükleme yapılmaz:
+        ikas yükleme uç noktası görseli değiştirmez, yanına yenisini ekler; silme
+        işlemi de bu araçta yok. Eski görsel panelden kaldırılınca sonraki
+        çalışmada yeni dosya yüklenir.
+
+        Args:
+            variant_id: ikas varyant id
+            local_images: (sıra, dosya yolu) listesi
+            remote_images: ikas'taki varyant görselleri (imageId, order)
+
+        Returns:
+            ([(sıra, dosya yolu, içerik özeti), ...], atlanan görsel sayısı,
+             [(sıra, dosya yolu, eski imageId), ...] değişen ama eskisi duran görseller)
+        """
+        remote_images = [img or {} for img in (remote_images or [])]
+        remote_ids = {str(img.get("imageId")) for img in remote_images if img.get("imageId")}
+        remote_by_order = {}
+        for img in remote_images:
+            if img.get("order") is not None:
+                remote_by_order.setdefault(int(img["order"]), img)
+        known = self.entries(variant_id)
+        claimed_ids = {str(e["image_id"]) for e in known.values() if e.get("image_id")}
+
+        todo: List[Tuple[int, Path, str]] = []
+        superseded: List[Tuple[int, Path, str]] = []
+        skipped = 0
+        for order, image_path in local_images:
+            digest = self.content_hash(image_path)
+            entry = known.get(int(order))
+            remote_at_order = remote_by_order.get(int(order))
+
+            if entry is None:
+                remote_id = str((remote_at_order or {}).get("imageId") or "")
+                if remote_at_order is not None and remote_id not in claimed_ids:
+                    # Manifestodan önce yüklenmiş görsel: ikas'taki kaydı sahiplen.
+                    self.record(
+                        variant_id, order, digest, remote_at_order.get("imageId"), Path(image_path).name
+                    )
+                    skipped += 1
+                    continue
+                todo.append((order, image_path, digest))
+                continue
+
+            image_id = entry.get("image_id")
+            still_remote = (str(image_id) in remote_ids) if image_id else remote_at_order is not None
+            if entry["content_hash"] != digest:
+                if still_remote:
+                    # Yüklemek eski görselin yanına ikinci bir kopya ekler.
+                    old_id = image_id or (remote_at_order or {}).get("imageId") or ""
+                    superseded.append((order, image_path, str(old_id)))
+                else:
+                    todo.append((order, image_path, digest))
+                continue
+
+            if still_remote:
+                skipped += 1
+            else:
+                todo.append((order, image_path, digest))
+
+        return todo, skipped, superseded
+
+
+_manifests: Dict[str, UploadManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_upload_manifest(config: dict = None) -> UploadManifest:
+    """Mağaza başına paylaşılan yükleme manifestosunu döndür."""
+    config = config or {}
+    store_name = re.sub(r"[^a-z0-9_-]+", "_", str(config.get("store_name") or "default").strip().lower())
+    db_path = os.path.join(config.get("cache_dir", "cache"), f"ikas_uploads_{store_name}.sqlite3")
+    with _manifests_lock:
+        manifest = _manifests.get(db_path)
+        if manifest is None:
+            manifest = UploadManifest(db_path)
+            _manifests[db_path] = manifest
+        return manifest
+
+
+# Test için
+if __name__ == "__main__":
+    import tempfile
+
+    folder = Path(tempfile.mkdtemp())
+    first, second = folder / "1.jpg", folder / "2.jpg"
+    first.write_bytes(b"a" * 10)
+    second.write_bytes(b"b" * 10)
+    manifest = UploadManifest(str(folder / "uploads.sqlite3"))
+    local = [(0, first), (1, second)]
+
+    todo, skipped, _ = manifest.plan("v1", local, [])
+    print("İlk çalıştırma:", [o for o, _, _ in todo], "atlanan:", skipped)
+    manifest.record("v1", 0, todo[0][2], "img-0", first.name)
+
+    todo, skipped, _ = manifest.plan("v1", local, [{"imageId": "img-0", "order": 0}])
+    print("Yarım kalan sonrası:", [o for o, _, _ in todo], "atlanan:", skipped)
+
+    first.write_bytes(b"c" * 12)
+    todo, skipped, superseded = manifest.plan("v1", local, [{"imageId": "img-0", "order": 0}])
+    print("Değişen, eskisi duruyor:", [o for o, _, _ in todo], "bekleyen:", [i for _, _, i in superseded])
+    todo, skipped, superseded = manifest.plan("v1", local, [])
+    print("Eskisi silindikten sonra:", [o for o, _, _ in todo], "bekleyen:", superseded)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Kepekçi Optik - ikas Yükleme Türevleri
+Studio çıktılarından ikas'a uygun türev üretir: uzun kenar sınırı, metadata'sız,
+WebP/JPEG yapılandırılmış kalite. Şeffaf görseller JPEG'e düzleştirilmez, PNG kalır.
+Türevler içerik özetiyle output altında önbelleklenir.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+
+UPLOAD_CACHE_DIRNAME = ".ikas_upload"
+DEFAULT_MAX_EDGE = 2048
+DEFAULT_FORMAT = "jpeg"
+DEFAULT_QUALITY = 88
+
+_FORMATS = {
+    "jpeg": ("JPEG", ".jpg"),
+    "jpg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+}
+
+# (kaynak yolu, hedef klasör, uzun kenar, format, kalite)
+PrepTask = Tuple[str, str, int, str, int]
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _has_transparency(img: Image.Image) -> bool:
+    """Görselde gerçekten saydam piksel var mı? (tamamen opak alfa kanalı sayılmaz)"""
+    if "A" not in img.getbands() and not (img.mode == "P" and "transparency" in img.info):
+        return False
+    return img.convert("RGBA").getchannel("A").getextrema()[0] < 255
+
+
+def _flatten_on_white(img: Image.Image) -> Image.Image:
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return img.convert("RGB")
+
+
+def build_derivative(task: PrepTask) -> str:
+    """
+    Tek görsel için yükleme türevi üret (işçi süreçte çalışır).
+
+    Returns:
+        Yüklenecek dosyanın yolu. Türev kaynaktan büyük çıkarsa kaynak yolu döner.
+    """
+    source, cache_dir, max_edge, fmt, quality = task
+    pil_format, suffix = _FORMATS.get(fmt, _FORMATS[DEFAULT_FORMAT])
+    stem = f"{_file_digest(source)[:32]}_{max_edge}"
+    target = Path(cache_dir) / f"{stem}_{pil_format.lower()}_{quality}{suffix}"
+    # JPEG istenip kaynak saydamsa türev PNG'dir; önbellekte hangisi varsa o döner.
+    alpha_target = Path(cache_dir) / f"{stem}_png.png"
+    for cached in (target, alpha_target) if pil_format == "JPEG" else (target,):
+        if cached.exists():
+            return str(cached)
+
+    with Image.open(source) as img:
+        img.load()
+        if pil_format == "JPEG" and _has_transparency(img):
+            # Saydam görsel beyaza düzleştirilmez (beyaz olmayan temada kutu görünür).
+            pil_format, target = "PNG", alpha_target
+            out = img.convert("RGBA")
+        elif pil_format == "JPEG":
+            out = _flatten_on_white(img)
+        else:
+            out = img.convert("RGBA") if "A" in img.getbands() else img.convert("RGB")
+        if max_edge and max(out.size) > max_edge:
+            out.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.stem}.{os.getpid()}.tmp")
+        # exif/icc/png metinleri aktarılmaz; yalnız piksel verisi yazılır.
+        if pil_format == "JPEG":
+            out.save(tmp, pil_format, quality=quality, optimize=True, progressive=True)
+        elif pil_format == "PNG":
+            out.save(tmp, pil_format, optimize=True)
+        else:
+            out.save(tmp, pil_format, quality=quality, method=4)
+
+    if tmp.stat().st_size >= os.path.getsize(source):
+        tmp.unlink()
+        return source
+    os.replace(tmp, target)
+    return str(target)
+
+
+class UploadPreparer:
+    """
+    Yükleme türevlerini süreç havuzunda hazırlar.
+    Havuz ilk kullanımda açılır ve close() ile kapatılır; hata olursa işlem içinde devam eder.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        max_edge: int = DEFAULT_MAX_EDGE,
+        fmt: str = DEFAULT_FORMAT,
+        quality: int = DEFAULT_QUALITY,
+        workers: int = 0,
+        enabled: bool = True,
+    ):
+        self.cache_dir = str(cache_dir)
+        self.max_edge = max(0, int(max_edge or 0))
+        self.fmt = str(fmt or DEFAULT_FORMAT).strip().lower()
+        if self.fmt not in _FORMATS:
+            self.fmt = DEFAULT_FORMAT
+        self.quality = min(100, max(1, int(quality or DEFAULT_QUALITY)))
+        self.workers = int(workers or 0) or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.enabled = bool(enabled)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def prepare(self, paths: List[Path]) -> Dict[Path, Path]:
+        """Kaynak -> yüklenecek dosya eşlemesi. Hazırlanamayan görselde kaynak kullanılır."""
+        mapping = {Path(p): Path(p) for p in paths}
+        if not self.enabled or not paths:
+            return mapping
+
+        tasks = [
+            (str(p), self.cache_dir, self.max_edge, self.fmt, self.quality) for p in mapping
+        ]
+        for source, result in zip(mapping, self._run(tasks)):
+            if result:
+                mapping[source] = Path(result)
+        return mapping
+
+    def _run(self, tasks: List[PrepTask]) -> List[Optional[str]]:
+        if len(tasks) > 1 and self.workers > 1:
+            try:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                futures = [self._pool.submit(build_derivative, task) for task in tasks]
+                results = []
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except BrokenProcessPool:
+                        raise
+                    except Exception:
+                        results.append(None)
+                return results
+            except (BrokenProcessPool, OSError, RuntimeError):
+                self.close()
+                self.workers = 1
+
+        results = []
+        for task in tasks:
+            try:
+                results.append(build_derivative(task))
+            except Exception:
+                results.append(None)
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+# Test için
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    folder = Path(tempfile.mkdtemp())
+    sources = []
+    for index in range(4):
+        path = folder / f"{index}.png"
+        # Son görsel yarı saydam: JPEG yerine PNG türevi üretilmeli.
+        alpha = 128 if index == 3 else 255
+        Image.new("RGBA", (3000, 2000), (200, 30 * index, 90, alpha)).save(path, "PNG")
+        sources.append(path)
+
+    preparer = UploadPreparer(folder / UPLOAD_CACHE_DIRNAME, workers=2)
+    started = time.time()
+    result = preparer.prepare(sources)
+    preparer.close()
+    for src, dst in result.items():
+        with Image.open(dst) as img:
+            print(src.name, "->", dst.name, img.size, f"{dst.stat().st_size} / {src.stat().st_size} bayt")
+    print(f"Süre: {time.time() - started:.2f} sn")
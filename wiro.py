@@ -12,7 +12,14 @@ import requests
 
 # Import from local modules
 try:
-    from net import create_session, post_json, request_binary, NetworkError, TimeoutError
+    from net import (
+        create_session,
+        post_json,
+        request_binary,
+        get_circuit_breaker,
+        NetworkError,
+        TimeoutError,
+    )
     from logging_utils import log_info, log_warning, log_error, log_success
     from config import get_timeout
 except ImportError:
@@ -22,6 +29,11 @@ except ImportError:
     def log_error(msg): print(f"❌ {msg}")
     def log_success(msg): print(f"✅ {msg}")
 
+    class _NoBreaker:
+        def call(self, send): return send()
+
+    def get_circuit_breaker(name, config=None): return _NoBreaker()
+
 
 # API Constants
 WIRO_API_BASE = "https://api.wiro.ai/v1"
@@ -120,12 +132,15 @@ def _start_task(
         
         timeout = get_timeout(config) if config else (10, 120)
         
-        response = session.post(
-            NANO_BANANA_ENDPOINT,
-            headers=headers,
-            files=files,
-            data=data,
-            timeout=timeout
+        # Wiro çöktüyse her görsel için timeout beklenmesin (devre kesici).
+        response = get_circuit_breaker("wiro", config).call(
+            lambda: session.post(
+                NANO_BANANA_ENDPOINT,
+                headers=headers,
+                files=files,
+                data=data,
+                timeout=timeout
+            )
         )
     
     if response.status_code != 200: